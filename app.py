@@ -2,12 +2,32 @@ from flask import Flask, render_template, request
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from jogo import Jogador, PartidaMultiplayer, Configuracao
 from health import register_health_routes
+from armazem_salas import criar_armazem
+from shards import SHARD_INDICE, SHARD_TOTAL
+from codigos_sala import AlocadorCodigos
+from limpeza_salas import LimpadorSalas
+from snapshot_salas import criar_snapshot
+from diario_salas import criar_diario
+from instrumentacao import ErroEvento, Instrumentacao
+from limitador import Limitador
+from lotes_sala import LotesPorSala
+from collections import Counter
+from contextlib import contextmanager
+from codificacao import pre_codificar
+import codificacao
+import log_assincrono
+import metricas
+import atexit
 import logging
 import os
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'jogo_das_palavras_secret')
 
+# Com mais de um worker, os emits para uma sala precisam passar por uma fila
+# compartilhada (ex.: redis://localhost:6379/1) para chegar aos clientes dos outros workers
+message_queue = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
+
 # Configurações otimizadas para produção
 socketio = SocketIO(
     app, 
@@ -15,123 +35,347 @@ socketio = SocketIO(
     ping_timeout=60,
     ping_interval=25,
     logger=False,
-    engineio_logger=False
+    engineio_logger=False,
+    message_queue=message_queue,
+    json=codificacao,  # Permite emitir payloads pré-codificados (codificados uma vez por versão)
+    serializer=codificacao.PacoteSocketIO  # Aceita também MessagePack (veja codificacao.py)
 )
+# Conexões com ?codificacao=msgpack recebem os pacotes em MessagePack
+codificacao.negociar_por_conexao(socketio.server)
+
+# Codificação sugerida às páginas do jogo (json ou msgpack, se o msgpack estiver instalado);
+# a página aceita ?codificacao=... para escolher outra
+CODIFICACAO_PADRAO = os.environ.get('SOCKET_CODIFICACAO', 'json')
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+# Configurar logging (fila e escritor dedicado, com amostragem dos eventos frequentes)
+log_assincrono.configurar()
 logger = logging.getLogger(__name__)
 
-# Registrar rotas de health check
-register_health_routes(app)
+if CODIFICACAO_PADRAO not in codificacao.CODIFICACOES:
+    # Ex.: msgpack pedido sem o pacote instalado
+    logger.warning('SOCKET_CODIFICACAO=%s indisponível (disponíveis: %s): as páginas usarão JSON',
+                   CODIFICACAO_PADRAO, ', '.join(codificacao.CODIFICACOES))
+
+# Armazém das partidas (memória do processo por padrão; veja armazem_salas.py)
+salas = criar_armazem()
+
+# Snapshots do armazém em memória: as salas sobrevivem à reciclagem do worker
+# (veja snapshot_salas.py; None se desligado ou com armazém compartilhado)
+snapshots = criar_snapshot(salas)
+if snapshots is not None:
+    atexit.register(snapshots.salvar_no_encerramento)
+
+# Diário das ações de cada sala: recupera as jogadas feitas depois do último
+# snapshot se o processo morrer (veja diario_salas.py; None se desligado)
+diario = criar_diario(salas)
+if diario is not None:
+    atexit.register(diario.parar)
+
+def registrar_no_diario(sala, partida, tipo, **campos):
+    """Anota no diário uma ação já aplicada à partida (logo após a mutação, antes dos emits)"""
+    if diario is not None:
+        diario.registrar(sala, partida, tipo, **campos)
+
+# Com o estado compartilhado entre workers, cada conexão deve ficar presa a um
+# único worker: usar só WebSocket (long-polling espalharia as requisições)
+TRANSPORTES_SOCKET = ['websocket'] if salas.compartilhado else ['polling', 'websocket']
+
+# Sessões das conexões: request.sid -> (código da sala, nome do jogador).
+# Preenchido ao criar/entrar na sala; os demais eventos identificam o jogador
+# por aqui em vez de confiar no 'sala'/'nome' enviados pelo cliente.
+sessoes = {}
+
+MENSAGENS_SALA_ENCERRADA = {
+    'ociosa': 'A sala foi encerrada por inatividade',
+    'finalizada': 'A sala foi encerrada após o fim do jogo',
+    'limite': 'A sala foi encerrada porque o servidor atingiu o limite de salas',
+    'vazia': 'A sala foi encerrada porque todos os jogadores saíram'
+}
+
+def encerrar_sala(codigo, motivo):
+    """Avisa os clientes de uma sala removida (pela limpeza ou por ter ficado vazia) e esquece seu estado"""
+    socketio.emit('sala_encerrada', {'msg': MENSAGENS_SALA_ENCERRADA[motivo]}, room=codigo)
+    socketio.close_room(codigo)
+    limitador.esquecer_sala(codigo)
+    lotes_chat.descartar(codigo)
+    lotes_emoji.descartar(codigo)
+    alocador_codigos.liberar(codigo)
+    registrar_no_diario(codigo, None, 'encerrar', motivo=motivo)
+    for sid in [sid for sid, (sala, _) in sessoes.items() if sala == codigo]:
+        del sessoes[sid]
+
+def anunciar_saida(sala, partida, nomes, msg):
+    """Avisa a sala da saída de jogadores (e do fim de jogo, se a saída decidiu o vencedor)"""
+    patch = partida.publicar_estado()
+    socketio.emit('jogador_saiu', {
+        'jogador': ', '.join(nomes),
+        'msg': msg,
+        'jogadores_restantes': [j.nome for j in partida.jogadores],
+        'patch': patch
+    }, room=sala)
+    
+    if patch and patch['campos'].get('vencedor'):
+        vencedor = partida.vencedor.nome
+        socketio.emit('fim_de_jogo', {
+            'vencedor': vencedor,
+            'mensagem': f'{vencedor} venceu o jogo!'
+        }, room=sala)
+
+def remover_desconectados(sala, partida, nomes):
+    """Chamado pela limpeza ao tirar da partida jogadores que não voltaram a tempo"""
+    registrar_no_diario(sala, partida, 'sair', jogadores=nomes)
+    anunciar_saida(sala, partida, nomes, f'{", ".join(nomes)} não voltou a tempo e saiu da sala')
+
+# Códigos de sala únicos sem sorteio; no modo shard, só códigos deste shard
+alocador_codigos = AlocadorCodigos(SHARD_INDICE, SHARD_TOTAL)
+os.register_at_fork(after_in_child=alocador_codigos.reiniciar_apos_fork)
+TENTATIVAS_CODIGO = 10
+
+# Expira salas abandonadas, aplica o limite de salas e remove jogadores que
+# caíram e não voltaram dentro da tolerância (veja limpeza_salas.py)
+limpador = LimpadorSalas(salas, ao_remover=encerrar_sala, ao_remover_jogadores=remover_desconectados)
 
-salas = {}
+# Mensagens de chat entregues em lotes por sala: um emit 'mensagens_chat' por
+# janela de CHAT_JANELA_MS (ou a cada CHAT_LOTE_MAXIMO mensagens) em vez de um
+# por mensagem. Com CHAT_JANELA_MS=0 cada mensagem sai na hora em 'nova_mensagem_chat'.
+CHAT_JANELA = float(os.environ.get('CHAT_JANELA_MS', 50)) / 1000
+CHAT_LOTE_MAXIMO = int(os.environ.get('CHAT_LOTE_MAXIMO', 20))
+
+def entregar_chat(sala, mensagens):
+    socketio.emit('mensagens_chat', {'mensagens': mensagens}, room=sala)
+
+lotes_chat = LotesPorSala(socketio, entregar_chat, CHAT_JANELA, CHAT_LOTE_MAXIMO)
+
+# Emojis permitidos (segurança)
+EMOJIS_PERMITIDOS = frozenset(['👍', '👎', '🤔', '😂', '😱', '🔥', '💡', '❤️'])
+
+# Reações agregadas por sala: um 'emojis_recebidos' por janela de EMOJI_JANELA_MS
+# com a quantidade de cada emoji por jogador. Com EMOJI_JANELA_MS=0 cada
+# reação sai na hora em 'emoji_recebido'.
+EMOJI_JANELA = float(os.environ.get('EMOJI_JANELA_MS', 300)) / 1000
+
+def entregar_emojis(sala, reacoes):
+    socketio.emit('emojis_recebidos', {'reacoes': [
+        {'nome': nome, 'emoji': emoji, 'quantidade': quantidade}
+        for (nome, emoji), quantidade in Counter(reacoes).items()
+    ]}, room=sala)
+
+lotes_emoji = LotesPorSala(socketio, entregar_emojis, EMOJI_JANELA)
+
+# Medidores calculados na coleta do /metrics
+metricas.medidor('jogo_salas', 'Salas existentes no armazém', lambda: len(salas))
+metricas.medidor('jogo_jogos_em_andamento', 'Salas com jogo iniciado e sem vencedor', lambda: salas.contar_em_andamento())
+metricas.medidor('jogo_codigos_sala_em_uso', 'Códigos de sala alocados por este processo e ainda em uso',
+                 lambda: alocador_codigos.em_uso)
+metricas.medidor('jogo_jogadores_conectados', 'Conexões associadas a um jogador neste processo', lambda: len(sessoes))
+
+# Registrar rotas de health check e /metrics
+estatisticas_saude = {
+    'salas': limpador.estatisticas,
+    'codigos_sala': alocador_codigos.estatisticas,
+    'jogadores_conectados': lambda: len(sessoes),
+    'chat': lotes_chat.estatisticas,
+    'emoji': lotes_emoji.estatisticas,
+    'logs': log_assincrono.estatisticas
+}
+if snapshots is not None:
+    estatisticas_saude['snapshot'] = snapshots.estatisticas
+if diario is not None:
+    estatisticas_saude['diario'] = diario.estatisticas
+amostrador_saude = register_health_routes(app, socketio=socketio, estatisticas=estatisticas_saude)
+
+@contextmanager
+def sessao_atual(somente_leitura=False):
+    """Abre uma transação na sala da conexão atual e produz (sala, partida, jogador)
+    
+    Levanta ErroEvento se a conexão não estiver em uma sala. Com
+    `somente_leitura` a partida é apenas lida, sem travar a sala no armazém.
+    """
+    sessao = sessoes.get(request.sid)
+    if not sessao:
+        raise ErroEvento('Você não está em uma sala')
+    
+    sala, nome = sessao
+    if somente_leitura:
+        partida = salas.obter(sala)
+        jogador = partida.obter_jogador(nome) if partida else None
+        if not jogador:
+            raise ErroEvento('Você não está em uma sala')
+        yield sala, partida, jogador
+        return
+    
+    with salas.transacao(sala) as partida:
+        jogador = partida.obter_jogador(nome) if partida else None
+        if not jogador:
+            raise ErroEvento('Você não está em uma sala')
+        partida.registrar_atividade()
+        yield sala, partida, jogador
+        # O que o handler alterou sem mandar em um patch próprio (ex.: palavras antes do início)
+        enviar_patch_pendente(sala, partida)
+
+def enviar_patch_pendente(sala, partida):
+    """Publica as alterações ainda não enviadas: a versão só avança junto com um patch para a sala"""
+    patch = partida.publicar_estado()
+    if patch:
+        socketio.emit('estado_alterado', {'patch': patch}, room=sala)
+
+def contexto_evento():
+    """Sala e número de jogadores da conexão atual (para o log de eventos lentos)"""
+    sessao = sessoes.get(request.sid)
+    if not sessao:
+        return None, 0
+    partida = salas.obter(sessao[0])
+    return sessao[0], len(partida.jogadores) if partida else 0
+
+# Limites de taxa por conexão e por sala (veja limitador.py)
+limitador = Limitador(sala_da_conexao=lambda sid: sessoes.get(sid, (None, None))[0])
+
+# Limites, tratamento de erros, métricas e log de eventos lentos de todos os handlers
+instrumentacao = Instrumentacao(contexto=contexto_evento, limitador=limitador)
+instrumentacao.registrar_rota_admin(app)
+
+def evento(nome, descricao, erros_usuario=()):
+    """Registra um handler Socket.IO instrumentado (veja instrumentacao.py)"""
+    def decorador(funcao):
+        return socketio.on(nome)(instrumentacao.envolver(nome, funcao, descricao, erros_usuario))
+    return decorador
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template('index.html', transportes=TRANSPORTES_SOCKET)
 
 @app.route('/sala/<codigo>')
 def sala_jogo(codigo):
-    return render_template('jogo.html')
+    pedida = request.args.get('codificacao', CODIFICACAO_PADRAO)
+    codificacao_socket = pedida if pedida in codificacao.CODIFICACOES else 'json'
+    return render_template('jogo.html', transportes=TRANSPORTES_SOCKET, codificacao=codificacao_socket)
 
-@socketio.on('connect')
-def on_connect():
-    logger.info(f'Cliente conectado: {request.sid}')
+@evento('connect', 'conectar')
+def on_connect(auth=None):
+    # Iniciadas aqui (e não na importação) para rodar dentro de cada worker do gunicorn
+    restauradas = False
+    if snapshots is not None:
+        restauradas = snapshots.iniciar(socketio)  # Antes de tudo: restaura as salas do worker anterior
+    if diario is not None:
+        restauradas = diario.iniciar(socketio) or restauradas  # Reaplica as ações posteriores ao snapshot
+    if restauradas:
+        # Códigos das salas que voltaram: em uso e nunca gerados de novo pelo alocador
+        alocador_codigos.registrar_existentes(salas.codigos())
+    limpador.iniciar(socketio)
+    amostrador_saude.iniciar(socketio)
+    log_assincrono.registrar_evento(logger, 'conexao', sid=request.sid)
 
-@socketio.on('disconnect')
+@evento('disconnect', 'desconectar')
 def on_disconnect():
-    logger.info(f'Cliente desconectado: {request.sid}')
+    log_assincrono.registrar_evento(logger, 'desconexao', sid=request.sid)
+    limitador.esquecer_conexao(request.sid)
+    sessao = sessoes.pop(request.sid, None)
+    if not sessao:
+        return
+    sala, nome = sessao
+    
+    # O jogador mantém a vaga até a limpeza expirar a desconexão; a vez dele é pulada
+    with salas.transacao(sala) as partida:
+        if partida is not None and partida.desconectar_jogador(nome, request.sid):
+            registrar_no_diario(sala, partida, 'conexao', jogador=nome, conectado=False)
+            socketio.emit('jogador_conexao', {
+                'jogador': nome,
+                'conectado': False,
+                'msg': f'{nome} desconectou',
+                'patch': partida.publicar_estado()
+            }, room=sala)
+            logger.info('Jogador %s desconectou da sala %s', nome, sala)
 
-@socketio.on('criar_sala')
+@evento('criar_sala', 'criar sala')
 def criar_sala(data):
-    try:
-        nome = data.get('nome', '').strip()
-        num_palavras = int(data.get('num_palavras', 5))
-        max_jogadores = int(data.get('max_jogadores', 2))
-        
-        if not nome:
-            emit('erro', {'msg': 'Nome é obrigatório'})
-            return
-        
-        if len(nome) > 20:
-            emit('erro', {'msg': 'Nome deve ter no máximo 20 caracteres'})
-            return
-        
-        # Gerar código da sala
-        import random
-        import string
-        codigo = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        
-        # Criar configuração e partida
-        config = Configuracao(num_palavras, max_jogadores)
-        partida = PartidaMultiplayer(config)
+    nome = data.get('nome', '').strip()
+    num_palavras = int(data.get('num_palavras', 5))
+    max_jogadores = int(data.get('max_jogadores', 2))
+    
+    if not nome:
+        raise ErroEvento('Nome é obrigatório')
+    
+    if len(nome) > 20:
+        raise ErroEvento('Nome deve ter no máximo 20 caracteres')
+    
+    # Criar configuração e partida
+    config = Configuracao(num_palavras, max_jogadores)
+    partida = PartidaMultiplayer(config)
+    partida.criador = nome
+    
+    # Criar jogador e adicionar à partida
+    jogador = Jogador(nome, num_palavras)
+    partida.adicionar_jogador(jogador)
+    partida.conectar_jogador(nome, request.sid)
+    
+    # Código do alocador (único neste processo e, no modo shard, deste shard).
+    # Com armazém compartilhado outro worker pode já usar o código: o armazém
+    # recusa e outro é pedido.
+    for _ in range(TENTATIVAS_CODIGO):
+        codigo = alocador_codigos.alocar()
         partida.codigo_sala = codigo
-        
-        # Criar jogador e adicionar à partida
-        jogador = Jogador(nome, num_palavras)
-        partida.adicionar_jogador(jogador)
-        
-        # Salvar sala
-        salas[codigo] = {
-            'partida': partida,
-            'criador': nome
+        if salas.criar(codigo, partida):
+            break
+        alocador_codigos.rejeitar(codigo)
+    else:
+        raise ErroEvento('Não foi possível criar a sala. Tente novamente')
+    
+    registrar_no_diario(codigo, partida, 'criar', jogador=nome,
+                        num_palavras=config.num_palavras, max_jogadores=config.max_jogadores)
+    join_room(codigo)
+    sessoes[request.sid] = (codigo, nome)
+    
+    # Com limite de salas, a criação pode empurrar a sala mais antiga para fora
+    limpador.aplicar_limite()
+    
+    emit('sala_criada', {
+        'codigo': codigo,
+        'nome': nome,
+        'config': {
+            'num_palavras': num_palavras,
+            'max_jogadores': max_jogadores
         }
-        
-        join_room(codigo)
-        
-        emit('sala_criada', {
-            'codigo': codigo,
-            'nome': nome,
-            'config': {
-                'num_palavras': num_palavras,
-                'max_jogadores': max_jogadores
-            }
-        })
-        
-        logger.info(f'Sala {codigo} criada por {nome} - {num_palavras} palavras, {max_jogadores} jogadores')
-        
-    except Exception as e:
-        logger.error(f'Erro ao criar sala: {str(e)}')
-        emit('erro', {'msg': 'Erro interno do servidor'})
+    })
+    
+    logger.info('Sala %s criada por %s - %d palavras, %d jogadores', codigo, nome, num_palavras, max_jogadores)
 
-@socketio.on('entrar_na_sala')
+@evento('entrar_na_sala', 'entrar na sala')
 def entrar_na_sala(data):
-    try:
-        sala = data.get('sala', '').strip().upper()
-        nome = data.get('nome', '').strip()
-        
-        if not sala or not nome:
-            emit('erro', {'msg': 'Nome e código da sala são obrigatórios'})
-            return
-        
-        if len(nome) > 20:
-            emit('erro', {'msg': 'Nome deve ter no máximo 20 caracteres'})
-            return
-        
-        if sala not in salas:
-            emit('erro', {'msg': 'Sala não encontrada'})
-            return
-        
-        partida = salas[sala]['partida']
+    sala = data.get('sala', '').strip().upper()
+    nome = data.get('nome', '').strip()
+    
+    if not sala or not nome:
+        raise ErroEvento('Nome e código da sala são obrigatórios')
+    
+    if len(nome) > 20:
+        raise ErroEvento('Nome deve ter no máximo 20 caracteres')
+    
+    with salas.transacao(sala) as partida:
+        if partida is None:
+            raise ErroEvento('Sala não encontrada')
         
         # Verificar se o jogador já está na sala (reconexão)
-        jogador_existente = None
-        for jogador in partida.jogadores:
-            if jogador.nome == nome:
-                jogador_existente = jogador
-                break
-        
-        if jogador_existente:
+        if partida.obter_jogador(nome):
             # Reconexão
+            partida.registrar_atividade()
             join_room(sala)
-            logger.info(f'Jogador {nome} reconectou na sala {sala}')
+            sessoes[request.sid] = (sala, nome)
+            logger.info('Jogador %s reconectou na sala %s', nome, sala)
+            
+            if partida.conectar_jogador(nome, request.sid):
+                registrar_no_diario(sala, partida, 'conexao', jogador=nome, conectado=True)
+                # Voltou dentro da tolerância: avisar os outros antes de enviar o estado completo
+                emit('jogador_conexao', {
+                    'jogador': nome,
+                    'conectado': True,
+                    'msg': f'{nome} voltou',
+                    'patch': partida.publicar_estado()
+                }, room=sala, include_self=False)
             
             if partida.jogo_iniciado:
-                estado = partida.get_estado_jogo()
                 emit('jogo_iniciado', {
                     'msg': 'Reconectado ao jogo em andamento!',
-                    'estado': estado
+                    'estado': partida.get_estado_codificado()
                 })
             else:
                 emit('aguardando_jogadores', {
@@ -146,23 +390,26 @@ def entrar_na_sala(data):
         
         # Novo jogador
         if len(partida.jogadores) >= partida.config.max_jogadores:
-            emit('erro', {'msg': f'Sala cheia (máximo {partida.config.max_jogadores} jogadores)'})
-            return
+            raise ErroEvento(f'Sala cheia (máximo {partida.config.max_jogadores} jogadores)')
         
         # Adicionar novo jogador
         jogador = Jogador(nome, partida.config.num_palavras)
         partida.adicionar_jogador(jogador)
+        partida.conectar_jogador(nome, request.sid)
+        registrar_no_diario(sala, partida, 'entrar', jogador=nome)
         
         join_room(sala)
+        sessoes[request.sid] = (sala, nome)
         
-        logger.info(f'Jogador {nome} entrou na sala {sala} ({len(partida.jogadores)}/{partida.config.max_jogadores})')
+        logger.info('Jogador %s entrou na sala %s (%d/%d)', nome, sala, len(partida.jogadores), partida.config.max_jogadores)
         
         # Notificar todos na sala
         emit('jogador_entrou', {
             'jogador': nome,
             'total': len(partida.jogadores),
             'max': partida.config.max_jogadores,
-            'jogadores': [j.nome for j in partida.jogadores]
+            'jogadores': [j.nome for j in partida.jogadores],
+            'patch': partida.publicar_estado()
         }, room=sala)
         
         # Se atingiu o mínimo de jogadores, permitir início
@@ -175,40 +422,19 @@ def entrar_na_sala(data):
                     'max_jogadores': partida.config.max_jogadores
                 }
             }, room=sala)
-        
-    except Exception as e:
-        logger.error(f'Erro ao entrar na sala: {str(e)}')
-        emit('erro', {'msg': 'Erro interno do servidor'})
 
-@socketio.on('enviar_palavras')
+# ValueError aqui vem da validação das palavras: a mensagem vai para o jogador
+@evento('enviar_palavras', 'receber palavras', erros_usuario=(ValueError,))
 def receber_palavras(data):
-    try:
-        sala = data.get('sala', '').strip().upper()
-        nome = data.get('nome', '').strip()
+    with sessao_atual() as (sala, partida, jogador):
         palavras = data.get('palavras', [])
         
-        if sala not in salas:
-            emit('erro', {'msg': 'Sala não encontrada'})
-            return
-        
-        partida = salas[sala]['partida']
-        
-        # Encontrar jogador
-        jogador_encontrado = None
-        for j in partida.jogadores:
-            if j.nome == nome:
-                jogador_encontrado = j
-                break
-        
-        if not jogador_encontrado:
-            emit('erro', {'msg': 'Jogador não encontrado na sala'})
-            return
-        
         # Definir palavras do jogador
-        jogador_encontrado.definir_palavras(palavras)
+        partida.definir_palavras(jogador, palavras)
+        registrar_no_diario(sala, partida, 'palavras', jogador=jogador.nome, palavras=jogador.palavras_originais)
         emit('palavras_recebidas', {'msg': 'Palavras definidas com sucesso!'})
         
-        logger.info(f'Jogador {nome} definiu suas {len(palavras)} palavras na sala {sala}')
+        logger.info('Jogador %s definiu suas %d palavras na sala %s', jogador.nome, len(palavras), sala)
         
         # Verificar se todos os jogadores definiram suas palavras
         todos_prontos = all(len(j.palavras) == partida.config.num_palavras for j in partida.jogadores)
@@ -216,154 +442,97 @@ def receber_palavras(data):
         if todos_prontos and len(partida.jogadores) >= 2:
             # Iniciar o jogo
             partida.iniciar_jogo()
+            registrar_no_diario(sala, partida, 'iniciar')
             
-            estado = partida.get_estado_jogo()
+            # O estado completo vai para a sala inteira: é ele que publica a nova versão
+            partida.publicar_estado()
             emit('jogo_iniciado', {
                 'msg': 'Todos definiram as palavras! O jogo começou!',
-                'estado': estado
+                'estado': partida.get_estado_codificado()
             }, room=sala)
             
-            logger.info(f'Jogo iniciado na sala {sala} com {len(partida.jogadores)} jogadores')
-            
-    except ValueError as e:
-        emit('erro', {'msg': str(e)})
-    except Exception as e:
-        logger.error(f'Erro ao receber palavras: {str(e)}')
-        emit('erro', {'msg': 'Erro interno do servidor'})
+            logger.info('Jogo iniciado na sala %s com %d jogadores', sala, len(partida.jogadores))
 
-@socketio.on('tentar_adivinhar')
+@evento('tentar_adivinhar', 'processar tentativa')
 def tentativa(data):
-    try:
-        sala = data.get('sala', '').strip().upper()
-        nome = data.get('nome', '').strip()
+    with sessao_atual() as (sala, partida, jogador):
+        nome = jogador.nome
         palavra_tentada = data.get('palavra', '').strip()
         
-        if sala not in salas:
-            emit('erro', {'msg': 'Partida não encontrada'})
-            return
-        
-        partida = salas[sala]['partida']
-        
         if not palavra_tentada:
-            emit('erro', {'msg': 'Digite uma palavra para tentar'})
-            return
+            raise ErroEvento('Digite uma palavra para tentar')
         
         # Executar a tentativa
         acertou, resposta = partida.tentar_adivinhar(nome, palavra_tentada)
+        registrar_no_diario(sala, partida, 'tentativa', jogador=nome, palavra=palavra_tentada)
+        metricas.registrar_tentativa(acertou)
         
-        # Obter estado atualizado do jogo
-        estado = partida.get_estado_jogo()
-        
-        # Enviar resposta para todos na sala
-        emit('resposta_tentativa', {
+        # Enviar para todos na sala apenas o que mudou no estado (patch versionado),
+        # codificado uma única vez para todos os destinatários
+        emit('resposta_tentativa', pre_codificar({
             'jogador': nome,
             'palavra_tentada': palavra_tentada,
             'acertou': acertou,
             'mensagem': resposta,
-            'estado': estado
-        }, room=sala)
+            'patch': partida.publicar_estado()
+        }), room=sala)
         
-        logger.info(f'Tentativa de {nome} na sala {sala}: {palavra_tentada} - {"Acertou" if acertou else "Errou"}')
+        log_assincrono.registrar_evento(logger, 'tentativa', sala=sala, jogador=nome, acertou=acertou)
         
         # Verificar se o jogo terminou
-        if estado['vencedor']:
+        if partida.vencedor:
+            vencedor = partida.vencedor.nome
             emit('fim_de_jogo', {
-                'vencedor': estado['vencedor'],
-                'mensagem': f'{estado["vencedor"]} venceu o jogo!'
+                'vencedor': vencedor,
+                'mensagem': f'{vencedor} venceu o jogo!'
             }, room=sala)
             
-            logger.info(f'Jogo terminou na sala {sala}. Vencedor: {estado["vencedor"]}')
-            
-    except Exception as e:
-        logger.error(f'Erro na tentativa: {str(e)}')
-        emit('erro', {'msg': str(e) if 'não é sua vez' in str(e).lower() else 'Erro interno do servidor'})
+            logger.info('Jogo terminou na sala %s. Vencedor: %s', sala, vencedor)
 
-@socketio.on('obter_estado')
+@evento('obter_estado', 'obter estado')
 def obter_estado(data):
-    try:
-        sala = data.get('sala', '').strip().upper()
-        
-        if sala not in salas:
-            emit('erro', {'msg': 'Partida não encontrada'})
-            return
-        
-        partida = salas[sala]['partida']
-        estado = partida.get_estado_jogo()
-        emit('estado_atualizado', {'estado': estado})
-        
-    except Exception as e:
-        logger.error(f'Erro ao obter estado: {str(e)}')
-        emit('erro', {'msg': 'Erro interno do servidor'})
+    with sessao_atual(somente_leitura=True) as (sala, partida, jogador):
+        emit('estado_atualizado', {'estado': partida.get_estado_codificado()})
 
-@socketio.on('enviar_mensagem_chat')
+@evento('enviar_mensagem_chat', 'enviar mensagem')
 def receber_mensagem_chat(data):
-    try:
-        sala = data.get('sala', '').strip().upper()
-        nome = data.get('nome', '').strip()
+    with sessao_atual() as (sala, partida, jogador):
+        nome = jogador.nome
         mensagem = data.get('mensagem', '').strip()
         
-        if not sala or not nome or not mensagem:
-            emit('erro', {'msg': 'Dados incompletos para enviar mensagem'})
-            return
-        
-        if sala not in salas:
-            emit('erro', {'msg': 'Sala não encontrada'})
-            return
-        
-        partida = salas[sala]['partida']
-        
-        # Verificar se o jogador está na sala
-        jogador_encontrado = False
-        for j in partida.jogadores:
-            if j.nome == nome:
-                jogador_encontrado = True
-                break
-        
-        if not jogador_encontrado:
-            emit('erro', {'msg': 'Jogador não encontrado na sala'})
-            return
+        if not mensagem:
+            raise ErroEvento('Dados incompletos para enviar mensagem')
         
         # Adicionar mensagem ao chat da partida
-        partida.adicionar_mensagem_chat(nome, mensagem)
-        
-        # Enviar mensagem para todos na sala
-        emit('nova_mensagem_chat', {
-            'jogador': nome,
-            'mensagem': mensagem,
-            'timestamp': partida.mensagens_chat[-1]['timestamp']
-        }, room=sala)
+        registro = partida.adicionar_mensagem_chat(nome, mensagem)
+        metricas.MENSAGENS_CHAT.serie().incrementar()
         
-        logger.info(f'Mensagem de {nome} na sala {sala}: {mensagem}')
+        # Enviar mensagem para todos na sala (no próximo lote, se houver janela)
+        if lotes_chat.janela:
+            lotes_chat.adicionar(sala, registro)
+        else:
+            emit('nova_mensagem_chat', registro, room=sala)
         
-    except Exception as e:
-        logger.error(f'Erro ao enviar mensagem: {str(e)}')
-        emit('erro', {'msg': 'Erro interno do servidor'})
+        log_assincrono.registrar_evento(logger, 'mensagem_chat', sala=sala, jogador=nome, caracteres=len(mensagem))
+
+@evento('obter_chat', 'obter chat')
+def obter_chat(data):
+    with sessao_atual(somente_leitura=True) as (sala, partida, jogador):
+        try:
+            pagina = partida.chat.pagina(data.get('antes'), data.get('limite', 50))
+        except (TypeError, ValueError):
+            raise ErroEvento('Parâmetros de paginação inválidos')
+        
+        emit('historico_chat', pagina)
 
-@socketio.on('novo_jogo')
+@evento('novo_jogo', 'iniciar novo jogo')
 def novo_jogo(data):
-    try:
-        sala = data.get('sala', '').strip().upper()
-        nome = data.get('nome', '').strip()
-        
-        if sala not in salas:
-            emit('erro', {'msg': 'Sala não encontrada'})
-            return
-        
-        partida = salas[sala]['partida']
-        
-        # Verificar se o jogador está na sala
-        jogador_encontrado = False
-        for j in partida.jogadores:
-            if j.nome == nome:
-                jogador_encontrado = True
-                break
-        
-        if not jogador_encontrado:
-            emit('erro', {'msg': 'Jogador não encontrado na sala'})
-            return
+    with sessao_atual() as (sala, partida, jogador):
+        nome = jogador.nome
         
         # Reiniciar o jogo
         partida.reiniciar_jogo()
+        registrar_no_diario(sala, partida, 'reiniciar', jogador=nome)
         
         # Notificar todos na sala
         emit('jogo_reiniciado', {
@@ -372,115 +541,67 @@ def novo_jogo(data):
             'config': {
                 'num_palavras': partida.config.num_palavras,
                 'max_jogadores': partida.config.max_jogadores
-            }
+            },
+            'patch': partida.publicar_estado()
         }, room=sala)
         
-        logger.info(f'Novo jogo iniciado na sala {sala} por {nome}')
-        
-    except Exception as e:
-        logger.error(f'Erro ao iniciar novo jogo: {str(e)}')
-        emit('erro', {'msg': 'Erro interno do servidor'})
+        logger.info('Novo jogo iniciado na sala %s por %s', sala, nome)
 
-@socketio.on('obter_gabarito')
+@evento('obter_gabarito', 'obter gabarito')
 def obter_gabarito(data):
-    try:
-        sala = data.get('sala', '').strip().upper()
-        
-        if sala not in salas:
-            emit('erro', {'msg': 'Sala não encontrada'})
-            return
-        
-        partida = salas[sala]['partida']
+    with sessao_atual(somente_leitura=True) as (sala, partida, jogador):
         gabarito = partida.get_gabarito_completo()
         
-        if gabarito:
-            emit('gabarito_completo', {'gabarito': gabarito})
-        else:
-            emit('erro', {'msg': 'Jogo ainda não terminou'})
+        if not gabarito:
+            raise ErroEvento('Jogo ainda não terminou')
         
-    except Exception as e:
-        logger.error(f'Erro ao obter gabarito: {str(e)}')
-        emit('erro', {'msg': 'Erro interno do servidor'})
+        emit('gabarito_completo', {'gabarito': gabarito})
 
-@socketio.on('sair_da_sala')
+@evento('sair_da_sala', 'sair da sala')
 def sair_da_sala(data):
-    try:
-        sala = data.get('sala', '').strip().upper()
-        nome = data.get('nome', '').strip()
-        
+    sessao = sessoes.pop(request.sid, None)
+    
+    if sessao:
+        sala, nome = sessao
         leave_room(sala)
         
-        if sala in salas:
-            partida = salas[sala]['partida']
-            
-            # Remover jogador da sala
-            partida.jogadores = [j for j in partida.jogadores if j.nome != nome]
-            
-            if len(partida.jogadores) == 0:
-                del salas[sala]
-                logger.info(f'Sala {sala} removida')
-            else:
-                # Reconfigurar alvos se necessário
-                if len(partida.jogadores) >= 2:
-                    partida._configurar_alvos()
+        with salas.transacao(sala) as partida:
+            # Remover jogador da sala (a limpeza pode ter chegado antes)
+            if partida is not None and partida.remover_jogador(nome):
+                registrar_no_diario(sala, partida, 'sair', jogador=nome)
                 
-                emit('jogador_saiu', {
-                    'jogador': nome,
-                    'msg': f'{nome} saiu da sala',
-                    'jogadores_restantes': [j.nome for j in partida.jogadores]
-                }, room=sala)
-        
-        emit('saiu_da_sala', {'msg': 'Você saiu da sala'})
-        
-    except Exception as e:
-        logger.error(f'Erro ao sair da sala: {str(e)}')
-        emit('erro', {'msg': 'Erro interno do servidor'})
+                if len(partida.jogadores) == 0:
+                    salas.remover(sala)
+                    encerrar_sala(sala, 'vazia')
+                    logger.info('Sala %s removida', sala)
+                else:
+                    anunciar_saida(sala, partida, [nome], f'{nome} saiu da sala')
+    
+    emit('saiu_da_sala', {'msg': 'Você saiu da sala'})
 
-@socketio.on('enviar_emoji')
+@evento('enviar_emoji', 'enviar emoji')
 def enviar_emoji(data):
-    try:
-        sala = data.get('sala', '').strip().upper()
-        nome = data.get('nome', '').strip()
+    with sessao_atual() as (sala, partida, jogador):
+        nome = jogador.nome
         emoji = data.get('emoji', '').strip()
         
-        if not sala or not nome or not emoji:
-            emit('erro', {'msg': 'Dados incompletos para enviar emoji'})
-            return
-        
-        if sala not in salas:
-            emit('erro', {'msg': 'Sala não encontrada'})
-            return
-        
-        partida = salas[sala]['partida']
-        
-        # Verificar se o jogador está na sala
-        jogador_encontrado = False
-        for j in partida.jogadores:
-            if j.nome == nome:
-                jogador_encontrado = True
-                break
+        if not emoji:
+            raise ErroEvento('Dados incompletos para enviar emoji')
         
-        if not jogador_encontrado:
-            emit('erro', {'msg': 'Jogador não encontrado na sala'})
-            return
-        
-        # Lista de emojis permitidos (segurança)
-        emojis_permitidos = ['👍', '👎', '🤔', '😂', '😱', '🔥', '💡', '❤️']
-        if emoji not in emojis_permitidos:
-            emit('erro', {'msg': 'Emoji não permitido'})
-            return
+        if emoji not in EMOJIS_PERMITIDOS:
+            raise ErroEvento('Emoji não permitido')
         
-        # Enviar emoji para todos na sala
-        emit('emoji_recebido', {
-            'nome': nome,
-            'emoji': emoji
-        }, room=sala)
-        
-        logger.info(f'Emoji {emoji} enviado por {nome} na sala {sala}')
+        # Enviar emoji para todos na sala (no resumo da janela, se houver)
+        metricas.EMOJIS.serie().incrementar()
+        if lotes_emoji.janela:
+            lotes_emoji.adicionar(sala, (nome, emoji))
+        else:
+            emit('emoji_recebido', {
+                'nome': nome,
+                'emoji': emoji
+            }, room=sala)
         
-    except Exception as e:
-        logger.error(f'Erro ao enviar emoji: {str(e)}')
-        emit('erro', {'msg': 'Erro interno do servidor'})
+        log_assincrono.registrar_evento(logger, 'emoji', sala=sala, jogador=nome, emoji=emoji)
 
 if __name__ == '__main__':
     import os
@@ -0,0 +1,424 @@
+"""
+Armazéns de salas: onde ficam as partidas em andamento
+
+- ArmazemSalasMemoria: dicionário no próprio processo (só funciona com 1 worker)
+- ArmazemSalasSQLite: arquivo SQLite compartilhado entre os workers da máquina
+- ArmazemSalasRedis: servidor Redis (ou compatível), requer o pacote `redis`
+
+Toda alteração de uma partida deve acontecer dentro de `transacao(codigo)`;
+nos armazéns compartilhados ela trava a sala entre processos e grava o estado
+serializado ao final. `atividades()` lista (código, última atividade,
+finalizada, desconexão mais antiga) de todas as salas sem desserializá-las,
+para a limpeza periódica; `contar_em_andamento()` conta os jogos em curso. Escolha o armazém com a variável SALAS_ARMAZEM
+(ex.: "memoria", "sqlite:///salas.db", "redis://localhost:6379/0").
+"""
+from contextlib import contextmanager
+import json
+import os
+import sqlite3
+import time
+
+from jogo import PartidaMultiplayer
+
+try:
+    from gevent import sleep as _dormir
+    from gevent.lock import RLock as _Trava
+except ImportError:  # Sem gevent: threads da biblioteca padrão
+    from threading import RLock as _Trava
+    from time import sleep as _dormir
+
+
+def _serializar(partida):
+    return json.dumps(partida.para_dict(), separators=(',', ':'))
+
+
+def _desserializar(dados):
+    return PartidaMultiplayer.de_dict(json.loads(dados))
+
+
+class ArmazemSalasMemoria:
+    """Partidas vivas em um dicionário do processo (comportamento original)
+
+    Salas restauradas de um snapshot (veja snapshot_salas.py) ficam adiadas:
+    só são desserializadas no primeiro acesso; até lá a limpeza e as
+    contagens usam os dados guardados no índice do snapshot.
+    """
+
+    compartilhado = False
+
+    def __init__(self):
+        self._salas = {}
+        self._adiadas = {}  # código -> sala restaurada ainda não carregada (com carregar())
+
+    def __contains__(self, codigo):
+        return codigo in self._salas or codigo in self._adiadas
+
+    def __len__(self):
+        return len(self._salas) + len(self._adiadas)
+
+    def codigos(self):
+        return list(self._salas) + list(self._adiadas)
+
+    def _obter(self, codigo):
+        partida = self._salas.get(codigo)
+        if partida is None and codigo in self._adiadas:
+            partida = self._adiadas.pop(codigo).carregar()
+            if partida is not None:
+                self._salas[codigo] = partida
+        return partida
+
+    def obter(self, codigo):
+        """Retorna a partida para leitura, ou None"""
+        return self._obter(codigo)
+
+    @contextmanager
+    def transacao(self, codigo):
+        """Produz a partida (ou None) para alteração"""
+        yield self._obter(codigo)
+
+    def criar(self, codigo, partida):
+        """Guarda uma partida nova; retorna False se o código já está em uso"""
+        if codigo in self:
+            return False
+        self._salas[codigo] = partida
+        return True
+
+    def remover(self, codigo):
+        self._salas.pop(codigo, None)
+        self._adiadas.pop(codigo, None)
+
+    def atividades(self):
+        return [
+            (codigo, partida.ultima_atividade, partida.finalizada, partida.desconexao_mais_antiga)
+            for codigo, partida in list(self._salas.items()) + list(self._adiadas.items())
+        ]
+
+    def contar_em_andamento(self):
+        return (sum(1 for partida in self._salas.values() if partida.em_andamento) +
+                sum(1 for adiada in self._adiadas.values() if adiada.em_andamento))
+
+    def restaurar(self, adiadas):
+        """Recebe as salas de um snapshot (código -> sala adiada), sem sobrescrever as existentes"""
+        for codigo, adiada in adiadas.items():
+            if codigo not in self:
+                self._adiadas[codigo] = adiada
+
+    def itens(self):
+        """(código, partida ou sala adiada) de todas as salas, para gravar um snapshot"""
+        return list(self._salas.items()) + list(self._adiadas.items())
+
+
+class ArmazemSalasSQLite:
+    """Partidas serializadas em um arquivo SQLite compartilhado pelos workers
+
+    Cada worker mantém a última partida carregada de cada sala junto com a
+    versão da linha; enquanto nenhum outro processo alterar a sala, a
+    partida em memória é reaproveitada sem desserializar.
+
+    Cada transação trava só a sua sala: entre os greenlets do processo, com
+    uma trava por código, e entre processos, com uma linha na tabela
+    `travas` que expira em `timeout_trava` segundos (como a trava do Redis).
+    O banco em si fica preso só durante a leitura e a gravação da sala, então
+    o `yield` de uma sala não segura as outras. Os greenlets dividem a
+    conexão do processo, protegida por uma trava só durante cada comando.
+    A espera pelo banco ou pela sala é feita aqui, com `sleep` do gevent, e
+    não pelo busy timeout do SQLite, que dormiria dentro da chamada em C e
+    pararia o loop de eventos.
+    """
+
+    compartilhado = True
+
+    def __init__(self, caminho, timeout=10.0, timeout_trava=10):
+        self.caminho = caminho
+        self.timeout = timeout
+        self.timeout_trava = timeout_trava
+        self._conexao = None
+        self._trava = None
+        self._travas_salas = {}  # codigo -> [trava, greenlets usando ou esperando]
+        self._pid = None
+        self._cache = {}  # codigo -> (versão da linha, partida)
+        self._criar_tabela()
+
+    def _conectar(self):
+        # Conexões SQLite não podem atravessar um fork: uma por processo
+        if self._pid != os.getpid():
+            self._conexao = sqlite3.connect(self.caminho, timeout=0, isolation_level=None)
+            self._trava = _Trava()
+            self._travas_salas = {}
+            self._pid = os.getpid()
+            self._cache = {}
+            self._executar(self._conexao, 'PRAGMA journal_mode=WAL')
+            self._executar(self._conexao, 'PRAGMA synchronous=NORMAL')
+        return self._conexao
+
+    @contextmanager
+    def _usar_conexao(self):
+        """Conexão do processo, só para o greenlet que estiver com a trava"""
+        conexao = self._conectar()
+        with self._trava:
+            yield conexao
+
+    def _executar(self, conexao, sql, parametros=()):
+        """Executa `sql` esperando, sem bloquear o loop, que outro processo solte o banco"""
+        limite = time.monotonic() + self.timeout
+        espera = 0.001
+        while True:
+            try:
+                return conexao.execute(sql, parametros)
+            except sqlite3.OperationalError as erro:
+                # SQLITE_BUSY (sqlite_errorcode só existe a partir do Python 3.11)
+                if 'database is locked' not in str(erro) or time.monotonic() >= limite:
+                    raise
+            _dormir(espera)
+            espera = min(espera * 2, 0.05)
+
+    def _criar_tabela(self):
+        with self._usar_conexao() as conexao:
+            self._executar(conexao, 
+            'CREATE TABLE IF NOT EXISTS salas ('
+            ' codigo TEXT PRIMARY KEY,'
+            ' versao INTEGER NOT NULL,'
+            ' atualizado REAL NOT NULL,'
+            ' atividade REAL NOT NULL,'
+            ' finalizada INTEGER NOT NULL,'
+            ' desconexao REAL,'
+            ' em_andamento INTEGER NOT NULL,'
+            ' dados TEXT NOT NULL)'
+            )
+            self._executar(conexao, 
+            'CREATE TABLE IF NOT EXISTS travas ('
+            ' codigo TEXT PRIMARY KEY,'
+            ' dono TEXT NOT NULL,'
+            ' expira REAL NOT NULL)'
+            )
+
+    def __contains__(self, codigo):
+        with self._usar_conexao() as conexao:
+            return conexao.execute('SELECT 1 FROM salas WHERE codigo = ?', (codigo,)).fetchone() is not None
+
+    def __len__(self):
+        with self._usar_conexao() as conexao:
+            return conexao.execute('SELECT COUNT(*) FROM salas').fetchone()[0]
+
+    def codigos(self):
+        with self._usar_conexao() as conexao:
+            return [linha[0] for linha in conexao.execute('SELECT codigo FROM salas')]
+
+    def _carregar(self, conexao, codigo):
+        linha = self._executar(conexao, 'SELECT versao FROM salas WHERE codigo = ?', (codigo,)).fetchone()
+        if linha is None:
+            self._cache.pop(codigo, None)
+            return None, None
+
+        versao = linha[0]
+        em_cache = self._cache.get(codigo)
+        if em_cache and em_cache[0] == versao:
+            return versao, em_cache[1]
+
+        dados = self._executar(conexao, 'SELECT dados FROM salas WHERE codigo = ?', (codigo,)).fetchone()[0]
+        partida = _desserializar(dados)
+        self._cache[codigo] = (versao, partida)
+        return versao, partida
+
+    def obter(self, codigo):
+        with self._usar_conexao() as conexao:
+            return self._carregar(conexao, codigo)[1]
+
+    @contextmanager
+    def _trava_local(self, codigo):
+        """Trava da sala entre os greenlets do processo (descartada quando ninguém mais a usa)"""
+        self._conectar()
+        with self._trava:
+            entrada = self._travas_salas.setdefault(codigo, [_Trava(), 0])
+            entrada[1] += 1
+        try:
+            with entrada[0]:
+                yield
+        finally:
+            with self._trava:
+                entrada[1] -= 1
+                if not entrada[1]:
+                    del self._travas_salas[codigo]
+
+    def _travar_sala(self, codigo):
+        """Trava a sala entre processos; a trava de quem morreu no meio expira sozinha"""
+        dono = os.urandom(8).hex()
+        limite = time.monotonic() + self.timeout
+        espera = 0.001
+        while True:
+            agora = time.time()
+            with self._usar_conexao() as conexao:
+                if self._executar(
+                    conexao, 'INSERT OR IGNORE INTO travas (codigo, dono, expira) VALUES (?, ?, ?)',
+                    (codigo, dono, agora + self.timeout_trava)
+                ).rowcount or self._executar(
+                    conexao, 'UPDATE travas SET dono = ?, expira = ? WHERE codigo = ? AND expira < ?',
+                    (dono, agora + self.timeout_trava, codigo, agora)
+                ).rowcount:
+                    return dono
+            if time.monotonic() >= limite:
+                raise TimeoutError(f'Sala {codigo} travada por outro processo')
+            _dormir(espera)
+            espera = min(espera * 2, 0.05)
+
+    def _soltar_sala(self, codigo, dono):
+        with self._usar_conexao() as conexao:
+            self._executar(conexao, 'DELETE FROM travas WHERE codigo = ? AND dono = ?', (codigo, dono))
+
+    def _gravar(self, codigo, versao, partida):
+        with self._usar_conexao() as conexao:
+            gravada = self._executar(
+                conexao,
+                'UPDATE salas SET versao = ?, atualizado = ?, atividade = ?, finalizada = ?,'
+                ' desconexao = ?, em_andamento = ?, dados = ? WHERE codigo = ? AND versao = ?',
+                (versao + 1, time.time(), partida.ultima_atividade, partida.finalizada,
+                 partida.desconexao_mais_antiga, partida.em_andamento, _serializar(partida), codigo, versao)
+            ).rowcount
+        if gravada:
+            self._cache[codigo] = (versao + 1, partida)
+        else:
+            # Sala removida durante a transação (ou a trava expirou e outro processo gravou antes)
+            self._cache.pop(codigo, None)
+
+    @contextmanager
+    def transacao(self, codigo):
+        # A sala fica travada até a gravação; o banco, só na leitura e na gravação
+        with self._trava_local(codigo):
+            dono = self._travar_sala(codigo)
+            try:
+                with self._usar_conexao() as conexao:
+                    versao, partida = self._carregar(conexao, codigo)
+                try:
+                    yield partida
+                except BaseException:
+                    # A partida em memória pode ter ficado pela metade
+                    self._cache.pop(codigo, None)
+                    raise
+                if partida is not None and codigo in self._cache:
+                    self._gravar(codigo, versao, partida)
+            finally:
+                self._soltar_sala(codigo, dono)
+
+    def criar(self, codigo, partida):
+        with self._usar_conexao() as conexao:
+            try:
+                self._executar(
+                    conexao,
+                    'INSERT INTO salas (codigo, versao, atualizado, atividade, finalizada, desconexao,'
+                    ' em_andamento, dados) VALUES (?, 1, ?, ?, ?, ?, ?, ?)',
+                    (codigo, time.time(), partida.ultima_atividade, partida.finalizada,
+                     partida.desconexao_mais_antiga, partida.em_andamento, _serializar(partida))
+                )
+            except sqlite3.IntegrityError:
+                return False
+            self._cache[codigo] = (1, partida)
+            return True
+
+    def remover(self, codigo):
+        with self._usar_conexao() as conexao:
+            self._executar(conexao, 'DELETE FROM salas WHERE codigo = ?', (codigo,))
+            self._cache.pop(codigo, None)
+
+    def atividades(self):
+        with self._usar_conexao() as conexao:
+            return [
+                (codigo, atividade, bool(finalizada), desconexao)
+                for codigo, atividade, finalizada, desconexao in conexao.execute(
+                    'SELECT codigo, atividade, finalizada, desconexao FROM salas'
+                )
+            ]
+
+    def contar_em_andamento(self):
+        with self._usar_conexao() as conexao:
+            return conexao.execute('SELECT COUNT(*) FROM salas WHERE em_andamento').fetchone()[0]
+
+
+class ArmazemSalasRedis:
+    """Partidas serializadas em um servidor Redis (ou compatível com o protocolo)"""
+
+    compartilhado = True
+
+    def __init__(self, url, prefixo='jogo5:', timeout_trava=10):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('O armazém Redis requer o pacote "redis" (pip install redis)')
+
+        self._redis = redis.Redis.from_url(url)
+        self.prefixo = prefixo
+        self.timeout_trava = timeout_trava
+
+    def _chave(self, codigo):
+        return f'{self.prefixo}sala:{codigo}'
+
+    @property
+    def _indice(self):
+        return f'{self.prefixo}salas'
+
+    @property
+    def _atividades(self):
+        return f'{self.prefixo}atividades'
+
+    def _registrar_atividade(self, codigo, partida):
+        self._redis.hset(self._atividades, codigo, json.dumps(
+            [partida.ultima_atividade, partida.finalizada, partida.desconexao_mais_antiga, partida.em_andamento]
+        ))
+
+    def __contains__(self, codigo):
+        return bool(self._redis.exists(self._chave(codigo)))
+
+    def __len__(self):
+        return self._redis.scard(self._indice)
+
+    def codigos(self):
+        return [codigo.decode() for codigo in self._redis.smembers(self._indice)]
+
+    def obter(self, codigo):
+        dados = self._redis.get(self._chave(codigo))
+        return _desserializar(dados) if dados is not None else None
+
+    @contextmanager
+    def transacao(self, codigo):
+        trava = self._redis.lock(f'{self._chave(codigo)}:trava', timeout=self.timeout_trava)
+        with trava:
+            partida = self.obter(codigo)
+            yield partida
+            # Só grava se a sala não foi removida durante a transação
+            if partida is not None:
+                if self._redis.set(self._chave(codigo), _serializar(partida), xx=True):
+                    self._registrar_atividade(codigo, partida)
+
+    def criar(self, codigo, partida):
+        if not self._redis.set(self._chave(codigo), _serializar(partida), nx=True):
+            return False
+        self._redis.sadd(self._indice, codigo)
+        self._registrar_atividade(codigo, partida)
+        return True
+
+    def remover(self, codigo):
+        self._redis.delete(self._chave(codigo))
+        self._redis.srem(self._indice, codigo)
+        self._redis.hdel(self._atividades, codigo)
+
+    def atividades(self):
+        return [
+            (codigo.decode(), *json.loads(valor)[:3])
+            for codigo, valor in self._redis.hgetall(self._atividades).items()
+        ]
+
+    def contar_em_andamento(self):
+        return sum(1 for valor in self._redis.hvals(self._atividades) if json.loads(valor)[3])
+
+
+def criar_armazem(url=None):
+    """Cria o armazém configurado em `url` ou na variável SALAS_ARMAZEM"""
+    url = url or os.environ.get('SALAS_ARMAZEM', 'memoria')
+
+    if url == 'memoria':
+        return ArmazemSalasMemoria()
+    if url.startswith('sqlite:///'):
+        return ArmazemSalasSQLite(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return ArmazemSalasRedis(url)
+
+    raise ValueError(f'Armazém de salas desconhecido: {url}')
@@ -0,0 +1,109 @@
+"""
+Benchmark do armazém de salas compartilhado: eventos/s com 1..N processos
+
+Cada processo simula o caminho de um worker do gunicorn: abre uma transação
+numa sala aleatória, registra uma tentativa errada do jogador da vez,
+publica o patch e grava. No fim, confere que nenhuma tentativa se perdeu
+(a soma dos erros registrados nas salas é igual ao total de eventos).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_armazem_workers --workers 1 2 4 --segundos 3
+    python -m benchmarks.bench_armazem_workers --armazem redis://localhost:6379/15
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from armazem_salas import criar_armazem  # noqa: E402
+from jogo import Configuracao, Jogador, PartidaMultiplayer  # noqa: E402
+
+PALAVRAS = ['casa', 'janela', 'porta', 'telhado', 'jardim']
+
+
+def preparar_salas(armazem, num_salas):
+    """Cria salas com dois jogadores e jogo iniciado"""
+    codigos = []
+    for i in range(num_salas):
+        partida = PartidaMultiplayer(Configuracao(5, 2))
+        for nome in ('ana', 'bia'):
+            jogador = Jogador(nome, 5)
+            partida.adicionar_jogador(jogador)
+            partida.definir_palavras(jogador, PALAVRAS)
+        partida.iniciar_jogo()
+        codigo = f'B{i:05d}'
+        partida.codigo_sala = codigo
+        armazem.criar(codigo, partida)
+        codigos.append(codigo)
+    return codigos
+
+
+def worker(url, codigos, segundos, fila):
+    """Processa tentativas até o tempo acabar e informa quantas fez"""
+    armazem = criar_armazem(url)
+    aleatorio = random.Random(os.getpid())
+    eventos = 0
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        with armazem.transacao(aleatorio.choice(codigos)) as partida:
+            jogador = partida.get_jogador_da_vez()
+            partida.tentar_adivinhar(jogador.nome, 'errada')
+            partida.publicar_estado()
+        eventos += 1
+    fila.put(eventos)
+
+
+def total_erros(armazem, codigos):
+    return sum(
+        sum(j.tentativas_por_palavra) for codigo in codigos for j in armazem.obter(codigo).jogadores
+    )
+
+
+def medir(url, num_workers, num_salas, segundos):
+    armazem = criar_armazem(url)
+    for codigo in armazem.codigos():
+        armazem.remover(codigo)
+    codigos = preparar_salas(armazem, num_salas)
+
+    fila = multiprocessing.Queue()
+    processos = [
+        multiprocessing.Process(target=worker, args=(url, codigos, segundos, fila))
+        for _ in range(num_workers)
+    ]
+    for processo in processos:
+        processo.start()
+    eventos = sum(fila.get() for _ in processos)
+    for processo in processos:
+        processo.join()
+
+    registrados = total_erros(criar_armazem(url), codigos)
+    if registrados != eventos:
+        raise AssertionError(f'{eventos} eventos processados, mas {registrados} registrados')
+    return eventos / segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--armazem', default=None, help='URL do armazém (padrão: SQLite temporário)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--salas', type=int, default=200)
+    parser.add_argument('--segundos', type=float, default=3.0)
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp()
+    url = args.armazem or f'sqlite:///{os.path.join(diretorio, "salas.db")}'
+    print(f'armazém: {url} ({args.salas} salas)')
+    base = None
+    for num_workers in args.workers:
+        taxa = medir(url, num_workers, args.salas, args.segundos)
+        base = base or taxa
+        print(f'{num_workers:>3} workers: {taxa:>9.0f} eventos/s ({taxa / base:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
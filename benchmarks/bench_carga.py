@@ -0,0 +1,508 @@
+"""
+Teste de carga com jogadores Socket.IO simulados (perfis lobby, palpites e chat)
+
+Sobe o servidor na própria máquina (gunicorn com 1 worker, ou o despachante
+com --shards N) e processos geradores de carga, cada um com milhares de
+jogadores em greenlets do gevent falando o protocolo real:
+
+- lobby: as salas são criadas, preenchidas, os jogadores definem as
+  palavras, saem e desconectam, em ciclo (rotatividade de salas)
+- palpites: salas em jogo em que cada jogador erra assim que chega a sua vez
+- chat: salas em que todos mandam mensagens de chat (e um emoji a cada 5)
+
+Cada jogador tem no máximo um evento em andamento: a ida e volta vai do
+emit até a resposta do servidor para aquele jogador (ou até um 'erro').
+O relatório traz eventos/s, p50/p95/p99 por evento, taxa de erros
+(incluindo respostas que não chegaram em --timeout) e a memória RSS do
+servidor (processo e filhos) durante a medição. O servidor sobe com os
+limites de taxa desligados, salvo LIMITES_ATIVOS=1 no ambiente.
+
+Requer o cliente do python-socketio (pip install "python-socketio[client]").
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_carga --perfil palpites --jogadores 2000 --segundos 30
+    python -m benchmarks.bench_carga --perfil lobby --shards 2 --processos 2
+    python -m benchmarks.bench_carga --perfil chat --url http://127.0.0.1:5000 --pid 1234
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from functools import partial
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import gevent  # noqa: E402
+from gevent.event import Event  # noqa: E402
+from gevent.pool import Pool  # noqa: E402
+import psutil  # noqa: E402
+import socketio  # noqa: E402
+
+from benchmarks.bench_shards import aguardar_porta  # noqa: E402
+
+# Os clientes usam só WebSocket: o worker padrão do gunicorn.conf.py ("gevent") não faz o upgrade
+WORKER_WEBSOCKET = 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker'
+PERFIS = ('lobby', 'palpites', 'chat')
+PALAVRAS = ['casa', 'janela', 'porta', 'telhado', 'jardim']
+
+# Evento enviado -> (evento de resposta, campo do payload com o nome do autor).
+# Nas respostas enviadas para a sala toda, só a do próprio jogador fecha a espera.
+RESPOSTAS = {
+    'criar_sala': ('sala_criada', None),
+    'entrar_na_sala': ('jogador_entrou', 'jogador'),
+    'enviar_palavras': ('palavras_recebidas', None),
+    'tentar_adivinhar': ('resposta_tentativa', 'jogador'),
+    'enviar_mensagem_chat': ('nova_mensagem_chat', 'jogador'),
+    'enviar_emoji': ('emoji_recebido', 'nome'),
+    'sair_da_sala': ('saiu_da_sala', None)
+}
+
+# Latências agrupadas em faixas de 5%: somáveis entre processos e sem guardar cada amostra
+BASE_FAIXAS = 1.05
+
+
+class Latencias:
+    def __init__(self):
+        self.enviados = 0
+        self.erros = 0
+        self.sem_resposta = 0
+        self.faixas = {}
+
+    def registrar(self, segundos, resultado):
+        self.enviados += 1
+        if resultado == 'erro':
+            self.erros += 1
+        elif resultado is None:
+            self.sem_resposta += 1
+            return
+        faixa = math.ceil(math.log(max(segundos * 1000, 0.01), BASE_FAIXAS))
+        self.faixas[faixa] = self.faixas.get(faixa, 0) + 1
+
+    def juntar(self, dados):
+        self.enviados += dados['enviados']
+        self.erros += dados['erros']
+        self.sem_resposta += dados['sem_resposta']
+        for faixa, contagem in dados['faixas'].items():
+            faixa = int(faixa)
+            self.faixas[faixa] = self.faixas.get(faixa, 0) + contagem
+
+    def percentil(self, p):
+        """Limite superior (ms) da faixa que contém o percentil `p`"""
+        total = sum(self.faixas.values())
+        if not total:
+            return 0.0
+        alvo = total * p / 100
+        acumulado = 0
+        for faixa in sorted(self.faixas):
+            acumulado += self.faixas[faixa]
+            if acumulado >= alvo:
+                return BASE_FAIXAS ** faixa
+        return BASE_FAIXAS ** max(self.faixas)
+
+    def exportar(self):
+        return {
+            'enviados': self.enviados,
+            'erros': self.erros,
+            'sem_resposta': self.sem_resposta,
+            'faixas': self.faixas
+        }
+
+
+class Estatisticas:
+    """Latências por evento; só conta o que começou durante a medição"""
+
+    def __init__(self):
+        self.ativa = False
+        self.eventos = {}
+
+    def registrar(self, evento, segundos, resultado):
+        if not self.ativa:
+            return
+        latencias = self.eventos.get(evento)
+        if latencias is None:
+            latencias = self.eventos[evento] = Latencias()
+        latencias.registrar(segundos, resultado)
+
+
+class JogadorSimulado:
+    """Um cliente Socket.IO que espera a resposta de cada evento antes do próximo"""
+
+    def __init__(self, url, nome, estatisticas, timeout):
+        self.url = url
+        self.nome = nome
+        self.estatisticas = estatisticas
+        self.timeout = timeout
+        self.cliente = None
+        self.esperado = None  # (evento de resposta, campo do autor, Event)
+        self.resposta = None
+        self.resultado = None
+        self.minha_vez = Event()
+
+    def conectar(self, consulta):
+        self.cliente = socketio.Client(reconnection=False)
+        for resposta in {resposta for resposta, _ in RESPOSTAS.values()}:
+            self.cliente.on(resposta, partial(self._chegou, resposta))
+        self.cliente.on('erro', partial(self._chegou, 'erro'))
+        self.cliente.on('mensagens_chat', self._lote_chat)
+        self.cliente.on('emojis_recebidos', self._lote_emojis)
+
+        inicio = time.perf_counter()
+        try:
+            self.cliente.connect(f'{self.url}?{consulta}', transports=['websocket'], wait_timeout=self.timeout)
+        except Exception:
+            self.estatisticas.registrar('connect', time.perf_counter() - inicio, 'erro')
+            return False
+        self.estatisticas.registrar('connect', time.perf_counter() - inicio, 'ok')
+        return True
+
+    def desconectar(self):
+        if self.cliente is not None:
+            try:
+                self.cliente.disconnect()
+            except Exception:
+                pass
+            self.cliente = None
+
+    def pedir(self, evento, dados):
+        """Envia o evento e espera a resposta; retorna o payload (None em erro ou timeout)"""
+        resposta, campo = RESPOSTAS[evento]
+        pronto = Event()
+        self.resultado = self.resposta = None
+        self.esperado = (resposta, campo, pronto)
+        inicio = time.perf_counter()
+        try:
+            self.cliente.emit(evento, dados)
+        except Exception:
+            self.resultado = 'erro'
+            pronto.set()
+        pronto.wait(self.timeout)
+        self.esperado = None
+        self.estatisticas.registrar(evento, time.perf_counter() - inicio, self.resultado)
+        return self.resposta if self.resultado == 'ok' else None
+
+    def _chegou(self, evento, data=None):
+        if evento == 'resposta_tentativa':
+            self._atualizar_vez(data)
+
+        if self.esperado is None:
+            return
+        resposta, campo, pronto = self.esperado
+        if evento == 'erro':
+            self.resultado = 'erro'
+        elif evento == resposta and (campo is None or data.get(campo) == self.nome):
+            self.resultado = 'ok'
+            self.resposta = data
+        else:
+            return
+        self.esperado = None
+        pronto.set()
+
+    def _lote_chat(self, data):
+        # Com CHAT_JANELA_MS o servidor entrega as mensagens da sala em lotes
+        for mensagem in data['mensagens']:
+            self._chegou('nova_mensagem_chat', mensagem)
+
+    def _lote_emojis(self, data):
+        # Com EMOJI_JANELA_MS as reações da sala chegam agregadas por jogador e emoji
+        for reacao in data['reacoes']:
+            self._chegou('emoji_recebido', reacao)
+
+    def _atualizar_vez(self, data):
+        campos = (data.get('patch') or {}).get('campos') or {}
+        if 'jogador_da_vez' in campos:
+            self.definir_vez(campos['jogador_da_vez'])
+
+    def definir_vez(self, nome):
+        if nome == self.nome:
+            self.minha_vez.set()
+        else:
+            self.minha_vez.clear()
+
+
+def montar_sala(jogadores, iniciar_jogo):
+    """Conecta os jogadores em uma sala nova (e define as palavras); retorna o código ou None"""
+    criador = jogadores[0]
+    if not criador.conectar(f'afinidade={criador.nome}'):
+        return None
+    criada = criador.pedir('criar_sala', {'nome': criador.nome, 'num_palavras': len(PALAVRAS),
+                                          'max_jogadores': len(jogadores)})
+    if criada is None:
+        return None
+    codigo = criada['codigo']
+
+    for jogador in jogadores[1:]:
+        if not jogador.conectar(f'sala={codigo}'):
+            return None
+        if jogador.pedir('entrar_na_sala', {'sala': codigo, 'nome': jogador.nome}) is None:
+            return None
+
+    if iniciar_jogo:
+        for jogador in jogadores:
+            jogador.definir_vez(criador.nome)  # O criador é o primeiro da vez
+            if jogador.pedir('enviar_palavras', {'palavras': PALAVRAS}) is None:
+                return None
+    return codigo
+
+
+def desmontar_sala(jogadores):
+    for jogador in jogadores:
+        jogador.desconectar()
+
+
+def ciclo_lobby(jogadores, fim, args):
+    gevent.sleep(random.uniform(0, 1))  # Espalhar as conexões iniciais
+    while time.perf_counter() < fim:
+        if montar_sala(jogadores, iniciar_jogo=True) is not None:
+            for jogador in jogadores:
+                jogador.pedir('sair_da_sala', {})
+        desmontar_sala(jogadores)
+        gevent.sleep(args.pausa_ms / 1000)
+
+
+def jogar_palpites(jogador, fim, args):
+    while time.perf_counter() < fim:
+        if not jogador.minha_vez.wait(min(args.timeout, max(fim - time.perf_counter(), 0))):
+            continue
+        if jogador.pedir('tentar_adivinhar', {'palavra': 'errada'}) is None:
+            gevent.sleep(0.1)  # Resposta perdida: a vez é reavaliada pela próxima resposta da sala
+        gevent.sleep(args.pausa_ms / 1000)
+
+
+def conversar(jogador, fim, args):
+    enviadas = 0
+    while time.perf_counter() < fim:
+        enviadas += 1
+        if enviadas % 5 == 0:
+            jogador.pedir('enviar_emoji', {'emoji': '👍'})
+        else:
+            jogador.pedir('enviar_mensagem_chat', {'mensagem': f'mensagem {enviadas} de {jogador.nome}'})
+        gevent.sleep(args.pausa_ms / 1000)
+
+
+def executar_gerador(args):
+    """Processo gerador: monta as salas, avisa 'pronto', espera o sinal e joga até o fim"""
+    estatisticas = Estatisticas()
+    num_salas = args.jogadores // args.por_sala
+    salas = [
+        [JogadorSimulado(args.url, f'j{args.primeiro + s * args.por_sala + j}', estatisticas, args.timeout)
+         for j in range(args.por_sala)]
+        for s in range(num_salas)
+    ]
+
+    falhas = 0
+    if args.perfil != 'lobby':
+        iniciar_jogo = args.perfil == 'palpites'
+        montadas = Pool(args.conexoes_simultaneas).map(lambda sala: montar_sala(sala, iniciar_jogo), salas)
+        for sala, codigo in zip(list(salas), montadas):
+            if codigo is None:
+                falhas += 1
+                desmontar_sala(sala)
+                salas.remove(sala)
+
+    print('pronto', flush=True)
+    sys.stdin.readline()
+
+    fim = time.perf_counter() + args.segundos
+    estatisticas.ativa = True
+    if args.perfil == 'lobby':
+        tarefas = [gevent.spawn(ciclo_lobby, sala, fim, args) for sala in salas]
+    else:
+        funcao = jogar_palpites if args.perfil == 'palpites' else conversar
+        tarefas = [gevent.spawn(funcao, jogador, fim, args) for sala in salas for jogador in sala]
+    gevent.joinall(tarefas, timeout=args.segundos + args.timeout + 5)
+    estatisticas.ativa = False
+
+    for sala in salas:
+        desmontar_sala(sala)
+    print(json.dumps({
+        'salas_com_falha': falhas,
+        'eventos': {evento: latencias.exportar() for evento, latencias in estatisticas.eventos.items()}
+    }), flush=True)
+
+
+def iniciar_servidor(args):
+    """gunicorn com 1 worker (ou o despachante com N shards) só com salas em memória"""
+    # GUNICORN_CMD_ARGS vale também para os gunicorns que o despachante sobe
+    conexoes = max(1000, args.jogadores * 2)
+    ambiente = dict(os.environ, SALAS_ARMAZEM='memoria', WEB_CONCURRENCY='1',
+                    SNAPSHOT_CAMINHO='', DIARIO_CAMINHO='',
+                    GUNICORN_CMD_ARGS=f'--worker-connections {conexoes} --max-requests 0 '
+                                      f'--worker-class {WORKER_WEBSOCKET}')
+    # Mede a capacidade, não o limite de taxa (LIMITES_ATIVOS=1 no ambiente mantém os limites)
+    ambiente.setdefault('LIMITES_ATIVOS', '0')
+    if args.shards:
+        comando = [sys.executable, 'despachante.py', '--workers', str(args.shards),
+                   '--porta', str(args.porta), '--porta-base', str(args.porta_base)]
+    else:
+        comando = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                   '--bind', f'127.0.0.1:{args.porta}', 'app:app']
+    saida = open(args.log_servidor, 'w') if args.log_servidor else subprocess.DEVNULL
+    processo = subprocess.Popen(comando, cwd=RAIZ, env=ambiente, stdout=saida, stderr=saida)
+    aguardar_porta(args.porta)
+    return processo
+
+
+def rss_total(processo):
+    """RSS (bytes) do processo e de todos os filhos (workers, shards)"""
+    total = 0
+    for p in [processo] + processo.children(recursive=True):
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+def amostrar_rss(processo, amostras, intervalo=0.5):
+    while True:
+        amostras.append(rss_total(processo))
+        gevent.sleep(intervalo)
+
+
+def executar(args):
+    servidor = None
+    if args.url:
+        url = args.url
+        pid = args.pid
+    else:
+        servidor = iniciar_servidor(args)
+        url = f'http://127.0.0.1:{args.porta}'
+        pid = servidor.pid
+    processo_servidor = psutil.Process(pid) if pid else None
+
+    geradores = []
+    try:
+        por_processo = max(args.por_sala, args.jogadores // args.processos // args.por_sala * args.por_sala)
+        for i in range(args.processos):
+            geradores.append(subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.bench_carga', '--gerador', '--url', url,
+                 '--perfil', args.perfil, '--jogadores', str(por_processo), '--primeiro', str(i * por_processo),
+                 '--por-sala', str(args.por_sala), '--segundos', str(args.segundos),
+                 '--pausa-ms', str(args.pausa_ms), '--timeout', str(args.timeout),
+                 '--conexoes-simultaneas', str(args.conexoes_simultaneas)],
+                cwd=RAIZ, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+            ))
+        for gerador in geradores:
+            if gerador.stdout.readline().strip() != 'pronto':
+                raise RuntimeError('Gerador de carga falhou ao preparar as salas')
+
+        rss_inicio = rss_total(processo_servidor) if processo_servidor else 0
+        amostras = []
+        amostrador = gevent.spawn(amostrar_rss, processo_servidor, amostras) if processo_servidor else None
+        for gerador in geradores:
+            gerador.stdin.write('inicio\n')
+            gerador.stdin.flush()
+        resultados = [json.loads(gerador.stdout.readline()) for gerador in geradores]
+        if amostrador is not None:
+            amostrador.kill()
+        rss_fim = rss_total(processo_servidor) if processo_servidor else 0
+        for gerador in geradores:
+            gerador.wait()
+    finally:
+        for gerador in geradores:
+            if gerador.poll() is None:
+                gerador.kill()
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+    eventos = {}
+    for resultado in resultados:
+        for evento, dados in resultado['eventos'].items():
+            eventos.setdefault(evento, Latencias()).juntar(dados)
+
+    return {
+        'perfil': args.perfil,
+        'jogadores': por_processo * args.processos,
+        'por_sala': args.por_sala,
+        'processos': args.processos,
+        'shards': args.shards,
+        'segundos': args.segundos,
+        'salas_com_falha': sum(resultado['salas_com_falha'] for resultado in resultados),
+        'rss_mb': {
+            'inicio': round(rss_inicio / 2 ** 20, 1),
+            'pico': round(max(amostras + [rss_fim]) / 2 ** 20, 1),
+            'fim': round(rss_fim / 2 ** 20, 1)
+        },
+        'eventos': {
+            evento: {
+                'enviados': latencias.enviados,
+                'por_segundo': round((latencias.enviados - latencias.erros - latencias.sem_resposta) / args.segundos, 1),
+                'erros': latencias.erros,
+                'sem_resposta': latencias.sem_resposta,
+                'p50_ms': round(latencias.percentil(50), 2),
+                'p95_ms': round(latencias.percentil(95), 2),
+                'p99_ms': round(latencias.percentil(99), 2)
+            }
+            for evento, latencias in sorted(eventos.items())
+        }
+    }
+
+
+def imprimir(relatorio):
+    print(f'perfil {relatorio["perfil"]}: {relatorio["jogadores"]} jogadores em salas de {relatorio["por_sala"]}, '
+          f'{relatorio["processos"]} processos de carga, {relatorio["segundos"]:g} s, {os.cpu_count()} CPUs')
+    if relatorio['salas_com_falha']:
+        print(f'{relatorio["salas_com_falha"]} salas não puderam ser montadas')
+    print(f'{"evento":<22} {"enviados":>9} {"ok/s":>9} {"erros":>7} {"p50":>8} {"p95":>8} {"p99 (ms)":>9}')
+    enviados = falhas = 0
+    por_segundo = 0.0
+    for evento, dados in relatorio['eventos'].items():
+        falhas_evento = dados['erros'] + dados['sem_resposta']
+        enviados += dados['enviados']
+        falhas += falhas_evento
+        por_segundo += dados['por_segundo']
+        taxa = falhas_evento / dados['enviados'] * 100 if dados['enviados'] else 0.0
+        print(f'{evento:<22} {dados["enviados"]:>9} {dados["por_segundo"]:>9.1f} {taxa:>6.2f}% '
+              f'{dados["p50_ms"]:>8.2f} {dados["p95_ms"]:>8.2f} {dados["p99_ms"]:>9.2f}')
+    taxa = falhas / enviados * 100 if enviados else 0.0
+    print(f'{"total":<22} {enviados:>9} {por_segundo:>9.1f} {taxa:>6.2f}%')
+    rss = relatorio['rss_mb']
+    print(f'RSS do servidor: início {rss["inicio"]} MB, pico {rss["pico"]} MB, fim {rss["fim"]} MB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--perfil', choices=PERFIS, default='palpites')
+    parser.add_argument('--jogadores', type=int, default=1000, help='jogadores simulados no total')
+    parser.add_argument('--por-sala', type=int, default=2, help='jogadores por sala')
+    parser.add_argument('--segundos', type=float, default=20.0)
+    parser.add_argument('--pausa-ms', type=float, default=0.0, help='pausa de cada jogador entre eventos')
+    parser.add_argument('--timeout', type=float, default=10.0, help='espera máxima por uma resposta')
+    parser.add_argument('--processos', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help='processos geradores de carga')
+    parser.add_argument('--conexoes-simultaneas', type=int, default=50,
+                        help='salas montadas em paralelo por processo antes da medição')
+    parser.add_argument('--shards', type=int, default=0, help='subir o despachante com N shards')
+    parser.add_argument('--url', help='usar um servidor já rodando em vez de subir um')
+    parser.add_argument('--pid', type=int, help='pid do servidor indicado em --url (para o RSS)')
+    parser.add_argument('--porta', type=int, default=5095)
+    parser.add_argument('--porta-base', type=int, default=5195)
+    parser.add_argument('--log-servidor', help='arquivo para a saída do servidor')
+    parser.add_argument('--json', help='salvar o relatório neste arquivo')
+    # Uso interno: processo gerador de carga
+    parser.add_argument('--gerador', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--primeiro', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.gerador:
+        executar_gerador(args)
+        return
+
+    relatorio = executar(args)
+    imprimir(relatorio)
+    if args.json:
+        with open(args.json, 'w') as arquivo:
+            json.dump(relatorio, arquivo, indent=2)
+
+
+if __name__ == '__main__':
+    main()
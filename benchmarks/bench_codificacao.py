@@ -0,0 +1,113 @@
+"""
+Benchmark de codificação: JSON vs MessagePack para o estado e os patches de 2 e 8 jogadores
+
+Mede o tempo de codificação de um pacote Socket.IO e os bytes enviados em
+cada caso: JSON montado a cada pacote, JSON com o estado pré-codificado (o
+caminho usado para o estado completo) e MessagePack. Os bytes consideram o
+transporte: no WebSocket o pacote vai como está; no long-polling o
+Engine.IO manda as mensagens binárias em base64.
+
+Requer o pacote msgpack.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_codificacao --mensagens-chat 100
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from socketio import packet  # noqa: E402
+
+import codificacao  # noqa: E402
+from codificacao import PacoteSocketIO, codificar_msgpack, pre_codificar  # noqa: E402
+from jogo import Configuracao, Jogador, PartidaMultiplayer  # noqa: E402
+
+PALAVRAS = ['casa', 'janela', 'coração', 'telhado', 'jardim']
+TAMANHOS = (2, 8)
+
+# O Flask-SocketIO faz o mesmo ao receber json=codificacao
+PacoteSocketIO.json = codificacao
+
+
+def criar_partida(num_jogadores, mensagens_chat):
+    """Partida no meio do jogo: cada jogador já errou e acertou algumas vezes"""
+    partida = PartidaMultiplayer(Configuracao(len(PALAVRAS), num_jogadores))
+    for i in range(num_jogadores):
+        jogador = Jogador(f'jogador{i}', len(PALAVRAS))
+        partida.adicionar_jogador(jogador)
+        partida.definir_palavras(jogador, PALAVRAS)
+    partida.iniciar_jogo()
+    for i in range(mensagens_chat):
+        partida.adicionar_mensagem_chat(f'jogador{i % num_jogadores}', f'mensagem {i}')
+    for _ in range(num_jogadores * 2):
+        partida.tentar_adivinhar(partida.get_jogador_da_vez().nome, 'errada')
+    for jogador in partida.jogadores:
+        jogador.descobrir_palavra(1)
+    partida.marcar_alteracao()
+    return partida
+
+
+def bytes_no_fio(codificado):
+    """(WebSocket, long-polling): binário vai em base64 com o prefixo 'b' no polling"""
+    if isinstance(codificado, bytes):
+        return len(codificado), 1 + (len(codificado) + 2) // 3 * 4
+    tamanho = len(codificado.encode('utf-8'))
+    return tamanho, tamanho
+
+
+def medir(funcao, repeticoes):
+    """Melhor média em microssegundos por chamada"""
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=5)) / repeticoes * 1e6
+
+
+def casos(partida):
+    """(nome, função que monta e codifica o pacote)"""
+    estado = partida.get_estado_jogo()
+    estado_codificado = pre_codificar(estado)
+
+    # Patch típico de uma tentativa errada (resposta_tentativa)
+    jogador = partida.get_jogador_da_vez().nome
+    partida.tentar_adivinhar(jogador, 'errada')
+    resposta = {
+        'jogador': jogador,
+        'palavra_tentada': 'errada',
+        'acertou': False,
+        'mensagem': 'Errou! Nova dica: ja',
+        'patch': partida.publicar_estado()
+    }
+
+    def pacote(dados):
+        return PacoteSocketIO(packet.EVENT, data=dados, namespace='/')
+
+    return [
+        ('estado json', lambda: pacote(['estado_atualizado', {'estado': estado}]).encode()),
+        ('estado json pré-codificado', lambda: pacote(['estado_atualizado', {'estado': estado_codificado}]).encode()),
+        ('estado msgpack', lambda: codificar_msgpack(pacote(['estado_atualizado', {'estado': estado}]))),
+        ('patch json', lambda: pacote(['resposta_tentativa', resposta]).encode()),
+        ('patch msgpack', lambda: codificar_msgpack(pacote(['resposta_tentativa', resposta]))),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=5000)
+    parser.add_argument('--mensagens-chat', type=int, default=100)
+    args = parser.parse_args()
+
+    if codificacao.msgpack is None:
+        sys.exit('msgpack não está instalado (pip install msgpack)')
+
+    print(f'{"jogadores":>9} {"caso":<28} {"codificar":>11} {"websocket":>10} {"polling":>9}')
+    for num_jogadores in TAMANHOS:
+        partida = criar_partida(num_jogadores, args.mensagens_chat)
+        for nome, funcao in casos(partida):
+            tempo = medir(funcao, args.repeticoes)
+            websocket, polling = bytes_no_fio(funcao())
+            print(f'{num_jogadores:>9} {nome:<28} {tempo:>9.2f}us {websocket:>8} B {polling:>7} B')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark do diário das salas: custo por tentativa com o diário desligado, sem fsync e com fsync
+
+Dois clientes de teste do Flask-SocketIO se alternam errando na mesma sala;
+cada tentativa passa pelo handler completo (instrumentação, transação,
+jogo, emits e diário). O diário grava em um arquivo de verdade no
+--diretorio (use um disco de verdade: em tmpfs o fsync não custa nada).
+
+Os modos são medidos alternados, --rodadas vezes, e vale a melhor rodada de
+cada um (a máquina varia mais que a diferença entre os modos). São medidos:
+- handler: tentativas/s e µs por tentativa vistos pelo loop de eventos
+- gravado: tempo até a última tentativa estar no arquivo (e no disco, com fsync)
+- eventos por grupo: quantas tentativas cada escrita + fsync cobriu
+- recuperação: eventos/s ao reaplicar o diário gravado em um armazém vazio
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_diario --tentativas 5000
+    python -m benchmarks.bench_diario --diretorio /var/tmp --modos desligado fsync --rodadas 5
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mede o diário, não o limite de taxa nem o snapshot
+os.environ['LIMITES_ATIVOS'] = '0'
+os.environ['SALAS_ARMAZEM'] = 'memoria'
+os.environ['SNAPSHOT_CAMINHO'] = ''
+os.environ['DIARIO_CAMINHO'] = ''
+
+import app as aplicacao  # noqa: E402
+from armazem_salas import ArmazemSalasMemoria  # noqa: E402
+from benchmarks.bench_log import preparar_sala  # noqa: E402
+from diario_salas import DiarioSalas  # noqa: E402
+
+MODOS = ('desligado', 'sem_fsync', 'fsync')
+
+
+def aguardar_gravacao(diario):
+    while diario is not None and diario.gravados < diario.enfileirados:
+        time.sleep(0.0005)
+
+
+def medir(modo, tentativas, diretorio):
+    caminho = os.path.join(diretorio, f'bench-{modo}.diario')
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    diario = None if modo == 'desligado' else DiarioSalas(aplicacao.salas, caminho, fsync=modo == 'fsync')
+    aplicacao.diario = diario
+    clientes = preparar_sala()
+    aguardar_gravacao(diario)
+    grupos_antes = diario.grupos if diario else 0
+
+    inicio = time.perf_counter()
+    for i in range(tentativas):
+        clientes[i % 2].emit('tentar_adivinhar', {'palavra': 'errada'})
+        clientes[i % 2].get_received()
+    handler = time.perf_counter() - inicio
+    aguardar_gravacao(diario)
+    gravado = time.perf_counter() - inicio
+
+    for cliente in clientes:
+        cliente.disconnect()
+    resultado = {'handler': handler, 'gravado': gravado, 'grupos': (diario.grupos - grupos_antes) if diario else 0}
+    if diario is not None:
+        diario.parar()
+        inicio = time.perf_counter()
+        recuperado = DiarioSalas(ArmazemSalasMemoria(), caminho)
+        recuperado.recuperar()
+        resultado['recuperacao'] = recuperado.recuperacao['eventos'] / (time.perf_counter() - inicio)
+        os.remove(caminho)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tentativas', type=int, default=5000)
+    parser.add_argument('--modos', nargs='+', choices=MODOS, default=list(MODOS))
+    parser.add_argument('--diretorio', default=tempfile.gettempdir(), help='onde gravar o diário')
+    parser.add_argument('--rodadas', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    for modo in args.modos:
+        medir(modo, args.tentativas // 10, args.diretorio)  # Aquecimento
+    melhores = {}
+    for _ in range(args.rodadas):
+        for modo in args.modos:
+            r = medir(modo, args.tentativas, args.diretorio)
+            if modo not in melhores or r['handler'] < melhores[modo]['handler']:
+                melhores[modo] = r
+
+    base = melhores['desligado']['handler'] / args.tentativas * 1e6 if 'desligado' in melhores else None
+    print(f'{"modo":<10} {"handler":>12} {"por tent.":>10} {"custo":>10} {"gravado":>12} '
+          f'{"eventos/grupo":>14} {"recuperação":>14}')
+    for modo in args.modos:
+        r = melhores[modo]
+        por_tentativa = r['handler'] / args.tentativas * 1e6
+        custo = f'{por_tentativa - base:+.1f} us' if base is not None else '-'
+        por_grupo = f'{args.tentativas / r["grupos"]:.1f}' if r['grupos'] else '-'
+        recuperacao = f'{r["recuperacao"]:.0f} ev/s' if 'recuperacao' in r else '-'
+        print(f'{modo:<10} {args.tentativas / r["handler"]:>6.0f} tent/s {por_tentativa:>7.1f} us {custo:>10} '
+              f'{args.tentativas / r["gravado"]:>6.0f} tent/s {por_grupo:>14} {recuperacao:>14}')
+
+
+if __name__ == '__main__':
+    main()
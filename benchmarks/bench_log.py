@@ -0,0 +1,126 @@
+"""
+Benchmark de logs: tentativas/s pelo handler real com o log desligado, síncrono e assíncrono
+
+Dois clientes de teste do Flask-SocketIO se alternam errando na mesma sala;
+cada tentativa passa pelo handler completo (instrumentação, transação,
+jogo, emits e log). O log vai para um arquivo de verdade; com
+--atraso-escrita-us cada escrita também espera esse tempo, simulando um
+stderr lento (pipe cheio do coletor de logs). Nos modos assíncronos
+também é medido o tempo para o escritor esvaziar a fila.
+
+Modos:
+- desligado: nível WARNING, nenhuma linha por tentativa
+- sincrono: escrita na hora, todas as tentativas logadas (como antes da fila)
+- assincrono: fila + escritor dedicado, todas as tentativas logadas
+- assincrono_amostrado: fila + escritor, com a amostragem padrão (tentativa=0.1)
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_log --tentativas 5000
+    python -m benchmarks.bench_log --atraso-escrita-us 200
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mede o log, não o limite de taxa
+os.environ['LIMITES_ATIVOS'] = '0'
+os.environ['SALAS_ARMAZEM'] = 'memoria'
+
+import app as aplicacao  # noqa: E402
+import log_assincrono  # noqa: E402
+
+PALAVRAS = ['casa', 'janela', 'porta', 'telhado', 'jardim']
+MODOS = ('desligado', 'sincrono', 'assincrono', 'assincrono_amostrado')
+
+
+class SaidaLenta:
+    """Arquivo em que cada escrita demora `atraso` segundos a mais"""
+
+    def __init__(self, arquivo, atraso):
+        self.arquivo = arquivo
+        self.atraso = atraso
+
+    def write(self, texto):
+        time.sleep(self.atraso)
+        return self.arquivo.write(texto)
+
+    def flush(self):
+        self.arquivo.flush()
+
+
+def preparar_sala():
+    """Dois clientes com o jogo iniciado; retorna (criador, convidado)"""
+    criador = aplicacao.socketio.test_client(aplicacao.app)
+    convidado = aplicacao.socketio.test_client(aplicacao.app)
+    criador.emit('criar_sala', {'nome': 'a'})
+    codigo = next(r for r in criador.get_received() if r['name'] == 'sala_criada')['args'][0]['codigo']
+    convidado.emit('entrar_na_sala', {'sala': codigo, 'nome': 'b'})
+    for cliente in (criador, convidado):
+        cliente.emit('enviar_palavras', {'palavras': PALAVRAS})
+    for cliente in (criador, convidado):
+        cliente.get_received()
+    return criador, convidado
+
+
+def configurar_modo(modo, arquivo):
+    os.environ['LOG_ASSINCRONO'] = '0' if modo in ('desligado', 'sincrono') else '1'
+    log_assincrono.configurar(arquivo)
+    logging.getLogger().setLevel(logging.WARNING if modo == 'desligado' else logging.INFO)
+    taxa = log_assincrono.AMOSTRAGEM_PADRAO['tentativa'] if modo == 'assincrono_amostrado' else 1.0
+    log_assincrono.AMOSTRAGEM['tentativa'] = taxa
+
+
+def aguardar_escritor():
+    escritor = log_assincrono._escritor
+    if escritor is None or os.environ['LOG_ASSINCRONO'] == '0':
+        return
+    while escritor.fila.qsize():
+        time.sleep(0.001)
+    time.sleep(0.01)  # O último registro retirado da fila ainda pode estar sendo escrito
+
+
+def medir(modo, tentativas, arquivo):
+    configurar_modo(modo, arquivo)
+    clientes = preparar_sala()
+    aguardar_escritor()
+
+    inicio = time.perf_counter()
+    for i in range(tentativas):
+        clientes[i % 2].emit('tentar_adivinhar', {'palavra': 'errada'})
+        clientes[i % 2].get_received()
+    handler = time.perf_counter() - inicio
+    aguardar_escritor()
+    total = time.perf_counter() - inicio
+
+    for cliente in clientes:
+        cliente.disconnect()
+    aguardar_escritor()
+    return tentativas / handler, tentativas / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tentativas', type=int, default=5000)
+    parser.add_argument('--modos', nargs='+', choices=MODOS, default=list(MODOS))
+    parser.add_argument('--atraso-escrita-us', type=float, default=0.0,
+                        help='espera extra por linha escrita (stderr lento)')
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile('w', suffix='.log') as arquivo:
+        if args.atraso_escrita_us:
+            arquivo = SaidaLenta(arquivo, args.atraso_escrita_us / 1e6)
+        print(f'{"modo":<22} {"handler":>14} {"com escrita":>16}')
+        for modo in args.modos:
+            medir(modo, args.tentativas // 10, arquivo)  # Aquecimento
+            handler, total = medir(modo, args.tentativas, arquivo)
+            print(f'{modo:<22} {handler:>8.0f} tent/s {total:>10.0f} tent/s')
+        log_assincrono.configurar()
+
+
+if __name__ == '__main__':
+    main()
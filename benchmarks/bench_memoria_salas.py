@@ -0,0 +1,105 @@
+"""
+Benchmark de memória: bytes por sala ociosa e por partida ativa com muitas salas simultâneas
+
+Cenários:
+- ociosa: sala recém-criada, só o criador conectado esperando os demais
+- ativa: partida em andamento com todos os jogadores conectados, palavras
+  definidas, algumas tentativas erradas e certas e o estado já publicado
+  (como fica no servidor no meio do jogo)
+
+Os bytes são os alocados pelo Python para todas as salas (tracemalloc),
+divididos pelo número de salas.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_memoria_salas --salas 10000
+    python -m benchmarks.bench_memoria_salas --cenarios ativa --jogadores 8 --palavras 8
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jogo import Configuracao, Jogador, PartidaMultiplayer  # noqa: E402
+
+PALAVRAS = ['casa', 'janela', 'porta', 'telhado', 'jardim', 'cozinha', 'quarto', 'sala']
+CENARIOS = ('ociosa', 'ativa')
+
+
+def criar_sala_ociosa(indice, num_jogadores, num_palavras, mensagens_chat):
+    partida = PartidaMultiplayer(Configuracao(num_palavras, num_jogadores))
+    partida.codigo_sala = f'S{indice:05d}'
+    partida.criador = 'jogador0'
+    partida.adicionar_jogador(Jogador('jogador0', num_palavras))
+    partida.conectar_jogador('jogador0', f'sid{indice}-0')
+    partida.publicar_estado()
+    return partida
+
+
+def criar_sala_ativa(indice, num_jogadores, num_palavras, mensagens_chat):
+    partida = PartidaMultiplayer(Configuracao(num_palavras, num_jogadores))
+    partida.codigo_sala = f'S{indice:05d}'
+    partida.criador = 'jogador0'
+    for j in range(num_jogadores):
+        nome = f'jogador{j}'
+        partida.adicionar_jogador(Jogador(nome, num_palavras))
+        partida.conectar_jogador(nome, f'sid{indice}-{j}')
+        partida.definir_palavras(partida.obter_jogador(nome), PALAVRAS[:num_palavras])
+    partida.iniciar_jogo()
+    partida.publicar_estado()
+
+    # Uma rodada de erros e depois um acerto de cada jogador
+    for _ in range(num_jogadores):
+        partida.tentar_adivinhar(partida.get_jogador_da_vez().nome, 'errada')
+        partida.publicar_estado()
+    for _ in range(num_jogadores):
+        jogador = partida.get_jogador_da_vez()
+        partida.tentar_adivinhar(jogador.nome, jogador.alvo_jogador.palavras_originais[1])
+        partida.tentar_adivinhar(jogador.nome, 'errada')
+        partida.publicar_estado()
+    for i in range(mensagens_chat):
+        partida.adicionar_mensagem_chat(f'jogador{i % num_jogadores}', f'mensagem {i}')
+    partida.get_estado_codificado()
+    return partida
+
+
+CRIAR = {'ociosa': criar_sala_ociosa, 'ativa': criar_sala_ativa}
+
+
+def medir(cenario, num_salas, num_jogadores, num_palavras, mensagens_chat):
+    """Retorna os bytes alocados por sala"""
+    gc.collect()
+    tracemalloc.start()
+    inicio, _ = tracemalloc.get_traced_memory()
+    salas = {
+        f'S{i:05d}': CRIAR[cenario](i, num_jogadores, num_palavras, mensagens_chat)
+        for i in range(num_salas)
+    }
+    gc.collect()
+    fim, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del salas
+    return (fim - inicio) / num_salas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--salas', type=int, default=10000)
+    parser.add_argument('--cenarios', nargs='+', choices=CENARIOS, default=list(CENARIOS))
+    parser.add_argument('--jogadores', type=int, default=8, help='máximo da sala (ociosa) / jogadores na partida (ativa)')
+    parser.add_argument('--palavras', type=int, default=5)
+    parser.add_argument('--mensagens-chat', type=int, default=0, help='mensagens no chat de cada partida ativa')
+    args = parser.parse_args()
+
+    print(f'{args.salas} salas, {args.jogadores} jogadores, {args.palavras} palavras')
+    print(f'{"cenário":<8} {"por sala":>10} {"total":>10}')
+    for cenario in args.cenarios:
+        por_sala = medir(cenario, args.salas, args.jogadores, args.palavras, args.mensagens_chat)
+        total = por_sala * args.salas / 1024 / 1024
+        print(f'{cenario:<8} {por_sala:>8.0f} B {total:>6.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
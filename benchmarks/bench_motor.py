@@ -0,0 +1,240 @@
+"""
+Microbenchmarks dos caminhos quentes de jogo.py e normalizador.py, com resultados em JSON
+
+Cada caso roda com timeit (número de chamadas calibrado para ~0,2 s por
+rodada, --rodadas rodadas) e registra o melhor tempo e a mediana por
+chamada. As funções do normalizador com cache LRU são medidas com ele (entradas
+repetidas, o caso comum) e sem ele (custo do cálculo em si). Com
+--comparar, a saída é 1 se algum caso piorou mais que --tolerancia.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_motor --saida base.json
+    python -m benchmarks.bench_motor --comparar base.json           # roda e compara com base.json
+    python -m benchmarks.bench_motor --comparar base.json nova.json  # só compara dois arquivos
+    python -m benchmarks.bench_motor --filtro estado
+"""
+import argparse
+from itertools import cycle
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from chat import HistoricoChat  # noqa: E402
+from jogo import Configuracao, Jogador, PartidaMultiplayer  # noqa: E402
+from normalizador import NORMALIZADOR, TAMANHO_CACHE_PADRAO, configurar_cache  # noqa: E402
+
+PALAVRAS = ['casa', 'janela', 'coração', 'telhado', 'jardim']
+# Mistura de entradas: sem correção, com correção do dicionário e com padrão (cao -> ção)
+ENTRADAS = ['janela', 'Coracao', 'voce', 'informacao', 'limoes', 'telhado', 'pao', 'JARDIM']
+TAMANHOS_PARTIDA = (2, 4, 8)
+
+
+def preparar_partida(num_jogadores, mensagens_chat):
+    """Partida iniciada com `num_jogadores` e o histórico de chat cheio"""
+    partida = PartidaMultiplayer(Configuracao(len(PALAVRAS), num_jogadores))
+    partida.chat = HistoricoChat(capacidade=mensagens_chat)
+    for i in range(num_jogadores):
+        jogador = Jogador(f'jogador{i}', len(PALAVRAS))
+        partida.adicionar_jogador(jogador)
+        partida.definir_palavras(jogador, PALAVRAS)
+    partida.iniciar_jogo()
+    for i in range(mensagens_chat):
+        partida.adicionar_mensagem_chat(f'jogador{i % num_jogadores}', f'mensagem número {i} do histórico')
+    return partida
+
+
+def preparar_tentativa():
+    """Jogador cujo alvo tem PALAVRAS; a segunda palavra é 'janela'"""
+    partida = preparar_partida(2, 0)
+    return partida.jogadores[0]
+
+
+def casos(args):
+    """Lista de (nome, função sem argumentos, usar cache do normalizador)"""
+    lista = []
+
+    for nome_metodo in ('normalizar', 'remover_acentos'):
+        metodo = getattr(NORMALIZADOR, nome_metodo)
+        for com_cache in (True, False):
+            proxima = cycle(ENTRADAS).__next__
+            sufixo = '' if com_cache else '[sem_cache]'
+            lista.append((f'normalizador.{nome_metodo}{sufixo}', lambda m=metodo, p=proxima: m(p()), com_cache))
+
+    # sugerir_correcao não passa pelo cache
+    proxima_sugestao = cycle(ENTRADAS).__next__
+    lista.append((
+        'normalizador.sugerir_correcao',
+        lambda p=proxima_sugestao: NORMALIZADOR.sugerir_correcao(p()),
+        True
+    ))
+
+    pares = [('coracao', 'Coração'), ('janela', 'JANELA'), ('casa', 'caso'), ('informacao', 'informação')]
+    for com_cache in (True, False):
+        proximo_par = cycle(pares).__next__
+        sufixo = '' if com_cache else '[sem_cache]'
+        lista.append((
+            f'normalizador.comparar_palavras{sufixo}',
+            lambda p=proximo_par: NORMALIZADOR.comparar_palavras(*p()),
+            com_cache
+        ))
+
+    jogador_palavras = Jogador('a', len(PALAVRAS))
+    lista.append(('jogador.definir_palavras', lambda: jogador_palavras.definir_palavras(PALAVRAS), True))
+
+    jogador = preparar_tentativa()
+
+    def acertar():
+        jogador.palavra_atual_index = 1
+        jogador.tentar_adivinhar('Janela')
+
+    def errar():
+        jogador.palavra_atual_index = 1
+        jogador.tentativas_erradas_atual = 0
+        jogador.tentar_adivinhar('porta')
+
+    lista.append(('jogador.tentar_adivinhar[acerto]', acertar, True))
+    lista.append(('jogador.tentar_adivinhar[erro]', errar, True))
+
+    for num_jogadores in TAMANHOS_PARTIDA:
+        partida = preparar_partida(num_jogadores, args.mensagens_chat)
+
+        def estado(p=partida):
+            # Uma mutação antes de cada chamada: mede a montagem, não o snapshot em cache
+            p.marcar_alteracao()
+            p.publicar_estado()
+            p.get_estado_jogo()
+
+        lista.append((f'partida.get_estado_jogo[{num_jogadores}_jogadores]', estado, True))
+        lista.append((
+            f'partida.get_estado_jogo[{num_jogadores}_jogadores,cache]',
+            partida.get_estado_jogo,
+            True
+        ))
+
+    def criar_sala():
+        # O que o handler criar_sala faz antes de guardar a partida no armazém
+        partida = PartidaMultiplayer(Configuracao(5, 2))
+        jogador = Jogador('criador', 5)
+        partida.adicionar_jogador(jogador)
+        partida.codigo_sala = 'ABC123'
+        return partida
+
+    def montar_sala():
+        partida = criar_sala()
+        convidado = Jogador('convidado', 5)
+        partida.adicionar_jogador(convidado)
+        for j in partida.jogadores:
+            partida.definir_palavras(j, PALAVRAS)
+        partida.iniciar_jogo()
+        return partida
+
+    lista.append(('sala.criar', criar_sala, True))
+    lista.append(('sala.criar_e_iniciar[2_jogadores]', montar_sala, True))
+
+    if args.filtro:
+        lista = [caso for caso in lista if args.filtro in caso[0]]
+    return lista
+
+
+def medir(funcao, rodadas):
+    """Retorna (melhor, mediana) em microssegundos por chamada e as chamadas por rodada"""
+    timer = timeit.Timer(funcao)
+    numero, _ = timer.autorange()
+    tempos = [t / numero * 1e6 for t in timer.repeat(repeat=rodadas, number=numero)]
+    return min(tempos), statistics.median(tempos), numero
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(args):
+    resultados = {}
+    print(f'{"caso":<48} {"melhor":>10} {"mediana":>10}')
+    for nome, funcao, com_cache in casos(args):
+        configurar_cache(TAMANHO_CACHE_PADRAO if com_cache else 0)
+        melhor, mediana, numero = medir(funcao, args.rodadas)
+        resultados[nome] = {'melhor_us': round(melhor, 4), 'mediana_us': round(mediana, 4), 'chamadas': numero}
+        print(f'{nome:<48} {melhor:>8.2f}us {mediana:>8.2f}us')
+    configurar_cache(TAMANHO_CACHE_PADRAO)
+
+    return {
+        'commit': commit_atual(),
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'rodadas': args.rodadas,
+        'mensagens_chat': args.mensagens_chat,
+        'resultados': resultados
+    }
+
+
+def comparar(base, nova, tolerancia):
+    """Imprime a razão nova/base do melhor tempo de cada caso; retorna quantos pioraram"""
+    print(f'\nbase {base.get("commit") or "?"} -> nova {nova.get("commit") or "?"} '
+          f'(regressão acima de {tolerancia:.0f}%)')
+    print(f'{"caso":<48} {"base":>10} {"nova":>10} {"razão":>7}')
+    regressoes = 0
+    for nome, dados in nova['resultados'].items():
+        anterior = base['resultados'].get(nome)
+        if anterior is None:
+            print(f'{nome:<48} {"-":>10} {dados["melhor_us"]:>8.2f}us {"novo":>7}')
+            continue
+        razao = dados['melhor_us'] / anterior['melhor_us']
+        marca = ''
+        if razao > 1 + tolerancia / 100:
+            marca = '  <- regressão'
+            regressoes += 1
+        print(f'{nome:<48} {anterior["melhor_us"]:>8.2f}us {dados["melhor_us"]:>8.2f}us {razao:>6.2f}x{marca}')
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rodadas', type=int, default=5)
+    parser.add_argument('--mensagens-chat', type=int, default=1000, help='tamanho do histórico de chat das partidas')
+    parser.add_argument('--filtro', help='só os casos cujo nome contém este texto')
+    parser.add_argument('--saida', help='salvar os resultados neste arquivo JSON')
+    parser.add_argument('--comparar', nargs='+', metavar='JSON',
+                        help='BASE: roda e compara com BASE; BASE NOVA: só compara os dois arquivos')
+    parser.add_argument('--tolerancia', type=float, default=10.0,
+                        help='piora percentual a partir da qual o caso conta como regressão')
+    args = parser.parse_args()
+
+    if args.comparar and len(args.comparar) > 2:
+        parser.error('--comparar aceita um ou dois arquivos')
+
+    if args.comparar and len(args.comparar) == 2:
+        with open(args.comparar[0]) as arquivo:
+            base = json.load(arquivo)
+        with open(args.comparar[1]) as arquivo:
+            nova = json.load(arquivo)
+    else:
+        nova = executar(args)
+        if args.saida:
+            with open(args.saida, 'w') as arquivo:
+                json.dump(nova, arquivo, indent=2)
+        if not args.comparar:
+            return
+        with open(args.comparar[0]) as arquivo:
+            base = json.load(arquivo)
+
+    # Código de saída diferente de zero quando há regressão (útil em CI)
+    sys.exit(1 if comparar(base, nova, args.tolerancia) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark de tráfego: bytes por tentativa com estado completo vs patch versionado
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_patch_estado --jogadores 8 --tentativas 200
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jogo import Configuracao, Jogador, PartidaMultiplayer  # noqa: E402
+
+PALAVRAS = ['casa', 'janela', 'porta', 'telhado', 'jardim', 'cozinha', 'quarto', 'varanda']
+
+
+def tamanho_json(dados):
+    return len(json.dumps(dados, separators=(',', ':')).encode('utf-8'))
+
+
+def criar_partida(num_jogadores, num_palavras, mensagens_chat):
+    """Cria uma partida já iniciada, com histórico de chat"""
+    partida = PartidaMultiplayer(Configuracao(num_palavras, num_jogadores))
+    for i in range(num_jogadores):
+        jogador = Jogador(f'jogador{i}', num_palavras)
+        partida.adicionar_jogador(jogador)
+        jogador.definir_palavras(PALAVRAS[:num_palavras])
+    for i in range(mensagens_chat):
+        partida.adicionar_mensagem_chat(f'jogador{i % num_jogadores}', f'mensagem de chat número {i}')
+    partida.iniciar_jogo()
+    partida.publicar_estado()
+    return partida
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jogadores', type=int, default=8)
+    parser.add_argument('--palavras', type=int, default=5)
+    parser.add_argument('--chat', type=int, default=50)
+    parser.add_argument('--tentativas', type=int, default=200)
+    args = parser.parse_args()
+
+    partida = criar_partida(args.jogadores, args.palavras, args.chat)
+    bytes_completo = bytes_patch = tentativas = 0
+    while tentativas < args.tentativas and not partida.vencedor:
+        jogador = partida.get_jogador_da_vez()
+        indice = jogador.palavra_atual_index
+        # Alterna erros e acertos para exercitar os dois caminhos
+        palavra = PALAVRAS[indice] if tentativas % 3 == 2 else 'errada'
+        partida.tentar_adivinhar(jogador.nome, palavra)
+        bytes_patch += tamanho_json(partida.publicar_estado())
+        bytes_completo += tamanho_json(partida.get_estado_jogo())
+        tentativas += 1
+
+    # Cada evento é enviado para todos os jogadores da sala
+    fator = args.jogadores
+    print(f'{tentativas} tentativas, {args.jogadores} jogadores, {args.chat} mensagens de chat')
+    print(f'estado completo: {bytes_completo / tentativas:.0f} bytes/tentativa, '
+          f'{bytes_completo * fator / tentativas:.0f} bytes/tentativa na sala')
+    print(f'patch:           {bytes_patch / tentativas:.0f} bytes/tentativa, '
+          f'{bytes_patch * fator / tentativas:.0f} bytes/tentativa na sala')
+    print(f'redução: {bytes_completo / bytes_patch:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
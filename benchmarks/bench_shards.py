@@ -0,0 +1,202 @@
+"""
+Teste de carga do modo shard: tentativas/s com o despachante e 1..N processos
+
+Para cada quantidade de processos sobe `despachante.py --workers N`, cria
+salas de 2 jogadores (clientes Socket.IO reais, via WebSocket) e faz os
+jogadores alternarem tentativas erradas o mais rápido possível. Cada
+resposta_tentativa recebida conta como um evento processado pelo servidor.
+
+Requer o cliente do python-socketio (pip install "python-socketio[client]").
+Os geradores de carga rodam na mesma máquina: para medir a escala do
+servidor, deixe núcleos livres para eles (--clientes).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_shards --workers 1 2 4 --salas 32 --segundos 10
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import socketio  # noqa: E402
+
+# Os clientes usam só WebSocket: o worker padrão do gunicorn.conf.py ("gevent") não faz o upgrade
+WORKER_WEBSOCKET = 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker'
+PALAVRAS = ['casa', 'janela', 'porta', 'telhado', 'jardim']
+
+
+class Sala:
+    """Dois clientes que se revezam errando até o tempo acabar"""
+
+    def __init__(self, url, indice, fim, contador):
+        self.url = url
+        self.fim = fim
+        self.contador = contador
+        self.nomes = (f'a{indice}', f'b{indice}')
+        self.clientes = {}
+        self.codigo = None
+        self.criada = threading.Event()
+        self.iniciada = threading.Event()
+
+    def _cliente(self, nome):
+        cliente = socketio.Client(reconnection=False)
+
+        @cliente.on('sala_criada')
+        def sala_criada(data):
+            self.codigo = data['codigo']
+            self.criada.set()
+
+        @cliente.on('jogo_iniciado')
+        def jogo_iniciado(data):
+            self.iniciada.set()
+
+        @cliente.on('resposta_tentativa')
+        def resposta_tentativa(data):
+            if data['jogador'] == nome:
+                return
+            # O outro jogador errou: agora é a minha vez
+            self.contador.incrementar()
+            if time.perf_counter() < self.fim:
+                cliente.emit('tentar_adivinhar', {'palavra': 'errada'})
+
+        self.clientes[nome] = cliente
+        return cliente
+
+    def preparar(self):
+        criador, convidado = self.nomes
+        self._cliente(criador).connect(
+            f'{self.url}?afinidade={criador}', transports=['websocket']
+        )
+        self.clientes[criador].emit('criar_sala', {'nome': criador, 'num_palavras': 5, 'max_jogadores': 2})
+        if not self.criada.wait(10):
+            raise RuntimeError('Sala não foi criada')
+
+        self._cliente(convidado).connect(
+            f'{self.url}?sala={self.codigo}', transports=['websocket']
+        )
+        self.clientes[convidado].emit('entrar_na_sala', {'sala': self.codigo, 'nome': convidado})
+        for nome in self.nomes:
+            self.clientes[nome].emit('enviar_palavras', {'palavras': PALAVRAS})
+        if not self.iniciada.wait(10):
+            raise RuntimeError('Jogo não iniciou')
+
+    def comecar(self):
+        # O criador é o primeiro da vez
+        self.clientes[self.nomes[0]].emit('tentar_adivinhar', {'palavra': 'errada'})
+
+    def fechar(self):
+        for cliente in self.clientes.values():
+            cliente.disconnect()
+
+
+class Contador:
+    def __init__(self):
+        self.valor = 0
+        self._trava = threading.Lock()
+
+    def incrementar(self):
+        with self._trava:
+            self.valor += 1
+
+
+def gerador_carga(url, primeira_sala, num_salas, segundos, inicio, fila):
+    """Processo cliente: prepara suas salas, espera o sinal e joga até o fim"""
+    contador = Contador()
+    salas = [Sala(url, primeira_sala + i, 0, contador) for i in range(num_salas)]
+    for sala in salas:
+        sala.preparar()
+    fila.put('pronto')
+
+    inicio.wait()
+    fim = time.perf_counter() + segundos
+    for sala in salas:
+        sala.fim = fim
+    contador.valor = 0
+    for sala in salas:
+        sala.comecar()
+    time.sleep(segundos)
+    eventos = contador.valor
+    time.sleep(0.5)  # Deixar as últimas respostas chegarem antes de desconectar
+    for sala in salas:
+        sala.fechar()
+    fila.put(eventos)
+
+
+def aguardar_porta(porta, timeout=30.0):
+    """O despachante só aceita conexões depois que todos os shards subiram"""
+    limite = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', porta), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > limite:
+                raise RuntimeError('Despachante não respondeu')
+            time.sleep(0.2)
+
+
+def medir(num_workers, args):
+    porta = args.porta
+    despachante = subprocess.Popen(
+        [sys.executable, 'despachante.py', '--workers', str(num_workers),
+         '--porta', str(porta), '--porta-base', str(args.porta_base)],
+        cwd=RAIZ,
+        env=dict(os.environ, SALAS_ARMAZEM='memoria', SNAPSHOT_CAMINHO='', DIARIO_CAMINHO='',
+                 GUNICORN_CMD_ARGS=f'--worker-class {WORKER_WEBSOCKET}'),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        aguardar_porta(porta)
+        url = f'http://127.0.0.1:{porta}'
+        fila = multiprocessing.Queue()
+        inicio = multiprocessing.Event()
+        por_cliente = max(1, args.salas // args.clientes)
+        processos = [
+            multiprocessing.Process(
+                target=gerador_carga,
+                args=(url, i * por_cliente, por_cliente, args.segundos, inicio, fila)
+            )
+            for i in range(args.clientes)
+        ]
+        for processo in processos:
+            processo.start()
+        for _ in processos:
+            fila.get(timeout=120)
+        inicio.set()
+        eventos = sum(fila.get(timeout=args.segundos + 60) for _ in processos)
+        for processo in processos:
+            processo.join()
+        return eventos / args.segundos
+    finally:
+        despachante.terminate()
+        despachante.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--salas', type=int, default=32, help='salas simultâneas (2 jogadores cada)')
+    parser.add_argument('--clientes', type=int, default=4, help='processos geradores de carga')
+    parser.add_argument('--segundos', type=float, default=10.0)
+    parser.add_argument('--porta', type=int, default=5090)
+    parser.add_argument('--porta-base', type=int, default=5190)
+    args = parser.parse_args()
+
+    print(f'{args.salas} salas, {args.clientes} processos de carga, {os.cpu_count()} CPUs')
+    base = None
+    for num_workers in args.workers:
+        taxa = medir(num_workers, args)
+        base = base or taxa
+        print(f'{num_workers:>3} shards: {taxa:>9.0f} tentativas/s ({taxa / base:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark de snapshot: tempo para gravar e restaurar muitas salas (armazém em memória)
+
+Cria salas ociosas e partidas ativas (as mesmas do bench_memoria_salas) e mede:
+- gravação completa (todas as salas serializadas)
+- gravação sem alterações (salas copiadas do arquivo anterior)
+- gravação com uma fração das salas alterada
+- restauração: leitura do índice (o que o worker novo faz antes de atender)
+- primeiro acesso a uma sala restaurada (desserialização sob demanda)
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_snapshot --salas 50000
+    python -m benchmarks.bench_snapshot --salas 50000 --fracao-ativas 0.2 --fracao-alteradas 0.1
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from armazem_salas import ArmazemSalasMemoria  # noqa: E402
+from benchmarks.bench_memoria_salas import criar_sala_ativa, criar_sala_ociosa  # noqa: E402
+from snapshot_salas import SnapshotSalas  # noqa: E402
+
+
+def criar_armazem(num_salas, fracao_ativas, num_jogadores, num_palavras):
+    armazem = ArmazemSalasMemoria()
+    ativas = int(num_salas * fracao_ativas)
+    for i in range(num_salas):
+        criar = criar_sala_ativa if i < ativas else criar_sala_ociosa
+        partida = criar(i, num_jogadores, num_palavras, 0)
+        armazem.criar(partida.codigo_sala, partida)
+    return armazem
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--salas', type=int, default=50000)
+    parser.add_argument('--fracao-ativas', type=float, default=0.2, help='fração das salas com jogo em andamento')
+    parser.add_argument('--fracao-alteradas', type=float, default=0.1, help='fração alterada entre dois snapshots')
+    parser.add_argument('--jogadores', type=int, default=4)
+    parser.add_argument('--palavras', type=int, default=5)
+    args = parser.parse_args()
+
+    armazem = criar_armazem(args.salas, args.fracao_ativas, args.jogadores, args.palavras)
+    print(f'{args.salas} salas ({args.fracao_ativas:.0%} ativas, {args.jogadores} jogadores, {args.palavras} palavras)')
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        snapshot = SnapshotSalas(armazem, os.path.join(diretorio, 'salas.snap'))
+
+        ms, gravacao = cronometrar(snapshot.salvar)
+        print(f'gravação completa:      {ms:8.1f} ms  {gravacao["bytes"] / 1024 / 1024:.1f} MiB '
+              f'({gravacao["bytes"] / args.salas:.0f} B/sala)')
+        ms, gravacao = cronometrar(snapshot.salvar)
+        print(f'gravação sem alterações: {ms:7.1f} ms  ({gravacao["reaproveitadas"]} salas copiadas)')
+
+        codigos = armazem.codigos()
+        for codigo in codigos[:int(len(codigos) * args.fracao_alteradas)]:
+            armazem.obter(codigo).marcar_alteracao()
+        ms, gravacao = cronometrar(snapshot.salvar)
+        print(f'gravação {args.fracao_alteradas:.0%} alteradas:   {ms:7.1f} ms  '
+              f'({gravacao["salas"] - gravacao["reaproveitadas"]} salas serializadas)')
+
+        # Processo novo: armazém vazio, restaurado do arquivo
+        restaurado = ArmazemSalasMemoria()
+        ms, total = cronometrar(SnapshotSalas(restaurado, snapshot.caminho).restaurar)
+        print(f'restauração (índice):   {ms:8.1f} ms  ({total} salas)')
+
+        inicio = time.perf_counter()
+        for codigo in codigos:
+            restaurado.obter(codigo)
+        ms = (time.perf_counter() - inicio) * 1000
+        print(f'primeiro acesso:        {ms / len(codigos) * 1000:8.1f} us/sala ({ms:.0f} ms para todas)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Microbenchmark: latência de uma tentativa em função do tamanho da palavra
+
+Compara a comparação antiga (normalizar + remover acentos nas duas palavras,
+sem cache) com a verificação atual contra a chave pré-calculada do alvo.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_tentativa
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jogo import Configuracao, Jogador, PartidaMultiplayer  # noqa: E402
+from normalizador import NORMALIZADOR, configurar_cache, TAMANHO_CACHE_PADRAO  # noqa: E402
+
+TAMANHOS = (4, 16, 64, 256)
+
+
+def gerar_palavra(tamanho):
+    """Gera uma palavra acentuada com o tamanho pedido"""
+    base = 'coraçãoéíúâ'
+    return (base * (tamanho // len(base) + 1))[:tamanho]
+
+
+def preparar_jogador(palavra):
+    """Cria dois jogadores em que o alvo tem `palavra` como segunda palavra"""
+    partida = PartidaMultiplayer(Configuracao(4, 2))
+    jogador, alvo = Jogador('a', 4), Jogador('b', 4)
+    partida.adicionar_jogador(jogador)
+    partida.adicionar_jogador(alvo)
+    alvo.definir_palavras(['casa', palavra, 'porta', 'mesa'])
+    jogador.definir_palavras(['casa', 'mesa', 'porta', 'sala'])
+    return jogador
+
+
+def medir(funcao, repeticoes):
+    """Retorna a melhor média em microssegundos por chamada"""
+    tempos = timeit.repeat(funcao, number=repeticoes, repeat=5)
+    return min(tempos) / repeticoes * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f'{"tamanho":>8} {"comparar sem cache":>20} {"acerto (chave)":>16} {"erro (chave)":>14}')
+    for tamanho in TAMANHOS:
+        palavra = gerar_palavra(tamanho)
+        tentativa = NORMALIZADOR.remover_acentos(palavra).upper()
+        erro = 'x' * tamanho
+
+        configurar_cache(0)
+        t_antigo = medir(lambda: NORMALIZADOR.comparar_palavras(tentativa, palavra), args.repeticoes)
+        configurar_cache(TAMANHO_CACHE_PADRAO)
+
+        jogador = preparar_jogador(palavra)
+
+        def acertar():
+            jogador.palavra_atual_index = 1
+            jogador.tentar_adivinhar(tentativa)
+
+        def errar():
+            jogador.palavra_atual_index = 1
+            jogador.tentativas_erradas_atual = 0
+            jogador.tentar_adivinhar(erro)
+
+        t_acerto = medir(acertar, args.repeticoes)
+        t_erro = medir(errar, args.repeticoes)
+        print(f'{tamanho:>8} {t_antigo:>18.2f}us {t_acerto:>14.2f}us {t_erro:>12.2f}us')
+
+
+if __name__ == '__main__':
+    main()
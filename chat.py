@@ -0,0 +1,91 @@
+"""
+Histórico de chat por sala: buffer circular limitado com paginação por cursor
+"""
+from collections import deque
+from itertools import islice
+import datetime
+import os
+
+# Quantidade máxima de mensagens guardadas por sala
+CAPACIDADE_CHAT_PADRAO = int(os.environ.get('CHAT_CAPACIDADE', 100))
+
+# Tamanho máximo de uma página de histórico
+LIMITE_PAGINA_MAXIMO = 100
+
+# Histórico sem mensagens: o deque (que já nasce com um bloco de 64 posições) só é criado na primeira
+SEM_MENSAGENS = ()
+
+
+class HistoricoChat:
+    """Guarda as últimas mensagens de uma sala, descartando as mais antigas
+
+    Cada mensagem recebe um id crescente; como os ids guardados são
+    contíguos, a posição de um cursor no buffer é calculada diretamente.
+    """
+    __slots__ = ('_mensagens', '_capacidade', '_proximo_id')
+
+    def __init__(self, capacidade=CAPACIDADE_CHAT_PADRAO):
+        self._mensagens = SEM_MENSAGENS
+        self._capacidade = max(1, capacidade)
+        self._proximo_id = 1
+
+    def __len__(self):
+        return len(self._mensagens)
+
+    @property
+    def capacidade(self):
+        return self._capacidade
+
+    def adicionar(self, jogador_nome, mensagem):
+        """Adiciona uma mensagem e a retorna"""
+        registro = {
+            'id': self._proximo_id,
+            'jogador': jogador_nome,
+            'mensagem': mensagem.strip(),
+            'timestamp': datetime.datetime.now().strftime('%H:%M:%S')
+        }
+        self._proximo_id += 1
+        if self._mensagens is SEM_MENSAGENS:
+            self._mensagens = deque(maxlen=self._capacidade)
+        self._mensagens.append(registro)
+        return registro
+
+    def pagina(self, antes=None, limite=50):
+        """Retorna as `limite` mensagens mais recentes com id menor que `antes`
+
+        As mensagens voltam em ordem cronológica. 'cursor' é o valor de
+        `antes` para buscar a página anterior, ou None se não houver mais.
+        """
+        limite = max(1, min(LIMITE_PAGINA_MAXIMO, int(limite)))
+        primeiro_id = self._proximo_id - len(self._mensagens)
+        
+        if antes is None:
+            fim = len(self._mensagens)
+        else:
+            fim = max(0, min(len(self._mensagens), int(antes) - primeiro_id))
+        inicio = max(0, fim - limite)
+        
+        mensagens = list(islice(self._mensagens, inicio, fim))
+        return {
+            'mensagens': mensagens,
+            'cursor': mensagens[0]['id'] if inicio > 0 else None
+        }
+
+    def para_dict(self):
+        return {
+            'capacidade': self.capacidade,
+            'proximo_id': self._proximo_id,
+            'mensagens': list(self._mensagens)
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        historico = cls(dados['capacidade'])
+        if dados['mensagens']:
+            historico._mensagens = deque(dados['mensagens'], maxlen=historico._capacidade)
+        historico._proximo_id = dados['proximo_id']
+        return historico
+
+    def limpar(self):
+        """Remove todas as mensagens (os ids continuam crescendo)"""
+        self._mensagens = SEM_MENSAGENS
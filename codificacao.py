@@ -0,0 +1,139 @@
+"""
+Codificação JSON dos pacotes Socket.IO com suporte a trechos pré-codificados
+
+Um payload que se repete (ex.: o estado de uma sala numa mesma versão) pode
+ser codificado uma única vez com `pre_codificar` e reaproveitado em todos os
+emits: o trecho é inserido como está no pacote, sem percorrer o dicionário de
+novo. Este módulo é passado ao Socket.IO como módulo `json`; cada pacote
+codificado também é contado nas métricas (por evento).
+
+Codificação binária (pacote msgpack, no requirements.txt; sem ele só JSON):
+a conexão que pedir `?codificacao=msgpack` recebe e envia pacotes
+MessagePack em mensagens binárias, no formato do socket.io-msgpack-parser.
+As demais conexões continuam em JSON. A escolha vale por conexão, não para
+o servidor todo.
+"""
+import json
+import secrets
+from urllib.parse import parse_qs
+
+from socketio import packet
+
+from metricas import registrar_emissao
+
+try:
+    import msgpack
+except ImportError:  # Opcional: sem ele todas as conexões usam JSON
+    msgpack = None
+
+CODIFICACOES = ('json', 'msgpack') if msgpack is not None else ('json',)
+
+# Sem anexos binários separados no MessagePack: os tipos BINARY_* viram os comuns
+_TIPOS_MSGPACK = {packet.BINARY_EVENT: packet.EVENT, packet.BINARY_ACK: packet.ACK}
+
+# Marcador imprevisível usado para posicionar os trechos pré-codificados
+_MARCADOR = '\x00' + secrets.token_hex(8) + ':'
+
+
+class JsonPreCodificado:
+    """Trecho de JSON já codificado, inserido sem alterações nos pacotes"""
+
+    __slots__ = ('texto', 'dados')
+
+    def __init__(self, texto, dados=None):
+        self.texto = texto
+        self.dados = dados  # Original, para as conexões em MessagePack
+
+    def __len__(self):
+        return len(self.texto)
+
+
+def pre_codificar(dados):
+    """Codifica `dados` uma vez para reaproveitar em vários emits"""
+    return JsonPreCodificado(json.dumps(dados, separators=(',', ':')), dados)
+
+
+def dumps(obj, *args, **kwargs):
+    """json.dumps que aceita JsonPreCodificado em qualquer ponto da estrutura"""
+    fragmentos = []
+
+    def marcar(valor):
+        if isinstance(valor, JsonPreCodificado):
+            fragmentos.append(valor.texto)
+            return f'{_MARCADOR}{len(fragmentos) - 1}'
+        raise TypeError(f'Object of type {type(valor).__name__} is not JSON serializable')
+
+    texto = json.dumps(obj, *args, default=marcar, **kwargs)
+    for indice, fragmento in enumerate(fragmentos):
+        texto = texto.replace(json.dumps(f'{_MARCADOR}{indice}'), fragmento, 1)
+    registrar_emissao(obj, texto)
+    return texto
+
+
+def loads(texto, *args, **kwargs):
+    return json.loads(texto, *args, **kwargs)
+
+
+def _msgpack_padrao(valor):
+    if isinstance(valor, JsonPreCodificado):
+        return valor.dados
+    raise TypeError(f'Object of type {type(valor).__name__} is not MessagePack serializable')
+
+
+def codificar_msgpack(pkt):
+    """Codifica um pacote Socket.IO em MessagePack ({type, data, nsp, id})"""
+    dados = {'type': _TIPOS_MSGPACK.get(pkt.packet_type, pkt.packet_type), 'data': pkt.data, 'nsp': pkt.namespace}
+    if pkt.id is not None:
+        dados['id'] = pkt.id
+    codificado = msgpack.packb(dados, default=_msgpack_padrao)
+    registrar_emissao(pkt.data, codificado)
+    return codificado
+
+
+class PacoteSocketIO(packet.Packet):
+    """Pacote Socket.IO que aceita MessagePack nas mensagens binárias
+
+    Mensagens de texto seguem o formato padrão (JSON). Os anexos binários do
+    formato padrão não chegam aqui: o servidor os junta ao pacote anterior.
+    """
+
+    def decode(self, encoded_packet):
+        if not isinstance(encoded_packet, bytes):
+            return super().decode(encoded_packet)
+        if msgpack is None:
+            raise ValueError('Pacote MessagePack recebido sem o msgpack instalado')
+        dados = msgpack.unpackb(encoded_packet)
+        self.packet_type = dados['type']
+        self.data = dados.get('data')
+        self.id = dados.get('id')
+        self.namespace = dados.get('nsp')
+        return 0
+
+
+def codificacao_da_conexao(servidor, eio_sid):
+    """'msgpack' ou 'json', pedida pela conexão na URL (guardada no environ dela)"""
+    environ = servidor.environ.get(eio_sid)
+    if environ is None:
+        return 'json'
+    codificacao = environ.get('jogo.codificacao')
+    if codificacao is None:
+        pedida = parse_qs(environ.get('QUERY_STRING', '')).get('codificacao', ['json'])[0]
+        codificacao = environ['jogo.codificacao'] = pedida if pedida in CODIFICACOES else 'json'
+    return codificacao
+
+
+def negociar_por_conexao(servidor):
+    """Faz o socketio.Server enviar MessagePack para as conexões que o pediram
+
+    Requer `serializer=PacoteSocketIO` no servidor, para a recepção.
+    """
+    enviar_json = servidor._send_packet
+
+    def enviar(eio_sid, pkt):
+        if codificacao_da_conexao(servidor, eio_sid) == 'msgpack':
+            servidor.eio.send(eio_sid, codificar_msgpack(pkt))
+        else:
+            enviar_json(eio_sid, pkt)
+
+    # O Flask-SocketIO cria o servidor: o envio é trocado na instância
+    servidor._send_packet = enviar
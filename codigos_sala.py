@@ -0,0 +1,192 @@
+"""
+Alocação dos códigos de sala: únicos por construção, sem sorteio e sem caracteres ambíguos
+
+Os códigos têm 6 caracteres de um alfabeto sem 0/O e 1/I/L (fáceis de
+confundir ao ditar ou digitar). Cada código é um número em base 31; o
+alocador percorre um contador e o embaralha com uma permutação com chave
+(rede de Feistel), então dois valores do contador nunca dão o mesmo código
+e a sequência não é previsível para quem vê alguns códigos. Cada alocação
+custa O(1), sem o laço de sorteio e verificação de antes.
+
+Códigos de salas removidas voltam a ser usados depois de uma quarentena
+(para um link antigo não cair em uma sala nova logo em seguida).
+
+Salas que o processo já encontra ao iniciar (restauradas do snapshot ou do
+diário) vieram de outro contador e de outra chave: `registrar_existentes`
+conta seus códigos como em uso e o contador passa a pulá-los.
+
+Vários processos:
+- modo shard: o shard dono de um código é o seu valor módulo SHARD_TOTAL
+  (veja shards.py), e cada processo só gera valores da sua classe, então
+  processos diferentes nunca geram o mesmo código;
+- armazém compartilhado: cada processo começa o contador em um ponto
+  aleatório (colisões entre processos ficam muito raras) e o armazém recusa
+  um código em uso (`criar` devolve False), caso em que outro é pedido.
+
+Configuração (variáveis de ambiente):
+- CODIGOS_SEMENTE: chave da permutação (padrão: aleatória por processo)
+- CODIGOS_QUARENTENA: segundos até um código liberado poder ser reusado (padrão 600)
+- CODIGOS_MAXIMO_LIVRES: códigos liberados guardados para reuso (padrão 100000)
+"""
+import hashlib
+import os
+import secrets
+import time
+from collections import deque
+
+ALFABETO = '23456789ABCDEFGHJKMNPQRSTUVWXYZ'
+TAMANHO = 6
+ESPACO = len(ALFABETO) ** TAMANHO
+_VALOR_CARACTERE = {caractere: i for i, caractere in enumerate(ALFABETO)}
+
+RODADAS_FEISTEL = 4
+
+
+def codificar(valor):
+    """Código de sala do número `valor` (0 <= valor < ESPACO)"""
+    caracteres = []
+    for _ in range(TAMANHO):
+        valor, resto = divmod(valor, len(ALFABETO))
+        caracteres.append(ALFABETO[resto])
+    return ''.join(reversed(caracteres))
+
+
+def decodificar(codigo):
+    """Número do código, ou None se não for um código deste alfabeto"""
+    if len(codigo) != TAMANHO:
+        return None
+    valor = 0
+    for caractere in codigo.upper():
+        digito = _VALOR_CARACTERE.get(caractere)
+        if digito is None:
+            return None
+        valor = valor * len(ALFABETO) + digito
+    return valor
+
+
+class PermutacaoFeistel:
+    """Bijeção com chave em [0, tamanho): Feistel em potência de 2 com cycle-walking
+
+    O domínio da rede é a menor potência de 4 que cobre `tamanho` (no
+    máximo 4x maior); valores fora do intervalo são permutados de novo até
+    caírem dentro dele, o que em média leva menos de 4 passos.
+    """
+
+    def __init__(self, tamanho, chave):
+        self.tamanho = tamanho
+        self._hash = hashlib.blake2b(key=chave, digest_size=8)  # Copiado a cada rodada (já com a chave)
+        bits = max(2, (tamanho - 1).bit_length())
+        self.meio = (bits + 1) // 2
+        self.mascara = (1 << self.meio) - 1
+
+    def _rodada(self, metade, rodada):
+        h = self._hash.copy()
+        h.update(metade.to_bytes(8, 'big') + bytes([rodada]))
+        return int.from_bytes(h.digest(), 'big') & self.mascara
+
+    def _cifrar(self, valor):
+        esquerda, direita = valor >> self.meio, valor & self.mascara
+        for rodada in range(RODADAS_FEISTEL):
+            esquerda, direita = direita, esquerda ^ self._rodada(direita, rodada)
+        return (esquerda << self.meio) | direita
+
+    def __call__(self, valor):
+        valor = self._cifrar(valor)
+        while valor >= self.tamanho:
+            valor = self._cifrar(valor)
+        return valor
+
+
+class AlocadorCodigos:
+    """Códigos de sala únicos para um processo (ou shard `indice` de `total`)"""
+
+    def __init__(self, indice=0, total=1, semente=None, quarentena=None, maximo_livres=None):
+        if semente is None:
+            semente = os.environ.get('CODIGOS_SEMENTE')
+        chave = hashlib.blake2b(semente.encode('utf-8'), digest_size=32).digest() if semente else secrets.token_bytes(32)
+        if quarentena is None:
+            quarentena = float(os.environ.get('CODIGOS_QUARENTENA', 600))
+        if maximo_livres is None:
+            maximo_livres = int(os.environ.get('CODIGOS_MAXIMO_LIVRES', 100000))
+
+        self.indice = indice
+        self.total = max(1, total)
+        # Valores v < ESPACO com v % total == indice: v = indice + total * k, k em [0, espaco)
+        self.espaco = (ESPACO - 1 - indice) // self.total + 1
+        self.permutar = PermutacaoFeistel(self.espaco, chave)
+        self.quarentena = quarentena
+        self.maximo_livres = maximo_livres
+
+        self._proximo = secrets.randbelow(self.espaco)
+        self.gerados = 0
+        self.livres = deque()  # (liberado em, código), em ordem de liberação
+        self._existentes = set()  # Códigos de salas restauradas: o contador nunca os gera
+        self.em_uso = 0
+        self.reutilizados = 0
+        self.colisoes = 0
+
+    def reiniciar_apos_fork(self):
+        # Com preload_app todos os workers herdam o mesmo ponto de partida: cada um sorteia o seu
+        self._proximo = secrets.randbelow(self.espaco)
+
+    def registrar_existentes(self, codigos):
+        """Salas restauradas ao iniciar o processo: em uso, e fora do contador mesmo depois de liberadas"""
+        for codigo in codigos:
+            if codigo not in self._existentes:
+                self._existentes.add(codigo)
+                self.em_uso += 1
+
+    def pertence(self, codigo):
+        """Indica se o código é deste alfabeto e da classe deste alocador"""
+        valor = decodificar(codigo)
+        return valor is not None and valor % self.total == self.indice
+
+    def alocar(self, agora=None):
+        """Próximo código livre: um liberado que já cumpriu a quarentena ou um inédito"""
+        agora = time.monotonic() if agora is None else agora
+        if self.livres and self.livres[0][0] + self.quarentena <= agora:
+            codigo = self.livres.popleft()[1]
+            self.reutilizados += 1
+        else:
+            codigo = self._gerar()
+            if codigo is None:
+                if not self.livres:
+                    raise RuntimeError('Todos os códigos de sala deste processo estão em uso')
+                # Contador esgotado: reusar antes do fim da quarentena é melhor que não criar a sala
+                codigo = self.livres.popleft()[1]
+                self.reutilizados += 1
+        self.em_uso += 1
+        return codigo
+
+    def _gerar(self):
+        """Próximo código inédito do contador, ou None se ele se esgotou"""
+        while self.gerados < self.espaco:
+            k = self.permutar(self._proximo)
+            self._proximo = (self._proximo + 1) % self.espaco
+            self.gerados += 1
+            codigo = codificar(self.indice + self.total * k)
+            if codigo not in self._existentes:
+                return codigo
+        return None
+
+    def rejeitar(self, codigo):
+        """O armazém recusou o código (em uso por outro processo): não conta como em uso"""
+        self.em_uso = max(0, self.em_uso - 1)
+        self.colisoes += 1
+
+    def liberar(self, codigo, agora=None):
+        """A sala foi removida: o código volta a ficar disponível após a quarentena"""
+        self.em_uso = max(0, self.em_uso - 1)
+        if len(self.livres) < self.maximo_livres and self.pertence(codigo):
+            self.livres.append((time.monotonic() if agora is None else agora, codigo))
+
+    def estatisticas(self):
+        return {
+            'espaco': self.espaco,
+            'em_uso': self.em_uso,
+            'ocupacao': round(self.em_uso / self.espaco, 9),
+            'gerados': self.gerados,
+            'reutilizados': self.reutilizados,
+            'liberados_aguardando': len(self.livres),
+            'colisoes': self.colisoes
+        }
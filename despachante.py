@@ -0,0 +1,218 @@
+"""
+Despachante do modo shard: um processo na frente de N processos do jogo
+
+Cada processo do jogo (gunicorn com 1 worker) é dono das salas cujo código
+cai no seu índice (veja shards.py) e guarda as partidas em memória.
+O despachante lê só o cabeçalho de cada conexão, descobre a sala pela URL
+(`/sala/<codigo>`, ou os parâmetros `sala`/`afinidade` que o cliente Socket.IO
+envia) e repassa os bytes para o processo dono, sem interpretar o resto.
+
+Uso:
+    python despachante.py --workers 4                 # sobe 4 processos + despachante
+    python despachante.py --backends 127.0.0.1:5101,127.0.0.1:5102
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import itertools
+import logging
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import gevent
+from gevent import socket
+from gevent.server import StreamServer
+
+from shards import shard_da_chave
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('despachante')
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+TAMANHO_MAXIMO_CABECALHO = 64 * 1024
+TAMANHO_BLOCO = 64 * 1024
+
+_ROTA_SALA = re.compile(r'^/sala/([^/]+)')
+
+
+def chave_roteamento(alvo):
+    """Extrai da URL a chave que define o shard (None = qualquer processo serve)"""
+    partes = urlsplit(alvo)
+    consulta = parse_qs(partes.query)
+    for parametro in ('sala', 'afinidade'):
+        valor = consulta.get(parametro, [''])[0].strip()
+        if valor:
+            return valor
+    rota = _ROTA_SALA.match(partes.path)
+    return rota.group(1) if rota else None
+
+
+def _eh_upgrade(linhas):
+    return any(linha.lower().startswith(b'upgrade:') for linha in linhas[1:])
+
+
+def _forcar_fechamento(linhas):
+    """Pede Connection: close, para que cada requisição HTTP seja roteada de novo
+
+    Sem isso o navegador reaproveitaria a conexão (keep-alive) para pedidos de
+    outra sala, que chegariam ao processo errado.
+    """
+    linhas = [
+        linha for linha in linhas
+        if not linha.lower().startswith((b'connection:', b'keep-alive:'))
+    ]
+    linhas.append(b'Connection: close')
+    return linhas
+
+
+def _ler_cabecalho(conexao):
+    """Lê até o fim do cabeçalho HTTP; retorna (linhas, bytes excedentes) ou None"""
+    dados = b''
+    while b'\r\n\r\n' not in dados:
+        bloco = conexao.recv(TAMANHO_BLOCO)
+        if not bloco or len(dados) > TAMANHO_MAXIMO_CABECALHO:
+            return None
+        dados += bloco
+    cabecalho, resto = dados.split(b'\r\n\r\n', 1)
+    return cabecalho.split(b'\r\n'), resto
+
+
+def _encaminhar(origem, destino):
+    try:
+        while True:
+            dados = origem.recv(TAMANHO_BLOCO)
+            if not dados:
+                break
+            destino.sendall(dados)
+    except OSError:
+        pass
+    finally:
+        try:
+            destino.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
+class Despachante:
+    """Repassa cada conexão ao processo dono da sala indicada na URL"""
+
+    def __init__(self, backends):
+        self.backends = backends  # índice da lista = índice do shard
+        self.conexoes_por_shard = [0] * len(backends)
+        self._rodizio = itertools.cycle(range(len(backends)))
+
+    def escolher_shard(self, alvo):
+        chave = chave_roteamento(alvo)
+        if chave is None:
+            # Páginas e health check não têm estado: distribuir em rodízio
+            return next(self._rodizio)
+        return shard_da_chave(chave, len(self.backends))
+
+    def atender(self, cliente, endereco):
+        backend = None
+        try:
+            lido = _ler_cabecalho(cliente)
+            if lido is None:
+                return
+            linhas, resto = lido
+
+            requisicao = linhas[0].decode('latin-1').split(' ')
+            shard = self.escolher_shard(requisicao[1] if len(requisicao) > 1 else '/')
+            if not _eh_upgrade(linhas):
+                linhas = _forcar_fechamento(linhas)
+
+            backend = socket.create_connection(self.backends[shard])
+            backend.sendall(b'\r\n'.join(linhas) + b'\r\n\r\n' + resto)
+            self.conexoes_por_shard[shard] += 1
+
+            retorno = gevent.spawn(_encaminhar, backend, cliente)
+            _encaminhar(cliente, backend)
+            retorno.join()
+        except OSError as e:
+            logger.warning('Falha ao encaminhar conexão de %s: %s', endereco[0], e)
+        finally:
+            if backend is not None:
+                backend.close()
+            cliente.close()
+
+
+def iniciar_workers(total, porta_base, host='127.0.0.1'):
+    """Sobe um gunicorn (1 worker) por shard, nas portas porta_base..porta_base+total-1"""
+    processos = []
+    for indice in range(total):
+        ambiente = dict(
+            os.environ,
+            SHARD_INDICE=str(indice),
+            SHARD_TOTAL=str(total),
+            WEB_CONCURRENCY='1'
+        )
+        processos.append(subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                '--bind', f'{host}:{porta_base + indice}',
+                # Reciclar o worker apagaria as salas em memória do shard
+                '--max-requests', '0',
+                'app:app'
+            ],
+            env=ambiente,
+            cwd=DIRETORIO
+        ))
+    return processos
+
+
+def aguardar_backends(backends, timeout=30.0):
+    """Espera todos os processos do jogo aceitarem conexões"""
+    limite = time.monotonic() + timeout
+    for endereco in backends:
+        while True:
+            try:
+                socket.create_connection(endereco, timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > limite:
+                    raise RuntimeError(f'Processo do jogo em {endereco[0]}:{endereco[1]} não respondeu')
+                gevent.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SHARD_TOTAL', os.cpu_count() or 1)))
+    parser.add_argument('--porta', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--porta-base', type=int, default=5100, help='primeira porta interna dos processos do jogo')
+    parser.add_argument('--backends', help='processos já em execução (host:porta,...), na ordem dos shards')
+    args = parser.parse_args()
+
+    processos = []
+    if args.backends:
+        backends = [(host, int(porta)) for host, porta in (item.rsplit(':', 1) for item in args.backends.split(','))]
+    else:
+        processos = iniciar_workers(args.workers, args.porta_base)
+        backends = [('127.0.0.1', args.porta_base + indice) for indice in range(args.workers)]
+
+    servidor = StreamServer(('0.0.0.0', args.porta), Despachante(backends).atender, backlog=2048)
+
+    def parar():
+        servidor.stop(timeout=5)
+
+    gevent.signal_handler(signal.SIGTERM, parar)
+    gevent.signal_handler(signal.SIGINT, parar)
+
+    try:
+        aguardar_backends(backends)
+        logger.info('Despachante na porta %d com %d shards', args.porta, len(backends))
+        servidor.serve_forever()
+    finally:
+        for processo in processos:
+            processo.terminate()
+        for processo in processos:
+            processo.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,573 @@
+"""
+Diário das salas: cada ação que altera uma partida é anotada em um arquivo só de acréscimos
+
+O snapshot (snapshot_salas.py) é gravado a cada SNAPSHOT_INTERVALO e ao
+encerrar o worker; se o processo morrer de repente (OOM, SIGKILL, queda da
+máquina), as jogadas desde o último snapshot se perdem. O diário anota as
+ações dos handlers do app.py assim que são aplicadas: criar, entrar,
+conexão/desconexão, palavras, início, tentativa, reinício, saída e
+encerramento da sala. Cada evento traz a vez resultante (campo `vez`): as
+trocas de vez ficam registradas junto da ação que as causou, e a reprodução
+confere cada uma.
+
+Gravação: os handlers só enfileiram o evento; uma thread do sistema
+operacional (como a dos logs, fora do loop do gevent) escreve de uma vez
+tudo o que estiver na fila e faz um único fsync por grupo. Enquanto um
+fsync está em curso os eventos seguintes se acumulam e vão juntos no
+próximo, então sob carga cada fsync cobre muitos eventos, sem janela fixa.
+Os eventos ainda não gravados se perdem se o processo morrer.
+
+Formato: uma linha JSON por grupo, com a lista dos eventos (codificar a
+lista de uma vez custa metade de codificar evento por evento). Cada evento
+tem a sala, o número do evento na sala (`n`, contado pela partida e gravado
+também nos snapshots), o tipo, o instante, a vez e os campos da ação. Ex.:
+    [{"sala":"NB2QKJ","n":7,"tipo":"tentativa","em":1760781370.672,"vez":1,"jogador":"Ana","palavra":"café"}]
+
+Recuperação: ao iniciar o worker (depois da restauração do snapshot, se
+houver), os eventos de cada sala são reaplicados pela PartidaMultiplayer
+sobre a base mais recente: a sala do snapshot ou o último `criar`/`estado`
+do diário. Eventos com `n` já contido na base são pulados; eventos
+anteriores ao último `encerrar` da sala são ignorados.
+
+Compactação: quando o arquivo passa de DIARIO_COMPACTAR_MB e dobrou de
+tamanho desde a última compactação, ele é reescrito com um evento `estado`
+(a partida inteira) por sala carregada, seguido dos eventos anotados durante
+a reescrita; as salas encerradas somem. As salas restauradas do snapshot e
+ainda não usadas continuam com o snapshot como base. O arquivo substituído
+fica em <caminho>.anterior.
+
+Conteúdo: os eventos `palavras` e as bases (`criar`/`estado`) trazem as
+palavras secretas dos jogadores em texto puro, como o snapshot. Os arquivos
+são criados só com permissão para o dono (0600); trate-os como dados dos
+jogadores (nada de anexar a chamados ou copiar para fora do servidor).
+
+Reprodução para depuração (cada evento com o resultado, a vez e as dicas depois dele):
+    python diario_salas.py NB2QKJ --arquivo /var/data/jogo-salas.diario
+    python diario_salas.py NB2QKJ --ate 12 --estado
+
+Configuração (variáveis de ambiente):
+- DIARIO_CAMINHO: arquivo do diário (vazio = desligado, o padrão; o render.yaml
+  usa /var/data/jogo-salas.diario, no disco persistente; em /tmp ele seria apagado
+  a cada deploy junto com o snapshot). No modo shard cada shard grava o seu (sufixo -<índice>).
+- DIARIO_FSYNC: 1 faz fsync a cada grupo; 0 só escreve, o que sobrevive à
+  morte do processo mas não à queda da máquina (padrão 1)
+- DIARIO_COMPACTAR_MB: tamanho mínimo do arquivo para compactar (padrão 16)
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+
+try:
+    from gevent.monkey import get_original
+except ImportError:  # Sem gevent: thread e fila da biblioteca padrão
+    import _thread
+    import queue
+    _iniciar_thread = _thread.start_new_thread
+    _Fila = queue.SimpleQueue
+else:
+    # Thread e fila reais mesmo depois do monkey patch (veja log_assincrono.py)
+    _iniciar_thread = get_original('_thread', 'start_new_thread')
+    _Fila = get_original('queue', 'SimpleQueue')
+
+from jogo import Configuracao, Jogador, PartidaMultiplayer
+from shards import SHARD_INDICE, SHARD_TOTAL
+
+logger = logging.getLogger(__name__)
+
+SID_REPRODUCAO = 'diario'  # Conexão fictícia dos jogadores conectados durante a reprodução
+SALAS_POR_PAUSA = 1000
+INTERVALO_VERIFICACAO = 60  # Segundos entre as verificações do tamanho para compactar
+
+FSYNC_PADRAO = os.environ.get('DIARIO_FSYNC', '1') != '0'
+COMPACTAR_BYTES_PADRAO = int(float(os.environ.get('DIARIO_COMPACTAR_MB', 16)) * 1024 * 1024)
+
+# Comandos para a thread de escrita, na mesma fila (e na mesma ordem) dos eventos
+_MARCA = 'marca'
+_COMPACTAR = 'compactar'
+_PARAR = 'parar'
+
+BASES = ('criar', 'estado')
+
+
+def caminho_padrao():
+    caminho = os.environ.get('DIARIO_CAMINHO', '')
+    if caminho and SHARD_TOTAL > 1:
+        raiz, extensao = os.path.splitext(caminho)
+        caminho = f'{raiz}-{SHARD_INDICE}{extensao}'
+    return caminho
+
+
+def _abrir(caminho, modo='ab'):
+    """Abre um arquivo do diário, criado só com permissão para o dono (ele tem as palavras secretas)"""
+    return open(caminho, modo, opener=lambda nome, flags: os.open(nome, flags, 0o600))
+
+
+_codificador = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def _codificar(eventos):
+    """Linha do arquivo com uma lista de eventos"""
+    return _codificador.encode(eventos).encode('utf-8') + b'\n'
+
+
+def ler_eventos(caminho, sala=None):
+    """Eventos do arquivo em ordem (só os da `sala`, se dada); retorna (eventos, bytes válidos, fim incompleto)
+
+    A leitura para na primeira linha ilegível: só o último grupo, se a morte
+    do processo interrompeu a escrita, pode estar incompleto.
+    """
+    eventos = []
+    validos = 0
+    with open(caminho, 'rb') as arquivo:
+        for linha in arquivo:
+            try:
+                if not linha.endswith(b'\n'):
+                    raise ValueError('linha incompleta')
+                grupo = json.loads(linha)
+            except ValueError:
+                return eventos, validos, True
+            validos += len(linha)
+            if sala is None:
+                eventos.extend(grupo)
+            else:
+                eventos.extend(evento for evento in grupo if evento['sala'] == sala)
+    return eventos, validos, False
+
+
+def _preparar_para_reproducao(partida):
+    # Cada jogador conectado fica com a conexão fictícia, para desconectar_jogador funcionar
+    for jogador in partida.jogadores:
+        jogador.sids = (SID_REPRODUCAO,) if jogador.conectado else ()
+
+
+def aplicar_evento(partida, evento):
+    """Aplica um evento à partida (None antes do `criar`); retorna (partida, resultado)
+
+    Levanta ValueError se o evento não se aplica à partida.
+    """
+    tipo = evento['tipo']
+    nome = evento.get('jogador')
+    resultado = ''
+
+    if tipo == 'criar':
+        partida = PartidaMultiplayer(Configuracao(evento['num_palavras'], evento['max_jogadores']))
+        partida.codigo_sala = evento['sala']
+        partida.criador = nome
+        partida.adicionar_jogador(Jogador(nome, partida.config.num_palavras))
+        partida.conectar_jogador(nome, SID_REPRODUCAO)
+    elif tipo == 'estado':
+        partida = PartidaMultiplayer.de_dict(evento['partida'])
+        _preparar_para_reproducao(partida)
+    elif tipo == 'encerrar':
+        return None, evento.get('motivo', '')
+    elif tipo == 'entrar':
+        partida.adicionar_jogador(Jogador(nome, partida.config.num_palavras))
+        partida.conectar_jogador(nome, SID_REPRODUCAO)
+    elif tipo == 'conexao':
+        if evento['conectado']:
+            partida.conectar_jogador(nome, SID_REPRODUCAO)
+        elif partida.desconectar_jogador(nome, SID_REPRODUCAO):
+            partida.obter_jogador(nome).desconectado_em = evento['em']
+    elif tipo == 'palavras':
+        jogador = partida.obter_jogador(nome)
+        if jogador is None:
+            raise ValueError(f'jogador {nome} não está na sala')
+        partida.definir_palavras(jogador, evento['palavras'])
+    elif tipo == 'iniciar':
+        partida.iniciar_jogo()
+    elif tipo == 'tentativa':
+        _, resultado = partida.tentar_adivinhar(nome, evento['palavra'])
+    elif tipo == 'reiniciar':
+        partida.reiniciar_jogo()
+    elif tipo == 'sair':
+        # A limpeza tira de uma vez todos os jogadores que não voltaram a tempo
+        for nome in evento.get('jogadores', [nome]):
+            if not partida.remover_jogador(nome):
+                raise ValueError(f'jogador {nome} não está na sala')
+    else:
+        raise ValueError(f'tipo de evento desconhecido: {tipo}')
+    return partida, resultado
+
+
+def reproduzir(eventos, partida=None, ao_aplicar=None):
+    """Reaplica os eventos de uma sala, em ordem; retorna (partida, divergências)
+
+    `partida` é a base (ex.: a sala do snapshot): eventos já contidos nela
+    (n <= partida.eventos_diario) são pulados. Cada divergência é (n,
+    descrição): um evento que não pôde ser aplicado ou uma vez diferente da
+    registrada (a registrada prevalece). `ao_aplicar(evento, partida,
+    resultado)` é chamado após cada evento aplicado.
+    """
+    divergencias = []
+    for evento in eventos:
+        tipo = evento['tipo']
+        n = evento.get('n')
+        if partida is not None and n is not None and n <= partida.eventos_diario:
+            continue
+        if partida is None and tipo not in BASES and tipo != 'encerrar':
+            divergencias.append((n, f'{tipo} sem a sala criada'))
+            continue
+
+        try:
+            partida, resultado = aplicar_evento(partida, evento)
+        except (ValueError, KeyError) as e:
+            divergencias.append((n, f'{tipo} não aplicado: {str(e)}'))
+            resultado = None
+        if partida is None:
+            if ao_aplicar:
+                ao_aplicar(evento, partida, resultado)
+            continue
+
+        if 'vez' in evento and partida.turno_atual != evento['vez']:
+            divergencias.append((n, f'vez {partida.turno_atual} em vez de {evento["vez"]}'))
+            partida.turno_atual = evento['vez']
+            partida.marcar_alteracao()
+        partida.eventos_diario = max(partida.eventos_diario, n)
+        partida.ultima_atividade = evento['em']
+        if ao_aplicar:
+            ao_aplicar(evento, partida, resultado)
+    return partida, divergencias
+
+
+class DiarioSalas:
+    """Anota as ações das salas de um ArmazemSalasMemoria e as reaplica ao iniciar o processo"""
+
+    def __init__(self, armazem, caminho, fsync=FSYNC_PADRAO, compactar_bytes=COMPACTAR_BYTES_PADRAO):
+        self.armazem = armazem
+        self.caminho = caminho
+        self.anterior = f'{caminho}.anterior'
+        self.fsync = fsync
+        self.compactar_bytes = compactar_bytes
+        self._pid = None
+        self._fila = None
+        self._arquivo = None  # Usado só pela thread de escrita
+        self._marca = 0  # Posição do arquivo onde começam os eventos posteriores às bases da compactação
+        self._compactando = False
+        self.tamanho = 0
+        self.tamanho_compactado = 0
+        self.enfileirados = 0
+        self.gravados = 0
+        self.grupos = 0
+        self.falhas = 0
+        self.compactacoes = 0
+        self.ultima_compactacao = {}
+        self.recuperacao = {}
+
+    def iniciar(self, socketio):
+        """Reaplica o diário e inicia a escrita, uma vez por processo (chamar já no worker, depois do snapshot)
+
+        Retorna True só na chamada que reaplicou (a primeira do processo).
+        """
+        if self._pid == os.getpid():
+            return False
+        self._pid = os.getpid()
+        self.recuperar()
+        self._arquivo = _abrir(self.caminho)
+        self.tamanho = self.tamanho_compactado = self._arquivo.tell()
+        self._fila = _Fila()
+        _iniciar_thread(self._escrever, ())  # Sem join na saída do processo (como uma thread daemon)
+        socketio.start_background_task(self._executar, socketio)
+        return True
+
+    def registrar(self, codigo, partida, tipo, **campos):
+        """Anota uma ação já aplicada à partida (None se a sala já foi removida)"""
+        if self._fila is None:
+            return
+        if partida is None:
+            evento = {'sala': codigo, 'tipo': tipo, 'em': round(time.time(), 3)}
+        else:
+            evento = {'sala': codigo, 'n': partida.numerar_evento_diario(), 'tipo': tipo,
+                      'em': round(time.time(), 3), 'vez': partida.turno_atual}
+        evento.update(campos)
+        self._fila.put(evento)
+        self.enfileirados += 1
+
+    def _escrever(self):
+        fila = self._fila
+        while True:
+            itens = [fila.get()]
+            for _ in range(fila.qsize()):
+                itens.append(fila.get())
+            grupo = []
+            for item in itens:
+                if isinstance(item, dict):
+                    grupo.append(item)
+                    continue
+                self._gravar(grupo)
+                grupo = []
+                self._comando(item)
+            self._gravar(grupo)
+
+    def _gravar(self, grupo):
+        """Uma linha, uma escrita e um fsync para todos os eventos do grupo"""
+        if not grupo:
+            return
+        try:
+            dados = _codificar(grupo)
+            self._arquivo.write(dados)
+            self._arquivo.flush()
+            if self.fsync:
+                os.fsync(self._arquivo.fileno())
+        except Exception as e:
+            self.falhas += 1
+            logger.error('Erro ao gravar %d eventos no diário: %s', len(grupo), e)
+            return
+        self.tamanho += len(dados)
+        self.gravados += len(grupo)
+        self.grupos += 1
+
+    def _comando(self, item):
+        comando = item[0]
+        if comando == _MARCA:
+            self._marca = self.tamanho
+        elif comando == _COMPACTAR:
+            try:
+                self._trocar_arquivo(item[1])
+            except Exception as e:
+                self.falhas += 1
+                logger.error('Erro ao compactar o diário: %s', e)
+                if os.path.exists(item[1]):
+                    os.remove(item[1])
+            finally:
+                self._compactando = False
+        elif comando == _PARAR:
+            item[1].put(True)
+
+    def _trocar_arquivo(self, temporario):
+        """Termina a compactação: os eventos desde a marca vão para o fim do arquivo novo, que substitui o atual
+
+        O arquivo atual só é fechado depois da troca: se algo falhar antes, a
+        escrita continua nele.
+        """
+        novo = _abrir(temporario)
+        try:
+            with open(self.caminho, 'rb') as atual:
+                atual.seek(self._marca)
+                shutil.copyfileobj(atual, novo)
+            novo.flush()
+            if self.fsync:
+                os.fsync(novo.fileno())
+            tamanho = novo.tell()
+            # Entre os dois renames só existe o .anterior, que a recuperação também lê
+            os.replace(self.caminho, self.anterior)
+            os.replace(temporario, self.caminho)
+        except BaseException:
+            novo.close()
+            raise
+        # O arquivo aberto acompanha o rename: é o novo diário
+        antigo, self._arquivo = self._arquivo, novo
+        antigo.close()
+        self.tamanho = self.tamanho_compactado = tamanho
+        self.compactacoes += 1
+        self.ultima_compactacao['bytes'] = tamanho
+
+    def _executar(self, socketio):
+        while True:
+            socketio.sleep(INTERVALO_VERIFICACAO)
+            if self._compactando or self.tamanho < max(self.compactar_bytes, 2 * self.tamanho_compactado):
+                continue
+            try:
+                self.compactar(ceder=lambda: socketio.sleep(0))
+            except Exception as e:
+                self._compactando = False
+                self.falhas += 1
+                logger.error('Erro ao compactar o diário: %s', e)
+
+    def compactar(self, ceder=None):
+        """Reescreve o diário com uma base (`estado`) por sala carregada
+
+        As bases vão para um arquivo temporário; a thread de escrita acrescenta
+        a ele os eventos anotados desde o início da compactação e o coloca no
+        lugar do atual. `ceder()` é chamado a cada SALAS_POR_PAUSA salas.
+        """
+        inicio = time.perf_counter()
+        self._compactando = True
+        self._fila.put((_MARCA,))  # Eventos depois daqui podem não estar nas bases: são copiados
+        temporario = f'{self.caminho}.{os.getpid()}.tmp'
+        salas = 0
+        with _abrir(temporario, 'wb') as arquivo:
+            for i, (codigo, sala) in enumerate(self.armazem.itens(), 1):
+                # Salas restauradas e ainda adiadas não mudaram: a base delas continua sendo o snapshot
+                if isinstance(sala, PartidaMultiplayer):
+                    arquivo.write(_codificar([{
+                        'sala': codigo, 'n': sala.eventos_diario, 'tipo': 'estado',
+                        'em': round(time.time(), 3), 'partida': sala.para_dict()
+                    }]))
+                    salas += 1
+                if ceder is not None and i % SALAS_POR_PAUSA == 0:
+                    ceder()
+        self._fila.put((_COMPACTAR, temporario))
+        self.ultima_compactacao = {
+            'salas': salas,
+            'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1),
+            'em': time.time()
+        }
+        return self.ultima_compactacao
+
+    def recuperar(self):
+        """Reaplica o diário às salas do armazém; retorna quantas salas foram recuperadas"""
+        inicio = time.perf_counter()
+        caminho = self.caminho if os.path.exists(self.caminho) else self.anterior
+        try:
+            eventos, validos, incompleto = ler_eventos(caminho)
+        except FileNotFoundError:
+            return 0
+        if incompleto:
+            # Grupo interrompido: cortar a linha pela metade para os próximos eventos começarem em uma nova
+            logger.warning('Diário %s: fim incompleto descartado a partir do byte %d', caminho, validos)
+            os.truncate(caminho, validos)
+        if caminho == self.anterior:
+            os.replace(self.anterior, self.caminho)  # A compactação foi interrompida entre os dois renames
+
+        por_sala = {}
+        encerradas = set()
+        for evento in eventos:
+            if evento['tipo'] == 'encerrar':
+                por_sala[evento['sala']] = []
+                encerradas.add(evento['sala'])
+            else:
+                por_sala.setdefault(evento['sala'], []).append(evento)
+
+        agora = time.time()
+        recuperadas = removidas = divergencias = 0
+        for codigo, eventos_sala in por_sala.items():
+            # A sala do snapshot de uma sala encerrada é anterior ao encerramento
+            base = None if codigo in encerradas else self.armazem.obter(codigo)
+            if base is not None:
+                for jogador in base.jogadores:  # Voltaram desconectados do snapshot; durante a reprodução, conectados
+                    jogador.desconectado_em = None
+                _preparar_para_reproducao(base)
+            partida, divergencias_sala = reproduzir(eventos_sala, base)
+            divergencias += len(divergencias_sala)
+            for n, descricao in divergencias_sala:
+                logger.warning('Diário: sala %s evento %s: %s', codigo, n, descricao)
+
+            if partida is None or not partida.jogadores:
+                if codigo in self.armazem:
+                    self.armazem.remover(codigo)
+                    removidas += 1
+                continue
+            # As conexões eram do processo anterior: todos voltam desconectados (como no snapshot)
+            for jogador in partida.jogadores:
+                jogador.sids = ()
+                if jogador.desconectado_em is None:
+                    jogador.desconectado_em = agora
+            if partida is not base:
+                self.armazem.remover(codigo)
+                self.armazem.criar(codigo, partida)
+            recuperadas += 1
+
+        self.recuperacao = {
+            'eventos': len(eventos),
+            'salas': recuperadas,
+            'removidas': removidas,
+            'divergencias': divergencias,
+            'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1)
+        }
+        logger.info('Diário %s: %d salas recuperadas de %d eventos (%d divergências) em %s ms',
+                    self.caminho, recuperadas, len(eventos), divergencias, self.recuperacao['duracao_ms'])
+        return recuperadas
+
+    def parar(self, timeout=5.0):
+        """Espera os eventos da fila serem gravados (na saída do processo)"""
+        if self._fila is None or self._pid != os.getpid():
+            return
+        confirmacoes = _Fila()
+        self._fila.put((_PARAR, confirmacoes))
+        try:
+            confirmacoes.get(timeout=timeout)
+        except Exception:  # queue.Empty: a thread não terminou a tempo
+            pass
+
+    def estatisticas(self):
+        return {
+            'caminho': self.caminho,
+            'fsync': self.fsync,
+            'bytes': self.tamanho,
+            'enfileirados': self.enfileirados,
+            'gravados': self.gravados,
+            'pendentes': self._fila.qsize() if self._fila is not None else 0,
+            'grupos': self.grupos,
+            'eventos_por_grupo': round(self.gravados / self.grupos, 1) if self.grupos else 0,
+            'falhas': self.falhas,
+            'compactacoes': self.compactacoes,
+            'ultima_compactacao': self.ultima_compactacao,
+            'recuperacao': self.recuperacao
+        }
+
+
+def criar_diario(armazem, caminho=None):
+    """DiarioSalas para o armazém, ou None se desligado ou se o armazém já é compartilhado"""
+    caminho = caminho_padrao() if caminho is None else caminho
+    if not caminho or armazem.compartilhado:
+        return None
+    return DiarioSalas(armazem, caminho)
+
+
+def _resumo(partida):
+    """Vez e progresso de cada jogador em uma linha"""
+    vez = partida.get_jogador_da_vez()
+    jogadores = ' | '.join(
+        f'{j.nome}{"" if j.conectado else " (desconectado)"}: '
+        f'{sum(j.alvo_jogador.palavras_descobertas)}/{len(j.alvo_jogador.palavras)} '
+        f'dica {j.get_dica_palavra_atual() or "-"}' if j.alvo_jogador else j.nome
+        for j in partida.jogadores
+    )
+    fim = f' | vencedor {partida.vencedor.nome}' if partida.vencedor else ''
+    return f'vez {vez.nome if vez else "-"} | {jogadores}{fim}'
+
+
+def _mostrar(evento, partida, resultado):
+    instante = time.strftime('%H:%M:%S', time.localtime(evento['em']))
+    campos = ' '.join(
+        f'{chave}={valor}' for chave, valor in evento.items()
+        if chave not in ('sala', 'n', 'tipo', 'em', 'vez', 'partida')
+    )
+    print(f'#{evento.get("n", "-"):<4} {instante} {evento["tipo"]:<10} {campos}')
+    if resultado:
+        print(f'      -> {resultado}')
+    print(f'      {_resumo(partida) if partida is not None else "sala encerrada"}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reproduz a história de uma sala a partir do diário')
+    parser.add_argument('sala')
+    parser.add_argument('--arquivo', nargs='+',
+                        help='arquivos do diário, em ordem (padrão: <DIARIO_CAMINHO>.anterior e <DIARIO_CAMINHO>)')
+    parser.add_argument('--ate', type=int, help='para depois do evento com esse número')
+    parser.add_argument('--estado', action='store_true', help='mostra o estado final completo em JSON')
+    args = parser.parse_args()
+
+    arquivos = args.arquivo
+    if not arquivos:
+        caminho = caminho_padrao()
+        if not caminho:
+            parser.error('informe --arquivo ou DIARIO_CAMINHO')
+        arquivos = [c for c in (f'{caminho}.anterior', caminho) if os.path.exists(c)]
+
+    sala = args.sala.upper()
+    eventos = []
+    for arquivo in arquivos:
+        eventos_arquivo, _, incompleto = ler_eventos(arquivo, sala)
+        eventos.extend(eventos_arquivo)
+        if incompleto:
+            print(f'{arquivo}: fim incompleto ignorado', file=sys.stderr)
+    if args.ate is not None:
+        fim = next((i for i, evento in enumerate(eventos) if evento.get('n') == args.ate), len(eventos) - 1)
+        eventos = eventos[:fim + 1]
+    print(f'Sala {sala}: {len(eventos)} eventos em {", ".join(arquivos)}')
+
+    partida, divergencias = reproduzir(eventos, ao_aplicar=_mostrar)
+    for n, descricao in divergencias:
+        print(f'divergência no evento {n}: {descricao}')
+    if args.estado and partida is not None:
+        partida.publicar_estado()
+        print(json.dumps(partida.get_estado_jogo(), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
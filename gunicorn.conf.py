@@ -3,7 +3,13 @@ import multiprocessing
 
 # Configurações otimizadas para Render
 bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
-workers = 1
+# Mais de um worker exige um armazém de salas compartilhado (SALAS_ARMAZEM)
+# e uma fila de mensagens do Socket.IO (SOCKETIO_MESSAGE_QUEUE); veja armazem_salas.py
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+# O worker "gevent" responde 500 ao upgrade para WebSocket e os clientes ficam no
+# polling. O armazém compartilhado usa só WebSocket: nesse caso rode com
+# GUNICORN_CMD_ARGS="--worker-class geventwebsocket.gunicorn.workers.GeventWebSocketWorker",
+# sabendo que esse worker não passa pela contagem de max_requests (não é reciclado)
 worker_class = "gevent"
 worker_connections = 1000
 timeout = 120
@@ -12,6 +18,18 @@ max_requests = 1000
 max_requests_jitter = 100
 preload_app = True
 
+# Snapshot das salas em memória (ligado com SNAPSHOT_CAMINHO): gravado ao
+# encerrar o worker (reciclagem por max_requests, reinício do gunicorn, deploy)
+# e restaurado pelo worker seguinte; deploys só ficam cobertos com o arquivo em
+# disco persistente (veja snapshot_salas.py)
+# Diário das ações das salas (ligado com DIARIO_CAMINHO): recupera as jogadas
+# posteriores ao último snapshot se o worker morrer sem encerrar; veja diario_salas.py
+
+
+def worker_exit(server, worker):
+    import snapshot_salas
+    snapshot_salas.salvar_no_encerramento()
+
 # Configurações de memória
 worker_tmp_dir = "/dev/shm"
 tmp_upload_dir = None
@@ -1,31 +1,53 @@
 """
-Health check endpoint para monitoramento do Render
+Health check endpoint para monitoramento do Render (e /metrics para o Prometheus)
 """
-from flask import jsonify
+from flask import Response, jsonify
+import logging
 import psutil
 import os
+import time
+from normalizador import estatisticas_cache
+import metricas
 
-def get_health_status():
-    """Retorna o status de saúde da aplicação"""
+logger = logging.getLogger(__name__)
+
+# Intervalo entre amostras do /health/detailed (segundos)
+INTERVALO_AMOSTRA = float(os.environ.get('HEALTH_INTERVALO_AMOSTRA', 5))
+
+def get_health_status(estatisticas=None):
+    """Retorna o status de saúde da aplicação (com as estatísticas extras registradas)
+    
+    Não bloqueia: o uso de CPU é medido desde a chamada anterior.
+    """
     try:
         # Verificar uso de memória
         memory = psutil.virtual_memory()
         memory_percent = memory.percent
         
-        # Verificar uso de CPU
-        cpu_percent = psutil.cpu_percent(interval=1)
+        # Verificar uso de CPU (desde a amostra anterior, sem esperar)
+        cpu_percent = psutil.cpu_percent(interval=None)
         
         # Verificar se o processo está rodando há muito tempo
         process = psutil.Process(os.getpid())
         uptime = process.create_time()
         
+        try:
+            open_sockets = len(process.connections(kind='inet'))
+        except psutil.Error:
+            open_sockets = None
+        
         status = {
             "status": "healthy",
             "memory_usage": f"{memory_percent:.1f}%",
             "cpu_usage": f"{cpu_percent:.1f}%",
+            "rss_mb": round(process.memory_info().rss / (1024 * 1024), 1),
+            "open_sockets": open_sockets,
             "uptime": uptime,
-            "pid": os.getpid()
+            "pid": os.getpid(),
+            "cache_normalizador": estatisticas_cache()
         }
+        for nome, obter in (estatisticas or {}).items():
+            status[nome] = obter()
         
         # Marcar como unhealthy se uso de memória > 90%
         if memory_percent > 90:
@@ -40,8 +62,50 @@ def get_health_status():
             "error": str(e)
         }
 
-def register_health_routes(app):
-    """Registra as rotas de health check"""
+class AmostradorSaude:
+    """Coleta o status periodicamente em segundo plano; o /health/detailed só lê a última amostra"""
+    
+    def __init__(self, estatisticas=None, intervalo=INTERVALO_AMOSTRA):
+        self.estatisticas = estatisticas
+        self.intervalo = intervalo
+        self.amostra = None
+        self._pid = None
+    
+    def coletar(self):
+        amostra = get_health_status(self.estatisticas)
+        amostra["sampled_at"] = time.time()
+        self.amostra = amostra
+        return amostra
+    
+    def iniciar(self, socketio):
+        """Inicia a coleta em segundo plano, uma vez por processo (chamar já no worker)"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self.amostra = None  # Amostra herdada do processo pai não vale
+        psutil.cpu_percent(interval=None)  # A primeira leitura só marca o início da medição
+        socketio.start_background_task(self._executar, socketio)
+    
+    def _executar(self, socketio):
+        while True:
+            socketio.sleep(self.intervalo)
+            try:
+                self.coletar()
+            except Exception as e:
+                logger.error('Erro ao coletar status: %s', e)
+    
+    def status(self):
+        """Última amostra com a idade em segundos (coleta na hora se ainda não houver)"""
+        amostra = self.amostra or self.coletar()
+        return dict(amostra, sample_age=round(time.time() - amostra["sampled_at"], 1))
+
+def register_health_routes(app, estatisticas=None, socketio=None):
+    """Registra as rotas de health check
+    
+    `estatisticas` mapeia nomes para funções cujos resultados entram no /health/detailed.
+    Com `socketio`, as amostras são coletadas em segundo plano. Retorna o amostrador.
+    """
+    amostrador = AmostradorSaude(estatisticas)
     
     @app.route('/health')
     def health_check():
@@ -51,9 +115,18 @@ def register_health_routes(app):
     @app.route('/health/detailed')
     def detailed_health():
         """Endpoint detalhado de health check"""
-        return jsonify(get_health_status())
+        if socketio is not None:
+            amostrador.iniciar(socketio)
+        return jsonify(amostrador.status())
+    
+    @app.route('/metrics')
+    def metrics():
+        """Métricas do processo no formato do Prometheus"""
+        return Response(metricas.exportar(), mimetype='text/plain; version=0.0.4')
     
     @app.route('/ping')
     def ping():
         """Endpoint simples para keep-alive"""
         return "pong"
+    
+    return amostrador
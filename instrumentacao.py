@@ -0,0 +1,210 @@
+"""
+Instrumentação dos handlers Socket.IO
+
+Cada handler registrado por `Instrumentacao.envolver` passa antes pelo
+limite de taxa do evento (veja limitador.py), ganha o tratamento de
+erros padrão (erro esperado -> 'erro' com a mensagem; erro inesperado -> log
+e 'Erro interno do servidor') e, com a instrumentação ligada, registra nas
+métricas a duração, o tamanho do payload recebido e o resultado de cada
+evento. Eventos acima do limite vão para o log com a sala e o número de
+jogadores.
+
+Configuração (pode ser trocada em execução pela rota /admin/instrumentacao):
+- EVENTOS_INSTRUMENTACAO: 1 liga, 0 desliga (padrão 1)
+- EVENTOS_LIMITE_LENTO_MS: duração a partir da qual o evento é logado (padrão 250)
+- EVENTOS_AMOSTRA_PAYLOAD: mede o payload de 1 a cada N eventos de cada tipo e
+  conta N vezes o tamanho medido (padrão 16; 1 mede todos). Eventos lentos são
+  sempre medidos para o log
+- ADMIN_TOKEN: token exigido pela rota de administração (sem ele a rota não existe)
+"""
+from functools import wraps
+import hmac
+import itertools
+import json
+import logging
+import math
+import os
+import time
+
+from flask import abort, jsonify, request
+from flask_socketio import emit
+
+import metricas
+
+logger = logging.getLogger(__name__)
+
+RESULTADOS = ('ok', 'recusado', 'falha', 'limitado')
+
+EVENTOS = metricas.contador('jogo_eventos_total', 'Eventos Socket.IO processados, por resultado', ('evento', 'resultado'))
+BYTES_RECEBIDOS = metricas.contador('jogo_evento_payload_bytes_total', 'Tamanho dos payloads recebidos, por evento (por amostragem)', 'evento')
+EVENTOS_LENTOS = metricas.contador('jogo_eventos_lentos_total', 'Eventos acima do limite de duração', 'evento')
+
+
+class ErroEvento(Exception):
+    """Erro esperado de um evento: a mensagem é enviada ao cliente no evento 'erro'"""
+
+
+def _tamanho_payload(args):
+    if not args or args[0] is None:
+        return 0
+    try:
+        return len(json.dumps(args[0], separators=(',', ':')))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _numero_admin(dados, campo, atual):
+    """Número enviado à rota admin (`atual` se ausente); ValueError se não for finito e não negativo"""
+    if campo not in dados:
+        return atual
+    valor = dados[campo]
+    try:
+        if isinstance(valor, bool):
+            raise TypeError
+        valor = float(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f'{campo} deve ser um número')
+    if not math.isfinite(valor) or valor < 0:
+        raise ValueError(f'{campo} deve ser um número finito e não negativo')
+    return valor
+
+
+class Instrumentacao:
+    """Tratamento de erros e medição comum a todos os handlers
+
+    `contexto()` deve retornar (código da sala, número de jogadores) da
+    conexão atual; só é chamado para eventos lentos. Com `limitador`, os
+    eventos acima do limite de taxa são recusados sem chegar ao handler.
+    """
+
+    def __init__(self, contexto=None, limitador=None):
+        self.contexto = contexto
+        self.limitador = limitador
+        self.ativa = os.environ.get('EVENTOS_INSTRUMENTACAO', '1') != '0'
+        self.limite_lento_ms = float(os.environ.get('EVENTOS_LIMITE_LENTO_MS', 250))
+        # json.dumps do payload custa tanto quanto um handler simples: só em uma amostra
+        self.amostra_payload = max(1, int(os.environ.get('EVENTOS_AMOSTRA_PAYLOAD', 16)))
+
+    def envolver(self, nome, funcao, descricao, erros_usuario=()):
+        """Retorna o handler instrumentado
+
+        `descricao` completa a mensagem de log 'Erro ao ...'; exceções em
+        `erros_usuario` têm a mensagem enviada ao cliente, como ErroEvento.
+        """
+        # Séries obtidas uma vez aqui: por evento só há incrementos
+        latencia = metricas.LATENCIA_HANDLERS.serie(nome)
+        resultados = {resultado: EVENTOS.serie((nome, resultado)) for resultado in RESULTADOS}
+        bytes_recebidos = BYTES_RECEBIDOS.serie(nome)
+        lentos = EVENTOS_LENTOS.serie(nome)
+        regra = self.limitador.regra(nome) if self.limitador else None
+        chamadas = itertools.count()
+
+        @wraps(funcao)
+        def instrumentado(*args):
+            if regra is not None:
+                recusa = self.limitador.permitir(regra, request.sid)
+                if recusa is not None:
+                    emit('erro', {'msg': recusa})
+                    if self.ativa:
+                        resultados['limitado'].incrementar()
+                    return
+
+            if not self.ativa:
+                self._executar(funcao, args, descricao, erros_usuario)
+                return
+
+            inicio = time.perf_counter()
+            resultado = self._executar(funcao, args, descricao, erros_usuario)
+            duracao = time.perf_counter() - inicio
+
+            latencia.observar(duracao)
+            resultados[resultado].incrementar()
+
+            amostra = self.amostra_payload
+            lento = duracao * 1000 >= self.limite_lento_ms
+            if next(chamadas) % amostra == 0:
+                tamanho = _tamanho_payload(args)
+                bytes_recebidos.incrementar(tamanho * amostra)
+            elif lento:
+                tamanho = _tamanho_payload(args)
+
+            if lento:
+                lentos.incrementar()
+                self._registrar_lento(nome, duracao, tamanho, resultado)
+
+        return instrumentado
+
+    def _executar(self, funcao, args, descricao, erros_usuario):
+        try:
+            funcao(*args)
+            return 'ok'
+        except ErroEvento as e:
+            emit('erro', {'msg': str(e)})
+            return 'recusado'
+        except erros_usuario as e:
+            emit('erro', {'msg': str(e)})
+            return 'recusado'
+        except Exception:
+            logger.exception('Erro ao %s', descricao)
+            emit('erro', {'msg': 'Erro interno do servidor'})
+            return 'falha'
+
+    def _registrar_lento(self, nome, duracao, tamanho, resultado):
+        sala, jogadores = self.contexto() if self.contexto else (None, 0)
+        logger.warning(
+            'Evento lento: %s levou %.1f ms (sala %s, %d jogadores, payload %d bytes, %s)',
+            nome, duracao * 1000, sala or '-', jogadores, tamanho, resultado
+        )
+
+    def resumo(self):
+        """Contagem, duração média e resultados por evento (dados das métricas)"""
+        eventos = {}
+        for nome, serie in metricas.LATENCIA_HANDLERS.series.items():
+            eventos[nome] = {
+                'chamadas': serie.total,
+                'media_ms': round(serie.soma / serie.total * 1000, 3) if serie.total else 0.0,
+                'resultados': {
+                    resultado: EVENTOS.series[(nome, resultado)].valor
+                    for resultado in RESULTADOS if (nome, resultado) in EVENTOS.series
+                },
+                'payload_bytes': BYTES_RECEBIDOS.series[nome].valor if nome in BYTES_RECEBIDOS.series else 0,
+                'lentos': EVENTOS_LENTOS.series[nome].valor if nome in EVENTOS_LENTOS.series else 0
+            }
+        resumo = {
+            'ativa': self.ativa,
+            'limite_lento_ms': self.limite_lento_ms,
+            'amostra_payload': self.amostra_payload,
+            'eventos': eventos
+        }
+        if self.limitador is not None:
+            resumo['limites_ativos'] = self.limitador.ativo
+            resumo['limites'] = self.limitador.limites()
+        return resumo
+
+    def registrar_rota_admin(self, app):
+        """Rota para consultar e ligar/desligar a instrumentação em execução (por processo)"""
+        token = os.environ.get('ADMIN_TOKEN')
+
+        @app.route('/admin/instrumentacao', methods=['GET', 'POST'])
+        def admin_instrumentacao():
+            enviado = request.headers.get('X-Admin-Token', '')
+            if not token or not hmac.compare_digest(enviado, token):
+                abort(404)
+
+            if request.method == 'POST':
+                dados = request.get_json(silent=True) or {}
+                if not isinstance(dados, dict):
+                    return jsonify({'erro': 'Envie um objeto JSON'}), 400
+                # Tudo validado antes de aplicar: um campo inválido não deixa a configuração pela metade
+                try:
+                    limite = _numero_admin(dados, 'limite_lento_ms', self.limite_lento_ms)
+                    amostra = _numero_admin(dados, 'amostra_payload', self.amostra_payload)
+                except ValueError as e:
+                    return jsonify({'erro': str(e)}), 400
+                if 'ativa' in dados:
+                    self.ativa = bool(dados['ativa'])
+                self.limite_lento_ms = limite
+                self.amostra_payload = max(1, int(amostra))
+                logger.info('Instrumentação: ativa=%s, limite=%s ms', self.ativa, self.limite_lento_ms)
+
+            return jsonify(self.resumo())
@@ -1,24 +1,105 @@
-from normalizador import NormalizadorTexto
+from normalizador import NORMALIZADOR
+from chat import HistoricoChat
+from codificacao import pre_codificar
+from array import array
+from functools import lru_cache
+import time
+
+# Erros por palavra ficam em um array de inteiros de 16 bits (saturando aqui)
+MAXIMO_ERROS_REGISTRADOS = 0xFFFF
+
+
+@lru_cache(maxsize=1024)
+def _flags_descobertas(mascara, total):
+    """Tupla de booleanos de uma máscara de bits (compartilhada entre todos os jogadores)"""
+    return tuple(bool(mascara >> i & 1) for i in range(total))
+
+
+def _mascara_descobertas(flags):
+    return sum(1 << i for i, descoberta in enumerate(flags) if descoberta)
+
+
+def _reaproveitar(texto, existente):
+    """Devolve `existente` quando o texto for igual, para não guardar duas cópias da mesma string"""
+    return existente if texto == existente else texto
+
 
 class Configuracao:
+    __slots__ = ('num_palavras', 'max_jogadores')
+
     def __init__(self, num_palavras=5, max_jogadores=2):
         self.num_palavras = max(4, min(8, num_palavras))  # Entre 4 e 8
         self.max_jogadores = max(2, min(8, max_jogadores))  # Entre 2 e 8
 
+    def para_dict(self):
+        return {'num_palavras': self.num_palavras, 'max_jogadores': self.max_jogadores}
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(dados['num_palavras'], dados['max_jogadores'])
+
 class Jogador:
+    """Jogador de uma partida, em representação compacta (milhares de salas por processo)
+
+    Palavras em tuplas, erros por palavra em array('H'), palavras descobertas
+    em uma máscara de bits e dicas calculadas a partir dos erros quando pedidas
+    (a tupla fica guardada até o próximo erro; é a mesma referenciada pelo
+    estado publicado, então não ocupa memória a mais).
+    """
+    __slots__ = (
+        'nome', 'num_palavras', 'palavras', 'palavras_originais', 'chaves_palavras',
+        'palavra_atual_index', 'tentativas_erradas_atual', 'tentativas_por_palavra',
+        '_descobertas', '_dicas', 'alvo_jogador', 'concluido', 'sids', 'desconectado_em'
+    )
+
+    normalizador = NORMALIZADOR  # Normalizador compartilhado (sem cópia por jogador)
+
     def __init__(self, nome, num_palavras=5):
         self.nome = nome
         self.num_palavras = num_palavras
-        self.palavras = []  # Lista com as N palavras definidas
-        self.palavras_originais = []  # Lista com as palavras originais (antes da normalização)
-        self.dicas = []     # Lista com a dica de cada palavra
+        self.limpar_palavras()
+        self.alvo_jogador = None  # Jogador cujas palavras este jogador deve adivinhar
+        self.sids = ()  # Conexões Socket.IO abertas por este jogador
+        self.desconectado_em = None  # Quando a última conexão caiu (None = conectado)
+
+    def limpar_palavras(self):
+        """Esquece as palavras e o progresso (jogador novo ou jogo reiniciado)"""
+        self.palavras = ()  # As N palavras definidas (normalizadas)
+        self.palavras_originais = ()  # As palavras como foram digitadas
+        self.chaves_palavras = ()  # Chave de comparação de cada palavra (normalizada e sem acentos)
         self.palavra_atual_index = 1  # Índice da palavra que está tentando adivinhar (começa na 2ª palavra)
         self.tentativas_erradas_atual = 0  # Erros na palavra atual
-        self.tentativas_por_palavra = []  # Erros acumulados por palavra
-        self.palavras_descobertas = []  # Controla quais palavras foram descobertas
-        self.alvo_jogador = None  # Jogador cujas palavras este jogador deve adivinhar
+        self.tentativas_por_palavra = array('H')  # Erros acumulados por palavra
+        self._descobertas = 0  # Bit i ligado = palavra i descoberta
+        self._dicas = None  # Dicas calculadas (None = recalcular)
         self.concluido = False  # Se terminou de adivinhar todas as palavras
-        self.normalizador = NormalizadorTexto()  # Instância do normalizador
+
+    @property
+    def conectado(self):
+        return self.desconectado_em is None
+
+    @property
+    def palavras_descobertas(self):
+        """Tupla indicando quais palavras já foram descobertas"""
+        return _flags_descobertas(self._descobertas, len(self.palavras))
+
+    @property
+    def dicas(self):
+        """Dica de cada palavra: a primeira completa, as demais com uma letra a mais por erro"""
+        if self._dicas is None:
+            erros = self.tentativas_por_palavra
+            self._dicas = tuple([
+                palavra if i == 0 else palavra[:1 + erros[i]]
+                for i, palavra in enumerate(self.palavras)
+            ])
+        return self._dicas
+
+    def adicionar_conexao(self, sid):
+        if sid not in self.sids:
+            self.sids += (sid,)
+
+    def remover_conexao(self, sid):
+        self.sids = tuple(s for s in self.sids if s != sid)
 
     def definir_palavras(self, lista_palavras):
         if len(lista_palavras) != self.num_palavras:
@@ -33,30 +114,32 @@ class Jogador:
             if len(palavra.strip()) < 2:
                 raise ValueError("As palavras devem ter pelo menos 2 letras.")
         
-        # Salvar palavras originais e normalizadas
-        self.palavras_originais = [palavra.strip() for palavra in lista_palavras]
-        self.palavras = []
+        # Salvar palavras originais e normalizadas (a mesma string quando a normalização não muda nada)
+        self.palavras_originais = tuple(palavra.strip() for palavra in lista_palavras)
+        self.palavras = tuple(
+            _reaproveitar(self.normalizador.normalizar(original).lower(), original)
+            for original in self.palavras_originais
+        )
         
-        # Normalizar cada palavra
-        for palavra_original in self.palavras_originais:
-            palavra_normalizada = self.normalizador.normalizar(palavra_original)
-            self.palavras.append(palavra_normalizada.lower())
+        # Pré-calcular as chaves de comparação: cada tentativa vira uma igualdade de strings
+        self.chaves_palavras = tuple(
+            _reaproveitar(self.normalizador.chave_comparacao(palavra), palavra)
+            for palavra in self.palavras
+        )
         
-        self.palavras_descobertas = [False] * self.num_palavras
-        self.tentativas_por_palavra = [0] * self.num_palavras  # Inicializar tentativas por palavra
+        self.tentativas_por_palavra = array('H', bytes(2 * self.num_palavras))
+        self._dicas = None
         
         # A primeira palavra já é considerada "descoberta" pois está completa
-        self.palavras_descobertas[0] = True
-        
-        # Configurar dicas iniciais
-        self.dicas = []
-        for i, palavra in enumerate(self.palavras):
-            if i == 0:
-                # Primeira palavra: mostrar completa
-                self.dicas.append(palavra)
-            else:
-                # Demais palavras: apenas primeira letra
-                self.dicas.append(palavra[0])
+        self._descobertas = 1
+
+    def trocar_alvo(self, alvo):
+        """Passa a adivinhar as palavras de outro jogador, a partir da primeira ainda não descoberta"""
+        self.alvo_jogador = alvo
+        pendentes = [i for i, descoberta in enumerate(alvo.palavras_descobertas) if not descoberta]
+        self.palavra_atual_index = pendentes[0] if pendentes else len(alvo.palavras)
+        self.tentativas_erradas_atual = 0
+        self.concluido = not pendentes
 
     def get_dica_palavra_atual(self):
         """Retorna a dica da palavra que o jogador está tentando adivinhar atualmente"""
@@ -74,25 +157,9 @@ class Jogador:
             total_letras = min(len(palavra), 1 + letras_extras)
             return palavra[:total_letras]
 
-    def atualizar_dicas_alvo(self):
-        """Atualiza as dicas do alvo baseado nos erros acumulados"""
-        if not self.alvo_jogador:
-            return
-        
-        for i, palavra in enumerate(self.alvo_jogador.palavras):
-            if i == 0:
-                # Primeira palavra: sempre completa
-                self.alvo_jogador.dicas[i] = palavra
-            else:
-                # Demais palavras: primeira letra + letras extras por erros
-                if i < len(self.alvo_jogador.tentativas_por_palavra):
-                    erros = self.alvo_jogador.tentativas_por_palavra[i]
-                    total_letras = min(len(palavra), 1 + erros)
-                    self.alvo_jogador.dicas[i] = palavra[:total_letras]
-
     def get_palavra_anterior(self):
         """Retorna a palavra anterior que foi descoberta (para referência)"""
-        if not self.alvo_jogador or self.palavra_atual_index <= 0:
+        if not self.alvo_jogador or not 0 < self.palavra_atual_index <= len(self.alvo_jogador.palavras):
             return ""
         
         # Retorna a palavra anterior (índice atual - 1)
@@ -112,16 +179,14 @@ class Jogador:
         # Normalizar a palavra tentada
         palavra_tentada_normalizada = self.normalizador.normalizar(palavra_tentada_original).lower()
         
-        # Comparar usando o normalizador (considera variações de acentos)
-        if self.normalizador.comparar_palavras(palavra_tentada_normalizada, palavra_correta):
+        # Comparar com a chave pré-calculada do alvo (considera variações de acentos)
+        chave_tentada = self.normalizador.chave_comparacao(palavra_tentada_normalizada)
+        if chave_tentada and chave_tentada == self.alvo_jogador.chaves_palavras[self.palavra_atual_index]:
             # Acertou!
-            self.alvo_jogador.palavras_descobertas[self.palavra_atual_index] = True
+            self.alvo_jogador.descobrir_palavra(self.palavra_atual_index)
             self.palavra_atual_index += 1
             self.tentativas_erradas_atual = 0
             
-            # Atualizar dicas do alvo após acertar
-            self.atualizar_dicas_alvo()
-            
             # Verificar se houve correção automática
             mensagem_correcao = ""
             if self.normalizador.foi_corrigida(palavra_tentada_original, palavra_tentada_normalizada):
@@ -134,13 +199,12 @@ class Jogador:
             
             return True, f"Correto! '{palavra_correta}'{mensagem_correcao} - Próxima palavra: {self.get_dica_palavra_atual()}"
         else:
-            # Errou - incrementar tentativas da palavra atual no alvo
+            # Errou - incrementar tentativas da palavra atual no alvo (as dicas dele saem daí)
             self.tentativas_erradas_atual += 1
-            if self.palavra_atual_index < len(self.alvo_jogador.tentativas_por_palavra):
-                self.alvo_jogador.tentativas_por_palavra[self.palavra_atual_index] += 1
-            
-            # Atualizar dicas do alvo
-            self.atualizar_dicas_alvo()
+            erros = self.alvo_jogador.tentativas_por_palavra
+            if self.palavra_atual_index < len(erros) and erros[self.palavra_atual_index] < MAXIMO_ERROS_REGISTRADOS:
+                erros[self.palavra_atual_index] += 1
+                self.alvo_jogador._dicas = None
             
             nova_dica = self.get_dica_palavra_atual()
             
@@ -154,19 +218,103 @@ class Jogador:
 
     def descobrir_palavra(self, indice):
         """Marca uma palavra como descoberta"""
-        if 0 <= indice < len(self.palavras_descobertas):
-            self.palavras_descobertas[indice] = True
+        if 0 <= indice < len(self.palavras):
+            self._descobertas |= 1 << indice
+
+    def para_dict(self):
+        """Serializa o jogador (o alvo é guardado pelo nome)"""
+        return {
+            'nome': self.nome,
+            'num_palavras': self.num_palavras,
+            'palavras': list(self.palavras),
+            'palavras_originais': list(self.palavras_originais),
+            'dicas': list(self.dicas),  # Derivadas; mantidas para quem ainda lê o formato antigo
+            'palavra_atual_index': self.palavra_atual_index,
+            'tentativas_erradas_atual': self.tentativas_erradas_atual,
+            'tentativas_por_palavra': self.tentativas_por_palavra.tolist(),
+            'palavras_descobertas': list(self.palavras_descobertas),
+            'alvo': self.alvo_jogador.nome if self.alvo_jogador else None,
+            'concluido': self.concluido,
+            'sids': list(self.sids),
+            'desconectado_em': self.desconectado_em
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Recria o jogador; o alvo é ligado depois por PartidaMultiplayer.de_dict"""
+        jogador = cls(dados['nome'], dados['num_palavras'])
+        jogador.palavras_originais = tuple(dados['palavras_originais'])
+        jogador.palavras = tuple(
+            _reaproveitar(palavra, original) for palavra, original in zip(dados['palavras'], jogador.palavras_originais)
+        )
+        jogador.chaves_palavras = tuple(
+            _reaproveitar(jogador.normalizador.chave_comparacao(p), p) for p in jogador.palavras
+        )
+        jogador.palavra_atual_index = dados['palavra_atual_index']
+        jogador.tentativas_erradas_atual = dados['tentativas_erradas_atual']
+        jogador.tentativas_por_palavra = array('H', (min(t, MAXIMO_ERROS_REGISTRADOS) for t in dados['tentativas_por_palavra']))
+        jogador._descobertas = _mascara_descobertas(dados['palavras_descobertas'])
+        jogador.concluido = dados['concluido']
+        jogador.sids = tuple(dados.get('sids', ()))
+        jogador.desconectado_em = dados.get('desconectado_em')
+        return jogador
+
+
+# Campos do estado de cada jogador montados como tuplas (imutáveis, compartilháveis entre versões)
+CAMPOS_TUPLA_ESTADO = ('palavras_descobertas', 'dicas', 'palavras_completas', 'palavras_originais')
 
 
 class PartidaMultiplayer:
+    __slots__ = (
+        'config', 'jogadores', '_jogadores_por_nome', 'turno_atual', 'jogo_iniciado', 'vencedor',
+        'chat', 'codigo_sala', 'criador', 'versao_estado', '_estado_publicado', '_estado_alterado',
+        '_snapshot', '_snapshot_codificado', 'ultima_atividade', 'revisao', 'eventos_diario'
+    )
+
+    normalizador = NORMALIZADOR  # Mesmo normalizador usado pelos jogadores
+
     def __init__(self, configuracao):
         self.config = configuracao
         self.jogadores = []
+        self._jogadores_por_nome = {}  # Índice nome -> Jogador (busca O(1))
         self.turno_atual = 0
         self.jogo_iniciado = False
         self.vencedor = None
-        self.mensagens_chat = []
+        self.chat = HistoricoChat()  # Histórico limitado, fora do estado do jogo
         self.codigo_sala = ""
+        self.criador = None  # Nome de quem criou a sala
+        self.versao_estado = 0  # Versão monotônica do estado publicado para a sala
+        self._estado_publicado = None  # Último estado enviado (base para os patches)
+        self._estado_alterado = True  # Se houve mutação desde a última publicação
+        self._snapshot = None  # Estado completo da versão atual
+        self._snapshot_codificado = None  # Mesmo estado já codificado em JSON
+        self.ultima_atividade = time.time()  # Usado para expirar salas abandonadas
+        self.revisao = 0  # Conta as alterações (os snapshots reaproveitam salas sem alteração)
+        self.eventos_diario = 0  # Eventos desta sala já anotados no diário (veja diario_salas.py)
+
+    @property
+    def finalizada(self):
+        return self.vencedor is not None
+
+    @property
+    def em_andamento(self):
+        return self.jogo_iniciado and self.vencedor is None
+
+    def registrar_atividade(self):
+        """Marca a sala como em uso agora"""
+        self.ultima_atividade = time.time()
+
+    def marcar_alteracao(self):
+        """Invalida o estado em cache; deve ser chamado a cada mutação da partida"""
+        self._estado_alterado = True
+        self.revisao += 1
+        self.ultima_atividade = time.time()
+
+    def numerar_evento_diario(self):
+        """Número do próximo evento do diário desta sala"""
+        self.eventos_diario += 1
+        self.revisao += 1  # O número faz parte do que o snapshot grava
+        return self.eventos_diario
 
     def adicionar_jogador(self, jogador):
         """Adiciona um jogador à partida"""
@@ -175,17 +323,119 @@ class PartidaMultiplayer:
         
         jogador.num_palavras = self.config.num_palavras
         self.jogadores.append(jogador)
+        self._jogadores_por_nome[jogador.nome] = jogador
+        self.marcar_alteracao()
         
         # Se atingiu o número mínimo, configurar alvos
         if len(self.jogadores) >= 2:
             self._configurar_alvos()
 
+    def remover_jogador(self, jogador_nome):
+        """Remove um jogador da partida; retorna False se ele não estava nela"""
+        jogador = self._jogadores_por_nome.pop(jogador_nome, None)
+        if jogador is None:
+            return False
+        
+        indice = self.jogadores.index(jogador)
+        del self.jogadores[indice]
+        self.marcar_alteracao()
+        
+        # Manter a vez com o mesmo jogador (ou passar ao seguinte, se a vez era de quem saiu)
+        if indice < self.turno_atual:
+            self.turno_atual -= 1
+        if self.jogadores:
+            self.turno_atual %= len(self.jogadores)
+            if not self.jogadores[self.turno_atual].conectado:
+                self._avancar_turno()
+        else:
+            self.turno_atual = 0
+        
+        # Reconfigurar alvos se necessário
+        if len(self.jogadores) >= 2:
+            self._configurar_alvos()
+        
+        # No meio do jogo, a saída pode decidir o vencedor
+        if self.jogo_iniciado and not self.vencedor and self.jogadores:
+            if len(self.jogadores) == 1:
+                self.vencedor = self.jogadores[0]
+            else:
+                self.vencedor = next((j for j in self.jogadores if j.concluido), None)
+        return True
+
+    def conectar_jogador(self, jogador_nome, sid):
+        """Associa uma conexão ao jogador; retorna True se ele estava desconectado"""
+        jogador = self._jogadores_por_nome.get(jogador_nome)
+        if jogador is None:
+            return False
+        
+        jogador.adicionar_conexao(sid)
+        if jogador.conectado:
+            return False
+        jogador.desconectado_em = None
+        self.marcar_alteracao()
+        return True
+
+    def desconectar_jogador(self, jogador_nome, sid):
+        """Registra a queda de uma conexão; retorna True se o jogador ficou sem nenhuma"""
+        jogador = self._jogadores_por_nome.get(jogador_nome)
+        if jogador is None:
+            return False
+        
+        jogador.remover_conexao(sid)
+        if jogador.sids or not jogador.conectado:
+            return False
+        jogador.desconectado_em = time.time()
+        
+        # Não deixar o jogo parado esperando quem caiu
+        if self.jogo_iniciado and not self.vencedor and self.get_jogador_da_vez() is jogador:
+            self._avancar_turno()
+        self.marcar_alteracao()
+        return True
+
+    def jogadores_expirados(self, limite):
+        """Nomes dos jogadores desconectados desde antes do instante `limite`"""
+        return [
+            j.nome for j in self.jogadores
+            if j.desconectado_em is not None and j.desconectado_em < limite
+        ]
+
+    @property
+    def desconexao_mais_antiga(self):
+        """Instante da desconexão mais antiga ainda pendente, ou None"""
+        momentos = [j.desconectado_em for j in self.jogadores if j.desconectado_em is not None]
+        return min(momentos) if momentos else None
+
+    def _avancar_turno(self):
+        """Passa a vez ao próximo jogador conectado (ou ao próximo, se ninguém estiver)"""
+        total = len(self.jogadores)
+        for passo in range(1, total + 1):
+            indice = (self.turno_atual + passo) % total
+            if self.jogadores[indice].conectado:
+                self.turno_atual = indice
+                return
+        self.turno_atual = (self.turno_atual + 1) % total
+
+    def obter_jogador(self, jogador_nome):
+        """Retorna o jogador com esse nome, ou None"""
+        return self._jogadores_por_nome.get(jogador_nome)
+
+    def definir_palavras(self, jogador, lista_palavras):
+        """Define as palavras secretas de um jogador da partida"""
+        jogador.definir_palavras(lista_palavras)
+        self.marcar_alteracao()
+
     def _configurar_alvos(self):
         """Configura a lógica circular de alvos"""
         for i, jogador in enumerate(self.jogadores):
             # Cada jogador tem como alvo o próximo na lista (circular)
             proximo_index = (i + 1) % len(self.jogadores)
-            jogador.alvo_jogador = self.jogadores[proximo_index]
+            alvo = self.jogadores[proximo_index]
+            if self.jogo_iniciado and jogador.alvo_jogador is not alvo:
+                # Alvo saiu no meio do jogo: continuar nas palavras ainda ocultas do novo alvo
+                jogador.trocar_alvo(alvo)
+            else:
+                jogador.alvo_jogador = alvo
+        self.marcar_alteracao()
 
     def iniciar_jogo(self):
         """Inicia o jogo após todos jogadores definirem suas palavras"""
@@ -199,6 +449,7 @@ class PartidaMultiplayer:
         
         self.jogo_iniciado = True
         self.turno_atual = 0
+        self.marcar_alteracao()
 
     def tentar_adivinhar(self, jogador_nome, palavra_tentada):
         """Processa uma tentativa de adivinhação"""
@@ -209,12 +460,7 @@ class PartidaMultiplayer:
             return False, "O jogo já terminou!"
         
         # Encontrar o jogador
-        jogador_atual = None
-        for j in self.jogadores:
-            if j.nome == jogador_nome:
-                jogador_atual = j
-                break
-        
+        jogador_atual = self._jogadores_por_nome.get(jogador_nome)
         if not jogador_atual:
             return False, "Jogador não encontrado!"
         
@@ -224,14 +470,15 @@ class PartidaMultiplayer:
         
         # Tentar adivinhar
         acertou, mensagem = jogador_atual.tentar_adivinhar(palavra_tentada)
+        self.marcar_alteracao()
         
         # Verificar se alguém venceu
         if jogador_atual.concluido:
             self.vencedor = jogador_atual
         
-        # Se errou, passa a vez para o próximo jogador
+        # Se errou, passa a vez para o próximo jogador conectado
         if not acertou:
-            self.turno_atual = (self.turno_atual + 1) % len(self.jogadores)
+            self._avancar_turno()
         
         return acertou, mensagem
 
@@ -242,16 +489,12 @@ class PartidaMultiplayer:
         return None
 
     def adicionar_mensagem_chat(self, jogador_nome, mensagem):
-        """Adiciona uma mensagem ao chat"""
-        import datetime
-        self.mensagens_chat.append({
-            'jogador': jogador_nome,
-            'mensagem': mensagem.strip(),
-            'timestamp': datetime.datetime.now().strftime('%H:%M:%S')
-        })
+        """Adiciona uma mensagem ao chat e retorna o registro criado"""
+        self.revisao += 1
+        return self.chat.adicionar(jogador_nome, mensagem)
 
-    def get_estado_jogo(self):
-        """Retorna o estado atual do jogo"""
+    def _montar_estado(self):
+        """Monta o estado atual do jogo (sem versão)"""
         jogador_da_vez = self.get_jogador_da_vez()
         
         return {
@@ -272,13 +515,82 @@ class PartidaMultiplayer:
                     'dica_atual': j.get_dica_palavra_atual(),
                     'palavra_anterior': j.get_palavra_anterior(),
                     'concluido': j.concluido,
+                    'conectado': j.conectado,
                     'alvo': j.alvo_jogador.nome if j.alvo_jogador else None,
-                    'palavras_completas': j.palavras if self.vencedor else [],  # Só mostrar no final
-                    'palavras_originais': j.palavras_originais if self.vencedor else []
+                    'palavras_completas': j.palavras if self.vencedor else (),  # Só mostrar no final
+                    'palavras_originais': j.palavras_originais if self.vencedor else ()
                 } for j in self.jogadores
-            ],
-            'mensagens_chat': self.mensagens_chat
+            ]
+        }
+
+    def publicar_estado(self):
+        """Gera o patch com os campos alterados desde a última versão publicada
+        
+        Retorna None se nada mudou. Cada patch traz a versão de origem ('base')
+        e a nova ('versao'); um cliente que não estiver na versão base deve pedir
+        o estado completo.
+        """
+        if not self._estado_alterado:
+            return None
+        self._estado_alterado = False
+        
+        estado = self._montar_estado()
+        anterior = self._estado_publicado or {}
+        
+        campos = {
+            chave: valor for chave, valor in estado.items()
+            if chave != 'jogadores' and anterior.get(chave) != valor
+        }
+        
+        jogadores_alterados = {}
+        jogadores_anteriores = anterior.get('jogadores')
+        if jogadores_anteriores is None or \
+                [j['nome'] for j in jogadores_anteriores] != [j['nome'] for j in estado['jogadores']]:
+            # Lista de jogadores mudou: enviar a lista inteira
+            campos['jogadores'] = estado['jogadores']
+        else:
+            for antes, depois in zip(jogadores_anteriores, estado['jogadores']):
+                alteracoes = {
+                    chave: valor for chave, valor in depois.items()
+                    if antes[chave] != valor
+                }
+                if alteracoes:
+                    jogadores_alterados[depois['nome']] = alteracoes
+        
+        if not campos and not jogadores_alterados:
+            return None
+        
+        self.versao_estado += 1
+        self._estado_publicado = estado
+        
+        return {
+            'versao': self.versao_estado,
+            'base': self.versao_estado - 1,
+            'campos': campos,
+            'jogadores_alterados': jogadores_alterados
         }
+
+    def get_estado_jogo(self):
+        """Retorna o estado completo na última versão publicada (não deve ser alterado)
+        
+        Não publica pendências: a versão só avança em publicar_estado(), junto com
+        o patch que vai para a sala. Antes da primeira publicação devolve o estado
+        atual na versão 0 (o primeiro patch traz todos os campos).
+        """
+        if self._estado_publicado is None:
+            return dict(self._montar_estado(), versao=self.versao_estado)
+        if self._snapshot is None or self._snapshot['versao'] != self.versao_estado:
+            self._snapshot = dict(self._estado_publicado, versao=self.versao_estado)
+        return self._snapshot
+
+    def get_estado_codificado(self):
+        """Retorna o estado completo já codificado, reaproveitado enquanto a versão não mudar"""
+        estado = self.get_estado_jogo()
+        if self._estado_publicado is None:
+            return pre_codificar(estado)
+        if self._snapshot_codificado is None or self._snapshot_codificado[0] != estado['versao']:
+            self._snapshot_codificado = (estado['versao'], pre_codificar(estado))
+        return self._snapshot_codificado[1]
     
     def get_gabarito_completo(self):
         """Retorna o gabarito completo de todos os jogadores"""
@@ -295,27 +607,65 @@ class PartidaMultiplayer:
         
         return gabarito
     
+    def para_dict(self):
+        """Serializa a partida inteira em tipos JSON (usado pelos armazéns de salas)"""
+        return {
+            'config': self.config.para_dict(),
+            'codigo_sala': self.codigo_sala,
+            'criador': self.criador,
+            'jogadores': [j.para_dict() for j in self.jogadores],
+            'turno_atual': self.turno_atual,
+            'jogo_iniciado': self.jogo_iniciado,
+            'vencedor': self.vencedor.nome if self.vencedor else None,
+            'chat': self.chat.para_dict(),
+            'versao_estado': self.versao_estado,
+            'estado_publicado': self._estado_publicado,
+            'ultima_atividade': self.ultima_atividade,
+            'eventos_diario': self.eventos_diario
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Recria uma partida a partir de para_dict()"""
+        partida = cls(Configuracao.de_dict(dados['config']))
+        partida.codigo_sala = dados['codigo_sala']
+        partida.criador = dados['criador']
+        for dados_jogador in dados['jogadores']:
+            jogador = Jogador.de_dict(dados_jogador)
+            partida.jogadores.append(jogador)
+            partida._jogadores_por_nome[jogador.nome] = jogador
+        for jogador, dados_jogador in zip(partida.jogadores, dados['jogadores']):
+            jogador.alvo_jogador = partida.obter_jogador(dados_jogador['alvo'])
+        partida.turno_atual = dados['turno_atual']
+        partida.jogo_iniciado = dados['jogo_iniciado']
+        partida.vencedor = partida.obter_jogador(dados['vencedor'])
+        partida.chat = HistoricoChat.de_dict(dados['chat'])
+        partida.versao_estado = dados['versao_estado']
+        partida._estado_publicado = dados['estado_publicado']
+        if partida._estado_publicado:
+            # O JSON devolve listas; o estado montado usa tuplas e a comparação dos patches exige o mesmo tipo
+            for estado_jogador in partida._estado_publicado['jogadores']:
+                for chave in CAMPOS_TUPLA_ESTADO:
+                    estado_jogador[chave] = tuple(estado_jogador[chave])
+        partida.ultima_atividade = dados.get('ultima_atividade', partida.ultima_atividade)
+        partida.eventos_diario = dados.get('eventos_diario', 0)
+        return partida
+
     def reiniciar_jogo(self):
         """Reinicia o jogo mantendo os mesmos jogadores"""
         # Resetar estado da partida
         self.jogo_iniciado = False
         self.vencedor = None
         self.turno_atual = 0
-        self.mensagens_chat = []
+        self.chat.limpar()
         
         # Resetar estado dos jogadores
         for jogador in self.jogadores:
-            jogador.palavras = []
-            jogador.palavras_originais = []
-            jogador.dicas = []
-            jogador.palavra_atual_index = 1
-            jogador.tentativas_erradas_atual = 0
-            jogador.tentativas_por_palavra = []
-            jogador.palavras_descobertas = []
-            jogador.concluido = False
+            jogador.limpar_palavras()
         
         # Reconfigurar alvos
         if len(self.jogadores) >= 2:
             self._configurar_alvos()
         
+        self.marcar_alteracao()
         return True
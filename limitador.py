@@ -0,0 +1,167 @@
+"""
+Limite de taxa por conexão e por sala (baldes de fichas), por tipo de evento
+
+Cada evento limitado tem até dois baldes por chave: um por conexão (sid) e
+um por sala. O balde ganha `taxa` fichas por segundo até `rajada` fichas e
+cada evento gasta uma; sem ficha em algum dos dois, o evento é recusado
+antes de qualquer lógica do jogo. A conta é O(1): só o tempo desde o
+último uso de cada balde.
+
+Configuração (variáveis de ambiente):
+- LIMITES_ATIVOS: 1 liga, 0 desliga todos os limites (padrão 1)
+- LIMITES_EVENTOS: ajustes aos limites padrão, separados por vírgula, no
+  formato evento:escopo=taxa/rajada (escopo 'conexao' ou 'sala'; taxa 0
+  remove o limite). Ex.: tentar_adivinhar:conexao=2/4,enviar_emoji:sala=0
+
+Com vários workers, cada processo tem os próprios baldes: o limite por sala
+vale por worker.
+"""
+import logging
+import os
+import time
+
+import metricas
+
+logger = logging.getLogger(__name__)
+
+ESCOPOS = ('conexao', 'sala')
+
+# evento -> {escopo: (fichas por segundo, rajada)}
+LIMITES_PADRAO = {
+    'tentar_adivinhar': {'conexao': (4, 8), 'sala': (10, 20)},
+    'enviar_mensagem_chat': {'conexao': (2, 5), 'sala': (8, 16)},
+    'enviar_emoji': {'conexao': (3, 10), 'sala': (10, 30)},
+    'obter_estado': {'conexao': (2, 5)}
+}
+
+MENSAGENS = {
+    'conexao': 'Muitas ações em pouco tempo, aguarde um instante',
+    'sala': 'A sala está recebendo ações demais, aguarde um instante'
+}
+
+LIMITADOS = metricas.contador(
+    'jogo_eventos_limitados_total', 'Eventos recusados pelo limite de taxa', ('evento', 'escopo')
+)
+
+
+def carregar_limites(texto=None):
+    """Limites padrão com os ajustes de LIMITES_EVENTOS aplicados"""
+    limites = {evento: dict(escopos) for evento, escopos in LIMITES_PADRAO.items()}
+    if texto is None:
+        texto = os.environ.get('LIMITES_EVENTOS', '')
+
+    for item in texto.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            chave, valor = item.split('=')
+            evento, escopo = chave.strip().split(':')
+            if escopo not in ESCOPOS:
+                raise ValueError(escopo)
+            taxa, _, rajada = valor.partition('/')
+            taxa = float(taxa)
+            rajada = float(rajada) if rajada else max(taxa, 1.0)
+        except ValueError:
+            raise ValueError(f'LIMITES_EVENTOS inválido: {item!r} (use evento:conexao|sala=taxa/rajada)')
+
+        if taxa > 0:
+            limites.setdefault(evento, {})[escopo] = (taxa, rajada)
+        else:
+            limites.get(evento, {}).pop(escopo, None)
+
+    return {evento: escopos for evento, escopos in limites.items() if escopos}
+
+
+class Balde:
+    __slots__ = ('fichas', 'atualizado')
+
+    def __init__(self, fichas, agora):
+        self.fichas = fichas
+        self.atualizado = agora
+
+
+class Regra:
+    """Baldes de um evento: um por conexão e/ou um por sala"""
+
+    def __init__(self, evento, escopos):
+        self.evento = evento
+        self.conexao = escopos.get('conexao')
+        self.sala = escopos.get('sala')
+        self.baldes_conexao = {}
+        self.baldes_sala = {}
+        self.limitados = {escopo: LIMITADOS.serie((evento, escopo)) for escopo in ESCOPOS}
+
+    @staticmethod
+    def _disponivel(baldes, chave, limite, agora):
+        """Reabastece o balde da chave e o retorna (criado cheio se não existir)"""
+        taxa, rajada = limite
+        balde = baldes.get(chave)
+        if balde is None:
+            balde = baldes[chave] = Balde(rajada, agora)
+        else:
+            balde.fichas = min(rajada, balde.fichas + (agora - balde.atualizado) * taxa)
+            balde.atualizado = agora
+        return balde
+
+    def consumir(self, sid, sala, agora):
+        """Gasta uma ficha de cada balde; retorna o escopo sem fichas (None se permitido)"""
+        balde_conexao = balde_sala = None
+        if self.conexao is not None:
+            balde_conexao = self._disponivel(self.baldes_conexao, sid, self.conexao, agora)
+            if balde_conexao.fichas < 1:
+                return 'conexao'
+        if self.sala is not None and sala is not None:
+            balde_sala = self._disponivel(self.baldes_sala, sala, self.sala, agora)
+            if balde_sala.fichas < 1:
+                return 'sala'
+
+        if balde_conexao is not None:
+            balde_conexao.fichas -= 1
+        if balde_sala is not None:
+            balde_sala.fichas -= 1
+        return None
+
+
+class Limitador:
+    """Limites de taxa dos eventos Socket.IO
+
+    `sala_da_conexao(sid)` retorna o código da sala da conexão (ou None); só
+    é chamado para eventos com limite por sala.
+    """
+
+    def __init__(self, limites=None, sala_da_conexao=None):
+        self.ativo = os.environ.get('LIMITES_ATIVOS', '1') != '0'
+        self.sala_da_conexao = sala_da_conexao
+        if limites is None:
+            limites = carregar_limites()
+        self.regras = {evento: Regra(evento, escopos) for evento, escopos in limites.items()}
+
+    def regra(self, evento):
+        """Regra do evento, ou None se ele não tem limite"""
+        return self.regras.get(evento)
+
+    def permitir(self, regra, sid):
+        """Retorna None se o evento pode seguir, ou a mensagem de recusa para o cliente"""
+        if not self.ativo:
+            return None
+        sala = self.sala_da_conexao(sid) if regra.sala is not None and self.sala_da_conexao else None
+        escopo = regra.consumir(sid, sala, time.monotonic())
+        if escopo is None:
+            return None
+        regra.limitados[escopo].incrementar()
+        return MENSAGENS[escopo]
+
+    def esquecer_conexao(self, sid):
+        for regra in self.regras.values():
+            regra.baldes_conexao.pop(sid, None)
+
+    def esquecer_sala(self, sala):
+        for regra in self.regras.values():
+            regra.baldes_sala.pop(sala, None)
+
+    def limites(self):
+        return {
+            evento: {escopo: limite for escopo, limite in (('conexao', regra.conexao), ('sala', regra.sala)) if limite}
+            for evento, regra in self.regras.items()
+        }
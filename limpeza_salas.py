@@ -0,0 +1,136 @@
+"""
+Limpeza periódica das salas: expira salas abandonadas e limita o total
+
+Configuração (variáveis de ambiente, em segundos):
+- SALAS_TTL_OCIOSA: tempo sem atividade até remover uma sala (padrão 2h; 0 = nunca)
+- SALAS_TTL_FINALIZADA: idem para salas com o jogo terminado (padrão 10 min)
+- SALAS_MAXIMO: número máximo de salas; acima dele saem as usadas há mais tempo (0 = sem limite)
+- SALAS_INTERVALO_LIMPEZA: intervalo entre varreduras (padrão 60)
+- JOGADOR_TOLERANCIA_DESCONEXAO: tempo que um jogador desconectado mantém a vaga
+  antes de ser removido da partida (padrão 120; 0 = nunca remover)
+"""
+import heapq
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+TTL_OCIOSA_PADRAO = float(os.environ.get('SALAS_TTL_OCIOSA', 2 * 60 * 60))
+TTL_FINALIZADA_PADRAO = float(os.environ.get('SALAS_TTL_FINALIZADA', 10 * 60))
+MAXIMO_PADRAO = int(os.environ.get('SALAS_MAXIMO', 0))
+INTERVALO_PADRAO = float(os.environ.get('SALAS_INTERVALO_LIMPEZA', 60))
+TOLERANCIA_DESCONEXAO_PADRAO = float(os.environ.get('JOGADOR_TOLERANCIA_DESCONEXAO', 120))
+
+
+class LimpadorSalas:
+    """Remove do armazém as salas expiradas ou excedentes e conta as remoções
+
+    Também remove das partidas os jogadores desconectados há mais tempo que a
+    tolerância. `ao_remover(codigo, motivo)` é chamado após cada remoção de
+    sala, com motivo 'ociosa', 'finalizada', 'limite' ou 'vazia' (todos os
+    jogadores expiraram); `ao_remover_jogadores(codigo, partida, nomes)` é
+    chamado dentro da transação que tirou os jogadores da partida.
+    """
+
+    def __init__(self, salas, ao_remover=None, ao_remover_jogadores=None, ttl_ociosa=TTL_OCIOSA_PADRAO,
+                 ttl_finalizada=TTL_FINALIZADA_PADRAO, maximo=MAXIMO_PADRAO, intervalo=INTERVALO_PADRAO,
+                 tolerancia_desconexao=TOLERANCIA_DESCONEXAO_PADRAO):
+        self.salas = salas
+        self.ao_remover = ao_remover
+        self.ao_remover_jogadores = ao_remover_jogadores
+        self.ttl_ociosa = ttl_ociosa
+        self.ttl_finalizada = ttl_finalizada
+        self.maximo = maximo
+        self.intervalo = intervalo
+        self.tolerancia_desconexao = tolerancia_desconexao
+        self.remocoes = {'ociosa': 0, 'finalizada': 0, 'limite': 0, 'vazia': 0}
+        self.jogadores_removidos = 0
+        self.varreduras = 0
+        self._pid = None
+
+    def varrer(self, agora=None):
+        """Remove as salas expiradas e as excedentes; retorna quantas removeu"""
+        agora = agora or time.time()
+        vivas = []
+        removidas = 0
+        limite_desconexao = agora - self.tolerancia_desconexao
+        for codigo, atividade, finalizada, desconexao in self.salas.atividades():
+            ttl = self.ttl_finalizada if finalizada else self.ttl_ociosa
+            if ttl and agora - atividade > ttl:
+                self._remover(codigo, 'finalizada' if finalizada else 'ociosa')
+                removidas += 1
+            elif self.tolerancia_desconexao and desconexao is not None and desconexao < limite_desconexao \
+                    and self._remover_desconectados(codigo, limite_desconexao):
+                removidas += 1
+            else:
+                vivas.append((atividade, codigo))
+        self.varreduras += 1
+        return removidas + self._aplicar_limite(vivas)
+
+    def aplicar_limite(self):
+        """Remove as salas usadas há mais tempo enquanto o total passar do máximo"""
+        if not self.maximo or len(self.salas) <= self.maximo:
+            return 0
+        return self._aplicar_limite([(atividade, codigo) for codigo, atividade, _, _ in self.salas.atividades()])
+
+    def _aplicar_limite(self, vivas):
+        excesso = len(vivas) - self.maximo if self.maximo else 0
+        if excesso <= 0:
+            return 0
+        for _, codigo in heapq.nsmallest(excesso, vivas):
+            self._remover(codigo, 'limite')
+        return excesso
+
+    def _remover_desconectados(self, codigo, limite):
+        """Tira da partida quem caiu antes de `limite`; retorna True se a sala ficou vazia e foi removida"""
+        with self.salas.transacao(codigo) as partida:
+            if partida is None:
+                return False
+            nomes = partida.jogadores_expirados(limite)
+            for nome in nomes:
+                partida.remover_jogador(nome)
+            vazia = not partida.jogadores
+            if nomes and not vazia and self.ao_remover_jogadores:
+                self.ao_remover_jogadores(codigo, partida, nomes)
+        
+        if nomes:
+            self.jogadores_removidos += len(nomes)
+            logger.info('Jogadores desconectados removidos da sala %s: %s', codigo, ', '.join(nomes))
+        if vazia:
+            self._remover(codigo, 'vazia')
+        return vazia
+
+    def _remover(self, codigo, motivo):
+        self.salas.remover(codigo)
+        self.remocoes[motivo] += 1
+        logger.info('Sala %s removida pela limpeza (%s)', codigo, motivo)
+        if self.ao_remover:
+            self.ao_remover(codigo, motivo)
+
+    def iniciar(self, socketio):
+        """Inicia a varredura em segundo plano, uma vez por processo (chamar já no worker)"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        socketio.start_background_task(self._executar, socketio)
+
+    def _executar(self, socketio):
+        while True:
+            socketio.sleep(self.intervalo)
+            try:
+                self.varrer()
+            except Exception as e:
+                logger.error('Erro na limpeza de salas: %s', e)
+
+    def estatisticas(self):
+        return {
+            'salas': len(self.salas),
+            'maximo': self.maximo,
+            'ttl_ociosa': self.ttl_ociosa,
+            'ttl_finalizada': self.ttl_finalizada,
+            'tolerancia_desconexao': self.tolerancia_desconexao,
+            'varreduras': self.varreduras,
+            'remocoes': dict(self.remocoes),
+            'jogadores_removidos': self.jogadores_removidos
+        }
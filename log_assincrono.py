@@ -0,0 +1,208 @@
+"""
+Logs fora do caminho dos eventos: fila em memória, escritor dedicado e amostragem
+
+Os handlers só enfileiram o registro (sem formatar); uma thread do sistema
+operacional, fora do loop do gevent, formata e escreve no stderr. Eventos
+frequentes usam `registrar_evento`, que grava campos chave=valor e pode ser
+amostrado por tipo: com taxa 0.1, só 1 em cada 10 eventos daquele tipo vira
+linha de log (a linha traz `amostragem=0.1` para permitir estimar o total).
+
+Configuração (variáveis de ambiente):
+- LOG_NIVEL: nível mínimo (padrão INFO)
+- LOG_ASSINCRONO: 1 usa a fila e o escritor dedicado, 0 escreve na hora (padrão 1)
+- LOG_FILA_MAXIMO: registros pendentes acima dos quais os novos são descartados (padrão 10000)
+- LOG_AMOSTRAGEM: taxas por tipo de evento, ex.: tentativa=0.1,mensagem_chat=0,emoji=0.01
+"""
+import atexit
+import json
+import logging
+import os
+import random
+
+try:
+    from gevent.monkey import get_original
+except ImportError:  # Sem gevent: thread e fila da biblioteca padrão
+    import _thread
+    import queue
+    _iniciar_thread = _thread.start_new_thread
+    _Fila = queue.SimpleQueue
+    _Trava = _thread.RLock
+else:
+    # Thread e fila reais mesmo depois do monkey patch: a escrita não ocupa o loop do gevent.
+    # Direto do _thread: a classe threading.Thread usa os auxiliares do módulo, que o gevent troca
+    _iniciar_thread = get_original('_thread', 'start_new_thread')
+    _Fila = get_original('queue', 'SimpleQueue')
+    _Trava = get_original('_thread', 'RLock')
+
+FORMATO = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+# Eventos frequentes: fração que vira linha de log (1 = todos)
+AMOSTRAGEM_PADRAO = {
+    'conexao': 1.0,
+    'desconexao': 1.0,
+    'tentativa': 0.1,
+    'mensagem_chat': 0.1,
+    'emoji': 0.01
+}
+
+
+def carregar_amostragem(texto=None):
+    """Taxas padrão com os ajustes de LOG_AMOSTRAGEM aplicados"""
+    taxas = dict(AMOSTRAGEM_PADRAO)
+    if texto is None:
+        texto = os.environ.get('LOG_AMOSTRAGEM', '')
+    for item in texto.split(','):
+        if not item.strip():
+            continue
+        tipo, _, taxa = item.partition('=')
+        try:
+            taxas[tipo.strip()] = min(1.0, max(0.0, float(taxa)))
+        except ValueError:
+            raise ValueError(f'LOG_AMOSTRAGEM inválido: {item!r} (use tipo=taxa)')
+    return taxas
+
+
+AMOSTRAGEM = carregar_amostragem()
+
+
+def _valor(valor):
+    texto = str(valor)
+    if not texto or ' ' in texto or '=' in texto or '"' in texto:
+        return json.dumps(texto, ensure_ascii=False)
+    return texto
+
+
+class FormatoChaveValor(logging.Formatter):
+    """Formato padrão seguido dos campos do evento como chave=valor"""
+
+    def format(self, record):
+        texto = super().format(record)
+        campos = getattr(record, 'campos', None)
+        if campos:
+            texto += ' ' + ' '.join(f'{chave}={_valor(valor)}' for chave, valor in campos.items())
+        return texto
+
+
+class HandlerFila(logging.Handler):
+    """Enfileira o registro sem formatar; quem formata é o escritor"""
+
+    def __init__(self, escritor):
+        super().__init__()
+        self.escritor = escritor
+
+    def emit(self, record):
+        if record.exc_info:
+            # O traceback não pode esperar: formata agora e descarta a referência
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.escritor.enfileirar(record)
+
+
+class EscritorLogs:
+    """Thread que esvazia a fila de registros nos handlers de saída"""
+
+    def __init__(self, handlers, maximo):
+        self.handlers = handlers
+        self.maximo = maximo
+        self.descartados = 0
+        self.escritos = 0
+        self.fila = None
+        self._confirmacoes = None  # O escritor avisa aqui que escreveu tudo até o pedido de parar
+
+    def iniciar(self):
+        self.fila = _Fila()
+        self._confirmacoes = _Fila()
+        _iniciar_thread(self._escrever, ())  # Sem join na saída do processo (como uma thread daemon)
+
+    def enfileirar(self, record):
+        if self.fila.qsize() >= self.maximo:
+            self.descartados += 1
+            return
+        self.fila.put(record)
+
+    def _escrever(self):
+        fila = self.fila
+        while True:
+            record = fila.get()
+            if record is None:
+                for handler in self.handlers:
+                    handler.flush()
+                self._confirmacoes.put(True)
+                continue
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            self.escritos += 1
+
+    def parar(self, timeout=2.0):
+        """Espera o que estiver na fila ser escrito (na saída do processo)"""
+        if self.fila is None:
+            return
+        self.fila.put(None)
+        try:
+            self._confirmacoes.get(timeout=timeout)
+        except Exception:  # queue.Empty: o escritor não terminou a tempo
+            pass
+
+    def reiniciar_apos_fork(self):
+        # A thread não sobrevive ao fork (workers do gunicorn): fila e thread novas no filho;
+        # o que estava na fila herdada é escrito pelo processo pai
+        self.descartados = 0
+        self.escritos = 0
+        self.iniciar()
+
+    def estatisticas(self):
+        return {
+            'pendentes': self.fila.qsize() if self.fila is not None else 0,
+            'escritos': self.escritos,
+            'descartados': self.descartados
+        }
+
+
+_escritor = None
+
+
+def configurar(stream=None):
+    """Configura o logging do processo (substitui o logging.basicConfig); saída padrão: stderr"""
+    global _escritor
+
+    saida = logging.StreamHandler(stream)
+    saida.setFormatter(FormatoChaveValor(FORMATO))
+    raiz = logging.getLogger()
+    raiz.setLevel(os.environ.get('LOG_NIVEL', 'INFO').upper())
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+
+    if os.environ.get('LOG_ASSINCRONO', '1') == '0':
+        raiz.addHandler(saida)
+        return
+
+    saida.lock = _Trava()  # Usado só pela thread do escritor
+    if _escritor is None:
+        _escritor = EscritorLogs([saida], int(os.environ.get('LOG_FILA_MAXIMO', 10000)))
+        _escritor.iniciar()
+        os.register_at_fork(after_in_child=_escritor.reiniciar_apos_fork)
+        atexit.register(_escritor.parar)
+    else:
+        _escritor.handlers = [saida]
+    raiz.addHandler(HandlerFila(_escritor))
+
+
+def registrar_evento(logger, tipo, nivel=logging.INFO, **campos):
+    """Registra um evento frequente com campos chave=valor, respeitando a amostragem do tipo
+
+    Nada é formatado aqui: se o evento ficar fora da amostra, o custo é um
+    sorteio; se entrar, só o registro é enfileirado.
+    """
+    taxa = AMOSTRAGEM.get(tipo, 1.0)
+    if taxa < 1.0:
+        if random.random() >= taxa:
+            return
+        campos['amostragem'] = taxa
+    if logger.isEnabledFor(nivel):
+        logger.log(nivel, tipo, extra={'campos': campos})
+
+
+def estatisticas():
+    """Contadores da fila de logs (vazio com LOG_ASSINCRONO=0)"""
+    return _escritor.estatisticas() if _escritor is not None else {}
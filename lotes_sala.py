@@ -0,0 +1,67 @@
+"""
+Entrega em lote por sala: junta itens por uma janela curta e entrega todos de uma vez
+
+O primeiro item de uma sala abre a janela; quando ela fecha (ou o lote
+atinge o tamanho máximo) os itens pendentes são entregues juntos em uma
+única chamada de `entregar(sala, itens)`, ou seja, um único emit para a
+sala em vez de um por item. Os temporizadores são tarefas do Socket.IO
+(greenlets no gevent), então a entrega roda fora do contexto da requisição:
+use socketio.emit, não o emit do flask_socketio.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LotesPorSala:
+    """Itens pendentes por sala com entrega ao fim da janela
+
+    `janela` em segundos; `maximo` itens por lote (0 = sem limite, só a janela).
+    """
+
+    def __init__(self, socketio, entregar, janela, maximo=0):
+        self.socketio = socketio
+        self.entregar = entregar
+        self.janela = janela
+        self.maximo = maximo
+        self.pendentes = {}  # sala -> lista de itens da janela aberta
+        self.lotes = 0
+        self.itens = 0
+
+    def adicionar(self, sala, item):
+        itens = self.pendentes.get(sala)
+        if itens is None:
+            itens = self.pendentes[sala] = []
+            self.socketio.start_background_task(self._entregar_depois, sala, itens)
+        itens.append(item)
+        if self.maximo and len(itens) >= self.maximo:
+            self._entregar(sala, itens)
+
+    def _entregar_depois(self, sala, itens):
+        self.socketio.sleep(self.janela)
+        self._entregar(sala, itens)
+
+    def _entregar(self, sala, itens):
+        # O lote só é entregue uma vez: pelo tamanho máximo ou pela janela, o que vier antes
+        if self.pendentes.get(sala) is not itens:
+            return
+        del self.pendentes[sala]
+        self.lotes += 1
+        self.itens += len(itens)
+        try:
+            self.entregar(sala, itens)
+        except Exception as e:
+            logger.error('Erro ao entregar lote da sala %s: %s', sala, e)
+
+    def descartar(self, sala):
+        """Esquece os itens pendentes de uma sala removida"""
+        self.pendentes.pop(sala, None)
+
+    def estatisticas(self):
+        return {
+            'janela_ms': round(self.janela * 1000, 1),
+            'maximo': self.maximo,
+            'lotes': self.lotes,
+            'itens': self.itens,
+            'salas_pendentes': len(self.pendentes)
+        }
@@ -0,0 +1,157 @@
+"""
+Métricas do processo no formato de texto do Prometheus (exportadas em /metrics)
+
+A agregação é feita em memória e não aloca por evento: cada série (família +
+valor do rótulo) é criada uma única vez e depois só tem seus números
+incrementados. Quem está no caminho quente guarda a série obtida com
+`serie()` em vez de procurá-la a cada evento. Com vários workers, cada
+processo exporta as próprias métricas.
+"""
+from bisect import bisect_left
+
+# Limites (segundos) dos histogramas de latência dos handlers
+LIMITES_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Máximo de valores distintos por rótulo; o excedente é agregado em 'outros'
+MAXIMO_SERIES = 64
+
+
+class Contador:
+    __slots__ = ('valor',)
+
+    def __init__(self):
+        self.valor = 0
+
+    def incrementar(self, quantidade=1):
+        self.valor += quantidade
+
+
+class Histograma:
+    __slots__ = ('limites', 'contagens', 'soma', 'total')
+
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)  # Última posição: acima do maior limite
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+
+class Familia:
+    """Conjunto de séries de uma métrica, uma por valor do rótulo
+
+    Com vários rótulos, `rotulo` é uma tupla de nomes e cada valor uma tupla.
+    """
+
+    def __init__(self, nome, tipo, ajuda, rotulo=None, fabrica=Contador):
+        self.nome = nome
+        self.tipo = tipo
+        self.ajuda = ajuda
+        self.rotulo = rotulo
+        self.fabrica = fabrica
+        self.series = {}
+
+    def serie(self, valor=''):
+        serie = self.series.get(valor)
+        if serie is None:
+            if len(self.series) >= MAXIMO_SERIES:
+                valor = ('outros',) * len(self.rotulo) if isinstance(self.rotulo, tuple) else 'outros'
+                serie = self.series.get(valor)
+            if serie is None:
+                serie = self.series[valor] = self.fabrica()
+        return serie
+
+    def _rotulos(self, valor, le=None):
+        pares = []
+        if isinstance(self.rotulo, tuple):
+            pares.extend(f'{nome}="{parte}"' for nome, parte in zip(self.rotulo, valor))
+        elif self.rotulo:
+            pares.append(f'{self.rotulo}="{valor}"')
+        if le is not None:
+            pares.append(f'le="{le}"')
+        return '{' + ','.join(pares) + '}' if pares else ''
+
+    def exportar(self, linhas):
+        linhas.append(f'# HELP {self.nome} {self.ajuda}')
+        linhas.append(f'# TYPE {self.nome} {self.tipo}')
+        for valor, serie in sorted(self.series.items()):
+            if self.tipo == 'histogram':
+                acumulado = 0
+                for limite, contagem in zip(serie.limites, serie.contagens):
+                    acumulado += contagem
+                    linhas.append(f'{self.nome}_bucket{self._rotulos(valor, limite)} {acumulado}')
+                linhas.append(f'{self.nome}_bucket{self._rotulos(valor, "+Inf")} {serie.total}')
+                linhas.append(f'{self.nome}_sum{self._rotulos(valor)} {serie.soma}')
+                linhas.append(f'{self.nome}_count{self._rotulos(valor)} {serie.total}')
+            else:
+                linhas.append(f'{self.nome}{self._rotulos(valor)} {serie.valor}')
+
+
+class Medidor:
+    """Valor instantâneo calculado na hora da coleta (ex.: número de salas)"""
+
+    tipo = 'gauge'
+
+    def __init__(self, nome, ajuda, funcao):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.funcao = funcao
+
+    def exportar(self, linhas):
+        linhas.append(f'# HELP {self.nome} {self.ajuda}')
+        linhas.append(f'# TYPE {self.nome} gauge')
+        linhas.append(f'{self.nome} {self.funcao()}')
+
+
+_REGISTRO = []
+
+
+def contador(nome, ajuda, rotulo=None):
+    familia = Familia(nome, 'counter', ajuda, rotulo)
+    _REGISTRO.append(familia)
+    return familia
+
+
+def histograma(nome, ajuda, rotulo=None, limites=LIMITES_LATENCIA):
+    familia = Familia(nome, 'histogram', ajuda, rotulo, fabrica=lambda: Histograma(limites))
+    _REGISTRO.append(familia)
+    return familia
+
+
+def medidor(nome, ajuda, funcao):
+    _REGISTRO.append(Medidor(nome, ajuda, funcao))
+
+
+def exportar():
+    """Texto de todas as métricas registradas, no formato de exposição do Prometheus"""
+    linhas = []
+    for metrica in _REGISTRO:
+        metrica.exportar(linhas)
+    return '\n'.join(linhas) + '\n'
+
+
+# Métricas de socket e de jogo (os medidores de salas/jogadores são registrados pelo app)
+EMISSOES = contador('jogo_emits_total', 'Pacotes Socket.IO codificados para envio, por evento', 'evento')
+BYTES_EMITIDOS = contador('jogo_emit_bytes_total', 'Bytes de pacotes Socket.IO codificados, por evento', 'evento')
+LATENCIA_HANDLERS = histograma('jogo_handler_segundos', 'Duração dos handlers Socket.IO', 'handler')
+TENTATIVAS = contador('jogo_tentativas_total', 'Tentativas de adivinhar processadas', 'resultado')
+MENSAGENS_CHAT = contador('jogo_mensagens_chat_total', 'Mensagens de chat recebidas')
+EMOJIS = contador('jogo_emojis_total', 'Emojis enviados')
+
+_TENTATIVAS_ACERTO = TENTATIVAS.serie('acerto')
+_TENTATIVAS_ERRO = TENTATIVAS.serie('erro')
+
+
+def registrar_tentativa(acertou):
+    (_TENTATIVAS_ACERTO if acertou else _TENTATIVAS_ERRO).incrementar()
+
+
+def registrar_emissao(obj, texto):
+    """Chamado pela codificação de cada pacote: conta o pacote e os bytes pelo nome do evento"""
+    evento = obj[0] if type(obj) is list and obj and type(obj[0]) is str else '_controle'
+    EMISSOES.serie(evento).incrementar()
+    BYTES_EMITIDOS.serie(evento).incrementar(len(texto))  # ensure_ascii: caracteres == bytes
@@ -1,281 +1,397 @@
 import unicodedata
 import re
+import os
+from collections import OrderedDict
+from types import MappingProxyType
 
-class NormalizadorTexto:
-    def __init__(self):
-        # Dicionário de correções comuns do português brasileiro
-        self.correcoes = {
-            # Palavras com til
-            'nao': 'não',
-            'mae': 'mãe',
-            'pao': 'pão',
-            'irmao': 'irmão',
-            'limao': 'limão',
-            'coracoes': 'corações',
-            'acoes': 'ações',
-            'opcoes': 'opções',
-            'informacoes': 'informações',
-            'situacoes': 'situações',
-            'tradicoes': 'tradições',
-            'emocoes': 'emoções',
-            'revolucoes': 'revoluções',
-            'solucoes': 'soluções',
-            'questoes': 'questões',
-            'decisoes': 'decisões',
-            'impressoes': 'impressões',
-            'dimensoes': 'dimensões',
-            'extensoes': 'extensões',
-            'tensoes': 'tensões',
-            'pensoes': 'pensões',
-            'mansoes': 'mansões',
-            'versoes': 'versões',
-            'diversoes': 'diversões',
-            'ilusoes': 'ilusões',
-            'conclusoes': 'conclusões',
-            'exclusoes': 'exclusões',
-            'inclusoes': 'inclusões',
-            'explosoes': 'explosões',
-            'erosoes': 'erosões',
-            'corrosoes': 'corrosões',
-            'fusoes': 'fusões',
-            'confusoes': 'confusões',
-            'difusoes': 'difusões',
-            'transfusoes': 'transfusões',
-            'intrusoes': 'intrusões',
-            'extrusoes': 'extrusões',
-            'oclusoes': 'oclusões',
-            'reclusoes': 'reclusões',
-            'seclusoes': 'seclusões',
-            'alusoes': 'alusões',
-            'ilusoes': 'ilusões',
-            'delusoes': 'delusões',
-            'colisoes': 'colisões',
-            'precisoes': 'precisões',
-            'decisoes': 'decisões',
-            'incisoes': 'incisões',
-            'divisoes': 'divisões',
-            'revisoes': 'revisões',
-            'previsoes': 'previsões',
-            'provisoes': 'provisões',
-            'televisoes': 'televisões',
-            'supervisoes': 'supervisões',
-            'visoes': 'visões',
-            'ocasioes': 'ocasiões',
-            'persuasoes': 'persuasões',
-            'invasoes': 'invasões',
-            'evasoes': 'evasões',
-            
-            # Palavras com acento agudo
-            'voce': 'você',
-            'cafe': 'café',
-            'pe': 'pé',
-            'fe': 'fé',
-            'cha': 'chá',
-            'la': 'lá',
-            'ca': 'cá',
-            'ja': 'já',
-            'so': 'só',
-            'nos': 'nós',
-            'pos': 'pós',
-            'apos': 'após',
-            'atraves': 'através',
-            'alem': 'além',
-            'porem': 'porém',
-            'tambem': 'também',
-            'ninguem': 'ninguém',
-            'alguem': 'alguém',
-            'parabens': 'parabéns',
-            'refens': 'reféns',
-            'armazens': 'armazéns',
-            'homens': 'homens',  # já correto
-            'jovens': 'jovens',  # já correto
-            'viagens': 'viagens',  # já correto
-            'imagens': 'imagens',  # já correto
-            'mensagens': 'mensagens',  # já correto
-            'vantagens': 'vantagens',  # já correto
-            'desvantagens': 'desvantagens',  # já correto
-            'bagagens': 'bagagens',  # já correto
-            'garagens': 'garagens',  # já correto
-            'miragens': 'miragens',  # já correto
-            'coragens': 'coragens',  # já correto
-            'selvagens': 'selvagens',  # já correto
-            
-            # Palavras com cedilha
-            'acao': 'ação',
-            'coracao': 'coração',
-            'opcao': 'opção',
-            'informacao': 'informação',
-            'educacao': 'educação',
-            'situacao': 'situação',
-            'tradicao': 'tradição',
-            'emocao': 'emoção',
-            'devocao': 'devoção',
-            'revolucao': 'revolução',
-            'solucao': 'solução',
-            'questao': 'questão',
-            'decisao': 'decisão',
-            'impressao': 'impressão',
-            'dimensao': 'dimensão',
-            'extensao': 'extensão',
-            'tensao': 'tensão',
-            'pensao': 'pensão',
-            'mansao': 'mansão',
-            'versao': 'versão',
-            'diversao': 'diversão',
-            'ilusao': 'ilusão',
-            'conclusao': 'conclusão',
-            'exclusao': 'exclusão',
-            'inclusao': 'inclusão',
-            'explosao': 'explosão',
-            'erosao': 'erosão',
-            'corrosao': 'corrosão',
-            'fusao': 'fusão',
-            'confusao': 'confusão',
-            'difusao': 'difusão',
-            'transfusao': 'transfusão',
-            'intrusao': 'intrusão',
-            'extrusao': 'extrusão',
-            'oclusao': 'oclusão',
-            'reclusao': 'reclusão',
-            'seclusao': 'seclusão',
-            'alusao': 'alusão',
-            'delusao': 'delusão',
-            'colisao': 'colisão',
-            'precisao': 'precisão',
-            'incisao': 'incisão',
-            'divisao': 'divisão',
-            'revisao': 'revisão',
-            'previsao': 'previsão',
-            'provisao': 'provisão',
-            'televisao': 'televisão',
-            'supervisao': 'supervisão',
-            'visao': 'visão',
-            'ocasiao': 'ocasião',
-            'persuasao': 'persuasão',
-            'invasao': 'invasão',
-            'evasao': 'evasão',
-            
-            # Palavras com acento circunflexo
-            'voce': 'você',
-            'tres': 'três',
-            'mes': 'mês',
-            'pes': 'pés',
-            'meses': 'meses',  # já correto
-            'paises': 'países',
-            'ingles': 'inglês',
-            'portugues': 'português',
-            'frances': 'francês',
-            'japones': 'japonês',
-            'chines': 'chinês',
-            'alemao': 'alemão',
-            'interesse': 'interesse',  # já correto
-            'interesses': 'interesses',  # já correto
-            
-            # Palavras comuns com acentos diversos
-            'agua': 'água',
-            'aguia': 'águia',
-            'area': 'área',
-            'ideia': 'ideia',  # já correto (nova ortografia)
-            'ideias': 'ideias',  # já correto (nova ortografia)
-            'heroi': 'herói',
-            'heroina': 'heroína',
-            'historia': 'história',
-            'historias': 'histórias',
-            'memoria': 'memória',
-            'memorias': 'memórias',
-            'vitoria': 'vitória',
-            'vitorias': 'vitórias',
-            'gloria': 'glória',
-            'glorias': 'glórias',
-            'categoria': 'categoria',  # já correto
-            'categorias': 'categorias',  # já correto
-            'secretaria': 'secretaria',  # já correto
-            'secretarias': 'secretarias',  # já correto
-            'primaria': 'primária',
-            'primarias': 'primárias',
-            'secundaria': 'secundária',
-            'secundarias': 'secundárias',
-            'universitaria': 'universitária',
-            'universitarias': 'universitárias',
-            'necessaria': 'necessária',
-            'necessarias': 'necessárias',
-            'voluntaria': 'voluntária',
-            'voluntarias': 'voluntárias',
-            'solitaria': 'solitária',
-            'solitarias': 'solitárias',
-            'imaginaria': 'imaginária',
-            'imaginarias': 'imaginárias',
-            'ordinaria': 'ordinária',
-            'ordinarias': 'ordinárias',
-            'extraordinaria': 'extraordinária',
-            'extraordinarias': 'extraordinárias',
-            
-            # Palavras com trema (antiga ortografia, mas ainda usadas)
-            'linguica': 'linguiça',
-            'cinquenta': 'cinquenta',  # já correto
-            'frequente': 'frequente',  # já correto (nova ortografia)
-            'frequencia': 'frequência',
-            'consequencia': 'consequência',
-            'sequencia': 'sequência',
-            'eloquencia': 'eloquência',
-            'delinquencia': 'delinquência',
-            'tranquilo': 'tranquilo',  # já correto (nova ortografia)
-            'tranquilidade': 'tranquilidade',  # já correto (nova ortografia)
-            
-            # Contrações e palavras compostas comuns
-            'dele': 'dele',  # já correto
-            'dela': 'dela',  # já correto
-            'deles': 'deles',  # já correto
-            'delas': 'delas',  # já correto
-            'nele': 'nele',  # já correto
-            'nela': 'nela',  # já correto
-            'neles': 'neles',  # já correto
-            'nelas': 'nelas',  # já correto
-            'pelo': 'pelo',  # já correto
-            'pela': 'pela',  # já correto
-            'pelos': 'pelos',  # já correto
-            'pelas': 'pelas',  # já correto
-            
-            # Verbos conjugados comuns
-            'esta': 'está',
-            'estao': 'estão',
-            'sao': 'são',
-            'tem': 'tem',  # já correto (singular)
-            'teem': 'têm',  # plural (antiga ortografia)
-            'tem': 'têm',   # plural (nova ortografia)
-            'vem': 'vem',   # já correto (singular)
-            'veem': 'vêm',  # plural (antiga ortografia)
-            'vem': 'vêm',   # plural (nova ortografia)
-            'da': 'dá',     # verbo dar
-            'das': 'das',   # já correto (artigo/preposição)
-            'de': 'dê',     # verbo dar (imperativo)
-            'le': 'lê',     # verbo ler
-            'leem': 'leem', # já correto (nova ortografia)
-            've': 'vê',     # verbo ver
-            'veem': 'veem', # já correto (nova ortografia)
-            'creem': 'creem', # já correto (nova ortografia)
-            'deem': 'deem',   # já correto (nova ortografia)
-            'leem': 'leem',   # já correto (nova ortografia)
-            'veem': 'veem',   # já correto (nova ortografia)
-            'descreem': 'descreem', # já correto (nova ortografia)
-            'releem': 'releem',     # já correto (nova ortografia)
-            'preveem': 'preveem',   # já correto (nova ortografia)
-            'proveem': 'proveem',   # já correto (nova ortografia)
-            'reveem': 'reveem',     # já correto (nova ortografia)
-        }
-        
-        # Padrões regex para identificar tipos de palavras
-        self.padroes = {
-            'acao_cao': re.compile(r'(.+)cao$'),  # palavras terminadas em -ção
-            'plural_oes': re.compile(r'(.+)oes$'),  # plurais terminados em -ões
-            'til_ao': re.compile(r'(.+)ao$'),  # palavras terminadas em -ão
+# Tabelas do normalizador: construídas uma única vez na importação e
+# compartilhadas (somente leitura) por todas as salas e jogadores.
+
+# Dicionário de correções comuns do português brasileiro
+_CORRECOES = MappingProxyType({
+    # Palavras com til
+    'nao': 'não',
+    'mae': 'mãe',
+    'pao': 'pão',
+    'irmao': 'irmão',
+    'limao': 'limão',
+    'coracoes': 'corações',
+    'acoes': 'ações',
+    'opcoes': 'opções',
+    'informacoes': 'informações',
+    'situacoes': 'situações',
+    'tradicoes': 'tradições',
+    'emocoes': 'emoções',
+    'revolucoes': 'revoluções',
+    'solucoes': 'soluções',
+    'questoes': 'questões',
+    'decisoes': 'decisões',
+    'impressoes': 'impressões',
+    'dimensoes': 'dimensões',
+    'extensoes': 'extensões',
+    'tensoes': 'tensões',
+    'pensoes': 'pensões',
+    'mansoes': 'mansões',
+    'versoes': 'versões',
+    'diversoes': 'diversões',
+    'ilusoes': 'ilusões',
+    'conclusoes': 'conclusões',
+    'exclusoes': 'exclusões',
+    'inclusoes': 'inclusões',
+    'explosoes': 'explosões',
+    'erosoes': 'erosões',
+    'corrosoes': 'corrosões',
+    'fusoes': 'fusões',
+    'confusoes': 'confusões',
+    'difusoes': 'difusões',
+    'transfusoes': 'transfusões',
+    'intrusoes': 'intrusões',
+    'extrusoes': 'extrusões',
+    'oclusoes': 'oclusões',
+    'reclusoes': 'reclusões',
+    'seclusoes': 'seclusões',
+    'alusoes': 'alusões',
+    'ilusoes': 'ilusões',
+    'delusoes': 'delusões',
+    'colisoes': 'colisões',
+    'precisoes': 'precisões',
+    'decisoes': 'decisões',
+    'incisoes': 'incisões',
+    'divisoes': 'divisões',
+    'revisoes': 'revisões',
+    'previsoes': 'previsões',
+    'provisoes': 'provisões',
+    'televisoes': 'televisões',
+    'supervisoes': 'supervisões',
+    'visoes': 'visões',
+    'ocasioes': 'ocasiões',
+    'persuasoes': 'persuasões',
+    'invasoes': 'invasões',
+    'evasoes': 'evasões',
+    
+    # Palavras com acento agudo
+    'voce': 'você',
+    'cafe': 'café',
+    'pe': 'pé',
+    'fe': 'fé',
+    'cha': 'chá',
+    'la': 'lá',
+    'ca': 'cá',
+    'ja': 'já',
+    'so': 'só',
+    'nos': 'nós',
+    'pos': 'pós',
+    'apos': 'após',
+    'atraves': 'através',
+    'alem': 'além',
+    'porem': 'porém',
+    'tambem': 'também',
+    'ninguem': 'ninguém',
+    'alguem': 'alguém',
+    'parabens': 'parabéns',
+    'refens': 'reféns',
+    'armazens': 'armazéns',
+    'homens': 'homens',  # já correto
+    'jovens': 'jovens',  # já correto
+    'viagens': 'viagens',  # já correto
+    'imagens': 'imagens',  # já correto
+    'mensagens': 'mensagens',  # já correto
+    'vantagens': 'vantagens',  # já correto
+    'desvantagens': 'desvantagens',  # já correto
+    'bagagens': 'bagagens',  # já correto
+    'garagens': 'garagens',  # já correto
+    'miragens': 'miragens',  # já correto
+    'coragens': 'coragens',  # já correto
+    'selvagens': 'selvagens',  # já correto
+    
+    # Palavras com cedilha
+    'acao': 'ação',
+    'coracao': 'coração',
+    'opcao': 'opção',
+    'informacao': 'informação',
+    'educacao': 'educação',
+    'situacao': 'situação',
+    'tradicao': 'tradição',
+    'emocao': 'emoção',
+    'devocao': 'devoção',
+    'revolucao': 'revolução',
+    'solucao': 'solução',
+    'questao': 'questão',
+    'decisao': 'decisão',
+    'impressao': 'impressão',
+    'dimensao': 'dimensão',
+    'extensao': 'extensão',
+    'tensao': 'tensão',
+    'pensao': 'pensão',
+    'mansao': 'mansão',
+    'versao': 'versão',
+    'diversao': 'diversão',
+    'ilusao': 'ilusão',
+    'conclusao': 'conclusão',
+    'exclusao': 'exclusão',
+    'inclusao': 'inclusão',
+    'explosao': 'explosão',
+    'erosao': 'erosão',
+    'corrosao': 'corrosão',
+    'fusao': 'fusão',
+    'confusao': 'confusão',
+    'difusao': 'difusão',
+    'transfusao': 'transfusão',
+    'intrusao': 'intrusão',
+    'extrusao': 'extrusão',
+    'oclusao': 'oclusão',
+    'reclusao': 'reclusão',
+    'seclusao': 'seclusão',
+    'alusao': 'alusão',
+    'delusao': 'delusão',
+    'colisao': 'colisão',
+    'precisao': 'precisão',
+    'incisao': 'incisão',
+    'divisao': 'divisão',
+    'revisao': 'revisão',
+    'previsao': 'previsão',
+    'provisao': 'provisão',
+    'televisao': 'televisão',
+    'supervisao': 'supervisão',
+    'visao': 'visão',
+    'ocasiao': 'ocasião',
+    'persuasao': 'persuasão',
+    'invasao': 'invasão',
+    'evasao': 'evasão',
+    
+    # Palavras com acento circunflexo
+    'voce': 'você',
+    'tres': 'três',
+    'mes': 'mês',
+    'pes': 'pés',
+    'meses': 'meses',  # já correto
+    'paises': 'países',
+    'ingles': 'inglês',
+    'portugues': 'português',
+    'frances': 'francês',
+    'japones': 'japonês',
+    'chines': 'chinês',
+    'alemao': 'alemão',
+    'interesse': 'interesse',  # já correto
+    'interesses': 'interesses',  # já correto
+    
+    # Palavras comuns com acentos diversos
+    'agua': 'água',
+    'aguia': 'águia',
+    'area': 'área',
+    'ideia': 'ideia',  # já correto (nova ortografia)
+    'ideias': 'ideias',  # já correto (nova ortografia)
+    'heroi': 'herói',
+    'heroina': 'heroína',
+    'historia': 'história',
+    'historias': 'histórias',
+    'memoria': 'memória',
+    'memorias': 'memórias',
+    'vitoria': 'vitória',
+    'vitorias': 'vitórias',
+    'gloria': 'glória',
+    'glorias': 'glórias',
+    'categoria': 'categoria',  # já correto
+    'categorias': 'categorias',  # já correto
+    'secretaria': 'secretaria',  # já correto
+    'secretarias': 'secretarias',  # já correto
+    'primaria': 'primária',
+    'primarias': 'primárias',
+    'secundaria': 'secundária',
+    'secundarias': 'secundárias',
+    'universitaria': 'universitária',
+    'universitarias': 'universitárias',
+    'necessaria': 'necessária',
+    'necessarias': 'necessárias',
+    'voluntaria': 'voluntária',
+    'voluntarias': 'voluntárias',
+    'solitaria': 'solitária',
+    'solitarias': 'solitárias',
+    'imaginaria': 'imaginária',
+    'imaginarias': 'imaginárias',
+    'ordinaria': 'ordinária',
+    'ordinarias': 'ordinárias',
+    'extraordinaria': 'extraordinária',
+    'extraordinarias': 'extraordinárias',
+    
+    # Palavras com trema (antiga ortografia, mas ainda usadas)
+    'linguica': 'linguiça',
+    'cinquenta': 'cinquenta',  # já correto
+    'frequente': 'frequente',  # já correto (nova ortografia)
+    'frequencia': 'frequência',
+    'consequencia': 'consequência',
+    'sequencia': 'sequência',
+    'eloquencia': 'eloquência',
+    'delinquencia': 'delinquência',
+    'tranquilo': 'tranquilo',  # já correto (nova ortografia)
+    'tranquilidade': 'tranquilidade',  # já correto (nova ortografia)
+    
+    # Contrações e palavras compostas comuns
+    'dele': 'dele',  # já correto
+    'dela': 'dela',  # já correto
+    'deles': 'deles',  # já correto
+    'delas': 'delas',  # já correto
+    'nele': 'nele',  # já correto
+    'nela': 'nela',  # já correto
+    'neles': 'neles',  # já correto
+    'nelas': 'nelas',  # já correto
+    'pelo': 'pelo',  # já correto
+    'pela': 'pela',  # já correto
+    'pelos': 'pelos',  # já correto
+    'pelas': 'pelas',  # já correto
+    
+    # Verbos conjugados comuns
+    'esta': 'está',
+    'estao': 'estão',
+    'sao': 'são',
+    'tem': 'tem',  # já correto (singular)
+    'teem': 'têm',  # plural (antiga ortografia)
+    'tem': 'têm',   # plural (nova ortografia)
+    'vem': 'vem',   # já correto (singular)
+    'veem': 'vêm',  # plural (antiga ortografia)
+    'vem': 'vêm',   # plural (nova ortografia)
+    'da': 'dá',     # verbo dar
+    'das': 'das',   # já correto (artigo/preposição)
+    'de': 'dê',     # verbo dar (imperativo)
+    'le': 'lê',     # verbo ler
+    'leem': 'leem', # já correto (nova ortografia)
+    've': 'vê',     # verbo ver
+    'veem': 'veem', # já correto (nova ortografia)
+    'creem': 'creem', # já correto (nova ortografia)
+    'deem': 'deem',   # já correto (nova ortografia)
+    'leem': 'leem',   # já correto (nova ortografia)
+    'veem': 'veem',   # já correto (nova ortografia)
+    'descreem': 'descreem', # já correto (nova ortografia)
+    'releem': 'releem',     # já correto (nova ortografia)
+    'preveem': 'preveem',   # já correto (nova ortografia)
+    'proveem': 'proveem',   # já correto (nova ortografia)
+    'reveem': 'reveem',     # já correto (nova ortografia)
+})
+
+# Padrões regex para identificar tipos de palavras
+_PADROES = MappingProxyType({
+    'acao_cao': re.compile(r'(.+)cao$'),  # palavras terminadas em -ção
+    'plural_oes': re.compile(r'(.+)oes$'),  # plurais terminados em -ões
+    'til_ao': re.compile(r'(.+)ao$'),  # palavras terminadas em -ão
+})
+
+# Palavras que já terminam corretamente em 'ao'
+_PALAVRAS_AO_CORRETAS = frozenset(['mao', 'cao', 'sao', 'joao', 'sebastiao'])
+
+# Capacidade padrão de cada cache de memoização (0 desativa o cache)
+TAMANHO_CACHE_PADRAO = int(os.environ.get('NORMALIZADOR_CACHE_TAMANHO', 4096))
+
+# Textos mais longos que isto não entram nos caches: as chaves vêm dos
+# jogadores e um payload pode ter até ~1 MB; palavras de verdade são bem menores
+TEXTO_MAXIMO_CACHE = int(os.environ.get('NORMALIZADOR_CACHE_TEXTO_MAXIMO', 64))
+
+_AUSENTE = object()
+
+
+class CacheLRU:
+    """Cache limitado com remoção do item usado há mais tempo (LRU)
+
+    Usa apenas operações atômicas do OrderedDict, então pode ser compartilhado
+    entre greenlets e threads sem trava; os contadores são aproximados sob
+    concorrência real, o que basta para monitoramento.
+    """
+
+    def __init__(self, nome, tamanho_maximo=TAMANHO_CACHE_PADRAO):
+        self.nome = nome
+        self.tamanho_maximo = max(0, tamanho_maximo)
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self._dados = OrderedDict()
+
+    def obter(self, chave):
+        """Retorna o valor em cache ou _AUSENTE"""
+        try:
+            valor = self._dados[chave]
+            self._dados.move_to_end(chave)
+        except KeyError:
+            self.falhas += 1
+            return _AUSENTE
+        self.acertos += 1
+        return valor
+
+    def guardar(self, chave, valor):
+        """Guarda um valor, removendo os mais antigos se passar do limite"""
+        if not self.tamanho_maximo:
+            return
+        self._dados[chave] = valor
+        self._remover_excedentes()
+
+    def redimensionar(self, tamanho_maximo):
+        """Altera a capacidade do cache"""
+        self.tamanho_maximo = max(0, tamanho_maximo)
+        self._remover_excedentes()
+
+    def limpar(self):
+        """Esvazia o cache e zera os contadores"""
+        self._dados.clear()
+        self.acertos = self.falhas = self.remocoes = 0
+
+    def _remover_excedentes(self):
+        while len(self._dados) > self.tamanho_maximo:
+            try:
+                self._dados.popitem(last=False)
+            except KeyError:
+                break
+            self.remocoes += 1
+
+    def estatisticas(self):
+        """Retorna os contadores do cache"""
+        consultas = self.acertos + self.falhas
+        return {
+            'tamanho': len(self._dados),
+            'tamanho_maximo': self.tamanho_maximo,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'remocoes': self.remocoes,
+            'taxa_acerto': round(self.acertos / consultas, 4) if consultas else 0.0
         }
+
+
+_CACHE_NORMALIZAR = CacheLRU('normalizar')
+_CACHE_REMOVER_ACENTOS = CacheLRU('remover_acentos')
+_CACHE_CHAVE_COMPARACAO = CacheLRU('chave_comparacao')
+_CACHES = (_CACHE_NORMALIZAR, _CACHE_REMOVER_ACENTOS, _CACHE_CHAVE_COMPARACAO)
+
+
+def configurar_cache(tamanho_maximo):
+    """Define a capacidade de todos os caches do normalizador"""
+    for cache in _CACHES:
+        cache.redimensionar(tamanho_maximo)
+
+
+def estatisticas_cache():
+    """Retorna os contadores de cada cache do normalizador"""
+    return {cache.nome: cache.estatisticas() for cache in _CACHES}
+
+
+class NormalizadorTexto:
+    """Normalizador sem estado: todas as instâncias usam as mesmas tabelas imutáveis"""
+
+    __slots__ = ()
+
+    correcoes = _CORRECOES
+    padroes = _PADROES
     
     def normalizar(self, texto):
         """Normaliza texto aplicando correções automáticas"""
         if not texto:
             return texto
-            
+        if len(texto) > TEXTO_MAXIMO_CACHE:
+            return self._normalizar(texto)
+
+        resultado = _CACHE_NORMALIZAR.obter(texto)
+        if resultado is _AUSENTE:
+            resultado = self._normalizar(texto)
+            _CACHE_NORMALIZAR.guardar(texto, resultado)
+        return resultado
+
+    def _normalizar(self, texto):
         texto_original = texto
         texto = texto.lower().strip()
         
@@ -307,8 +423,7 @@ class NormalizadorTexto:
         if self.padroes['til_ao'].match(texto) and not texto.endswith('ão'):
             if texto.endswith('ao') and len(texto) > 2:
                 # Verificar se não é uma palavra que já termina corretamente em 'ao'
-                palavras_ao_corretas = ['mao', 'cao', 'sao', 'joao', 'sebastiao']
-                if texto not in palavras_ao_corretas:
+                if texto not in _PALAVRAS_AO_CORRETAS:
                     return texto[:-2] + 'ão'
         
         return texto
@@ -317,26 +432,38 @@ class NormalizadorTexto:
         """Compara duas palavras considerando variações de acentos"""
         if not palavra1 or not palavra2:
             return False
-            
-        # Normalizar ambas as palavras
-        norm1 = self.normalizar(palavra1)
-        norm2 = self.normalizar(palavra2)
-        
-        # Comparar versões normalizadas
-        if norm1.lower() == norm2.lower():
-            return True
-        
-        # Comparar também versões sem acentos
-        sem_acentos1 = self.remover_acentos(norm1.lower())
-        sem_acentos2 = self.remover_acentos(norm2.lower())
-        
-        return sem_acentos1 == sem_acentos2
+
+        # Versões normalizadas iguais também têm a mesma versão sem acentos,
+        # então basta comparar as chaves (normalizada + minúscula + sem acentos)
+        return self.chave_comparacao(palavra1) == self.chave_comparacao(palavra2)
+
+    def chave_comparacao(self, palavra):
+        """Retorna a chave canônica usada para comparar palavras"""
+        if not palavra:
+            return palavra
+        if len(palavra) > TEXTO_MAXIMO_CACHE:
+            return self.remover_acentos(self.normalizar(palavra).lower())
+
+        chave = _CACHE_CHAVE_COMPARACAO.obter(palavra)
+        if chave is _AUSENTE:
+            chave = self.remover_acentos(self.normalizar(palavra).lower())
+            _CACHE_CHAVE_COMPARACAO.guardar(palavra, chave)
+        return chave
     
     def remover_acentos(self, texto):
         """Remove acentos de um texto"""
         if not texto:
             return texto
-            
+        if len(texto) > TEXTO_MAXIMO_CACHE:
+            return self._remover_acentos(texto)
+
+        resultado = _CACHE_REMOVER_ACENTOS.obter(texto)
+        if resultado is _AUSENTE:
+            resultado = self._remover_acentos(texto)
+            _CACHE_REMOVER_ACENTOS.guardar(texto, resultado)
+        return resultado
+
+    def _remover_acentos(self, texto):
         # Normalizar para NFD (decompor caracteres acentuados)
         texto_nfd = unicodedata.normalize('NFD', texto)
         
@@ -365,3 +492,7 @@ class NormalizadorTexto:
     def foi_corrigida(self, palavra_original, palavra_normalizada):
         """Verifica se a palavra foi corrigida durante a normalização"""
         return palavra_original.lower().strip() != palavra_normalizada.lower().strip()
+
+
+# Instância compartilhada pelo processo inteiro (segura entre greenlets e threads)
+NORMALIZADOR = NormalizadorTexto()
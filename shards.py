@@ -0,0 +1,34 @@
+"""
+Divisão das salas entre processos (modo shard)
+
+Cada processo do jogo é dono de um subconjunto fixo das salas, escolhido pelo
+valor do código da sala (veja codigos_sala.py); o despachante (despachante.py)
+encaminha cada conexão para o processo dono. Assim o estado das partidas continua em memória, sem
+armazém compartilhado. Fora do modo shard (SHARD_TOTAL=1) todas as salas
+pertencem ao único processo.
+"""
+import os
+import zlib
+
+from codigos_sala import decodificar
+
+SHARD_INDICE = int(os.environ.get('SHARD_INDICE', 0))
+SHARD_TOTAL = int(os.environ.get('SHARD_TOTAL', 1))
+
+
+def shard_da_chave(chave, total=None):
+    """Índice do shard responsável por uma chave (código da sala ou afinidade)
+
+    Códigos de sala vão para o shard `valor % total`, a classe de onde o
+    alocador do shard tira seus códigos; outras chaves usam o hash.
+    """
+    total = total or SHARD_TOTAL
+    valor = decodificar(chave)
+    if valor is not None:
+        return valor % total
+    return zlib.crc32(chave.upper().encode('utf-8')) % total
+
+
+def pertence_a_este_shard(codigo):
+    """Indica se a sala com esse código deve ser criada/mantida neste processo"""
+    return SHARD_TOTAL <= 1 or shard_da_chave(codigo) == SHARD_INDICE
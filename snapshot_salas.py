@@ -0,0 +1,312 @@
+"""
+Snapshots das salas em memória: as partidas sobrevivem à troca do worker e a reinícios
+
+Todo deploy ou reinício do gunicorn (e a troca de um worker que morreu)
+começa um processo novo; com o armazém em memória, isso apagava todas as
+salas, inclusive os jogos em andamento. Aqui as salas são gravadas em um arquivo local
+periodicamente e ao encerrar o worker (hook worker_exit do gunicorn.conf.py),
+e restauradas quando o processo novo atende a primeira conexão.
+
+Formato do arquivo (little-endian):
+- cabeçalho: b'SALA', versão do formato (u16), versão do marshal (u16), número de salas (u32)
+- índice, uma entrada por sala: código (8 bytes), última atividade (f64),
+  desconexão mais antiga (f64, NaN = nenhuma), flags (u8), posição (u64) e
+  tamanho (u32) dos dados
+- dados: `partida.para_dict()` codificado com marshal, uma sala após a outra
+
+A restauração mapeia o arquivo na memória (mmap) e lê só o índice; cada sala
+é desserializada no primeiro acesso (veja ArmazemSalasMemoria), então o
+processo volta a atender na hora mesmo com dezenas de milhares de salas. Ao
+gravar, as salas sem alteração desde o último snapshot (mesma `revisao`) são
+copiadas do arquivo anterior em vez de serializadas de novo, e a gravação
+periódica devolve o controle ao loop a cada SALAS_POR_PAUSA salas (com
+dezenas de milhares de salas ela leva algumas centenas de ms no total).
+
+Se o processo morrer sem encerrar (sem o snapshot final), as ações
+posteriores ao último snapshot são recuperadas do diário (diario_salas.py).
+
+Os jogadores restaurados voltam desconectados (as conexões eram do processo
+antigo): a página reconecta sozinha e entra de novo na sala, dentro da
+tolerância de desconexão.
+
+Só se aplica ao armazém em memória; os compartilhados já guardam as salas
+fora do processo. No Render o sistema de arquivos (inclusive /tmp) é apagado a
+cada deploy: para as salas sobreviverem a deploys, o arquivo precisa ficar em
+um disco persistente (o render.yaml monta um em /var/data). Em /tmp só as
+trocas de worker sem deploy (reciclagem por max_requests, reinício do gunicorn) ficam cobertas.
+
+Configuração (variáveis de ambiente):
+- SNAPSHOT_CAMINHO: arquivo do snapshot (vazio = desligado, o padrão; o render.yaml
+  usa /var/data/jogo-salas.snap, no disco persistente). No modo shard cada shard grava o seu (sufixo -<índice>).
+- SNAPSHOT_INTERVALO: segundos entre os snapshots periódicos (padrão 30; 0 = só ao encerrar)
+"""
+import logging
+import marshal
+import math
+import mmap
+import os
+import struct
+import time
+
+from jogo import PartidaMultiplayer
+from shards import SHARD_INDICE, SHARD_TOTAL
+
+logger = logging.getLogger(__name__)
+
+MAGICO = b'SALA'
+VERSAO_FORMATO = 1
+CABECALHO = struct.Struct('<4sHHI')
+ENTRADA = struct.Struct('<8sddBQI')
+
+FINALIZADA = 1
+EM_ANDAMENTO = 2
+COM_JOGADORES = 4
+
+SALAS_POR_PAUSA = 1000
+
+INTERVALO_PADRAO = float(os.environ.get('SNAPSHOT_INTERVALO', 30))
+
+
+def caminho_padrao():
+    caminho = os.environ.get('SNAPSHOT_CAMINHO', '')
+    if caminho and SHARD_TOTAL > 1:
+        raiz, extensao = os.path.splitext(caminho)
+        caminho = f'{raiz}-{SHARD_INDICE}{extensao}'
+    return caminho
+
+
+def _flags(partida):
+    return ((FINALIZADA if partida.finalizada else 0) |
+            (EM_ANDAMENTO if partida.em_andamento else 0) |
+            (COM_JOGADORES if partida.jogadores else 0))
+
+
+class SalaAdiada:
+    """Sala restaurada que ainda não foi desserializada (aponta para os bytes no arquivo mapeado)"""
+
+    __slots__ = ('mapa', 'posicao', 'tamanho', 'ultima_atividade', 'desconexao_mais_antiga', 'flags', 'restaurada_em')
+
+    def __init__(self, mapa, posicao, tamanho, ultima_atividade, desconexao_mais_antiga, flags, restaurada_em):
+        self.mapa = mapa
+        self.posicao = posicao
+        self.tamanho = tamanho
+        self.ultima_atividade = ultima_atividade
+        self.desconexao_mais_antiga = desconexao_mais_antiga
+        self.flags = flags
+        self.restaurada_em = restaurada_em
+
+    @property
+    def finalizada(self):
+        return bool(self.flags & FINALIZADA)
+
+    @property
+    def em_andamento(self):
+        return bool(self.flags & EM_ANDAMENTO)
+
+    def bruto(self):
+        return self.mapa[self.posicao:self.posicao + self.tamanho]
+
+    def carregar(self):
+        """Desserializa a partida; os jogadores voltam desconectados desde a restauração"""
+        try:
+            partida = PartidaMultiplayer.de_dict(marshal.loads(self.bruto()))
+        except Exception as e:
+            logger.error('Sala do snapshot ilegível, descartada: %s', e)
+            return None
+        partida.ultima_atividade = self.ultima_atividade
+        for jogador in partida.jogadores:
+            jogador.sids = ()
+            if jogador.desconectado_em is None:
+                jogador.desconectado_em = self.restaurada_em
+        return partida
+
+
+class SnapshotSalas:
+    """Grava e restaura as salas de um ArmazemSalasMemoria"""
+
+    def __init__(self, armazem, caminho, intervalo=INTERVALO_PADRAO):
+        self.armazem = armazem
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self._pid = None
+        self._encerrado = False
+        self._mapa = None  # Último arquivo gravado/restaurado, mapeado na memória
+        self._gravadas = {}  # código -> (partida, revisão, posição, tamanho) no _mapa
+        self.gravacoes = 0
+        self.falhas = 0
+        self.ultima_gravacao = {}
+        self.restauracao = {}
+
+    def iniciar(self, socketio):
+        """Restaura as salas e inicia os snapshots periódicos, uma vez por processo (chamar já no worker)
+
+        Retorna True só na chamada que restaurou (a primeira do processo).
+        """
+        global _ativo
+        if self._pid == os.getpid():
+            return False
+        self._pid = os.getpid()
+        self._encerrado = False
+        _ativo = self
+        self.restaurar()
+        if self.intervalo > 0:
+            socketio.start_background_task(self._executar, socketio)
+        return True
+
+    def _executar(self, socketio):
+        while True:
+            socketio.sleep(self.intervalo)
+            try:
+                self.salvar(ceder=lambda: socketio.sleep(0))
+            except Exception as e:
+                self.falhas += 1
+                logger.error('Erro ao gravar o snapshot das salas: %s', e)
+
+    def restaurar(self):
+        """Lê o índice do snapshot e entrega as salas (adiadas) ao armazém; retorna quantas"""
+        inicio = time.perf_counter()
+        try:
+            with open(self.caminho, 'rb') as arquivo:
+                mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError: arquivo vazio
+            return 0
+
+        try:
+            magico, versao, versao_marshal, total = CABECALHO.unpack_from(mapa, 0)
+            if magico != MAGICO or versao != VERSAO_FORMATO or versao_marshal > marshal.version:
+                raise ValueError(f'formato {magico!r} v{versao}/marshal v{versao_marshal} não suportado')
+            fim_indice = CABECALHO.size + total * ENTRADA.size
+            if len(mapa) < fim_indice:
+                raise ValueError('arquivo truncado')
+            entradas = ENTRADA.iter_unpack(mapa[CABECALHO.size:fim_indice])
+        except (struct.error, ValueError) as e:
+            logger.error('Snapshot %s ignorado: %s', self.caminho, e)
+            return 0
+
+        agora = time.time()
+        adiadas = {}
+        for codigo, ultima_atividade, desconexao, flags, posicao, tamanho in entradas:
+            if flags & COM_JOGADORES:
+                # Todos ficam desconectados a partir de agora (os que já estavam mantêm o instante)
+                desconexao = agora if math.isnan(desconexao) else min(desconexao, agora)
+            elif math.isnan(desconexao):
+                desconexao = None
+            adiadas[codigo.rstrip(b'\0').decode('ascii')] = SalaAdiada(
+                mapa, posicao, tamanho, ultima_atividade, desconexao, flags, agora
+            )
+        self.armazem.restaurar(adiadas)
+        self._mapa = mapa
+        self._gravadas = {}
+
+        self.restauracao = {
+            'salas': len(adiadas),
+            'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1)
+        }
+        logger.info('%d salas restauradas de %s em %s ms', len(adiadas), self.caminho, self.restauracao['duracao_ms'])
+        return len(adiadas)
+
+    def salvar(self, ceder=None):
+        """Grava todas as salas do armazém (arquivo temporário + rename: nunca fica pela metade)
+
+        `ceder()` é chamado a cada SALAS_POR_PAUSA salas para os outros eventos
+        não esperarem a gravação inteira; salas alteradas durante a pausa
+        entram no snapshot seguinte.
+        """
+        inicio = time.perf_counter()
+        itens = self.armazem.itens()
+        entradas = []
+        gravadas = []
+        reaproveitadas = 0
+        temporario = f'{self.caminho}.{os.getpid()}.tmp'
+
+        with open(temporario, 'wb') as arquivo:
+            posicao = CABECALHO.size + ENTRADA.size * len(itens)
+            arquivo.seek(posicao)
+            for codigo, sala in itens:
+                if isinstance(sala, SalaAdiada):
+                    dados = sala.bruto()
+                    revisao = None
+                    ultima_atividade, desconexao, flags = sala.ultima_atividade, sala.desconexao_mais_antiga, sala.flags
+                else:
+                    revisao = sala.revisao
+                    anterior = self._gravadas.get(codigo)
+                    if anterior is not None and anterior[0] is sala and anterior[1] == revisao:
+                        dados = self._mapa[anterior[2]:anterior[2] + anterior[3]]
+                        reaproveitadas += 1
+                    else:
+                        dados = marshal.dumps(sala.para_dict())
+                    ultima_atividade, desconexao, flags = sala.ultima_atividade, sala.desconexao_mais_antiga, _flags(sala)
+                arquivo.write(dados)
+                entradas.append(ENTRADA.pack(
+                    codigo.encode('ascii'), ultima_atividade,
+                    math.nan if desconexao is None else desconexao, flags, posicao, len(dados)
+                ))
+                gravadas.append((codigo, sala, revisao, posicao, len(dados)))
+                posicao += len(dados)
+                if ceder is not None and len(gravadas) % SALAS_POR_PAUSA == 0:
+                    ceder()
+
+            arquivo.seek(0)
+            arquivo.write(CABECALHO.pack(MAGICO, VERSAO_FORMATO, marshal.version, len(entradas)))
+            arquivo.write(b''.join(entradas))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, self.caminho)
+
+        # As próximas gravações (e as salas ainda adiadas) passam a ler do arquivo novo
+        with open(self.caminho, 'rb') as arquivo:
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self._gravadas = {}
+        for codigo, sala, revisao, posicao, tamanho in gravadas:
+            if revisao is None:
+                sala.mapa, sala.posicao = self._mapa, posicao
+            else:
+                self._gravadas[codigo] = (sala, revisao, posicao, tamanho)
+
+        self.gravacoes += 1
+        self.ultima_gravacao = {
+            'salas': len(gravadas),
+            'reaproveitadas': reaproveitadas,
+            'bytes': posicao,
+            'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1),
+            'em': time.time()
+        }
+        return self.ultima_gravacao
+
+    def salvar_no_encerramento(self):
+        """Snapshot final do processo; só no processo que restaurou as salas e uma única vez"""
+        if self._pid != os.getpid() or self._encerrado:
+            return
+        self._encerrado = True
+        try:
+            gravacao = self.salvar()
+            logger.info('Snapshot de %d salas gravado ao encerrar em %s ms', gravacao['salas'], gravacao['duracao_ms'])
+        except Exception as e:
+            logger.error('Erro ao gravar o snapshot final das salas: %s', e)
+
+    def estatisticas(self):
+        return {
+            'caminho': self.caminho,
+            'intervalo': self.intervalo,
+            'gravacoes': self.gravacoes,
+            'falhas': self.falhas,
+            'ultima_gravacao': self.ultima_gravacao,
+            'restauracao': self.restauracao
+        }
+
+
+_ativo = None
+
+
+def criar_snapshot(armazem, caminho=None):
+    """SnapshotSalas para o armazém, ou None se desligado ou se o armazém já é compartilhado"""
+    caminho = caminho_padrao() if caminho is None else caminho
+    if not caminho or armazem.compartilhado:
+        return None
+    return SnapshotSalas(armazem, caminho)
+
+
+def salvar_no_encerramento():
+    """Grava o snapshot do processo atual, se houver (hook worker_exit do gunicorn)"""
+    if _ativo is not None:
+        _ativo.salvar_no_encerramento()
@@ -0,0 +1,121 @@
+"""
+Concorrência no ArmazemSalasSQLite: greenlets de um processo e vários processos na mesma sala
+
+Cada transação cede o loop do gevent no meio (como um emit no handler) e
+incrementa um contador da partida; no fim, o total lido do arquivo por um
+armazém novo tem que bater com o número de transações.
+"""
+import multiprocessing
+import sqlite3
+import time
+
+import gevent
+import gevent.event
+
+from armazem_salas import ArmazemSalasSQLite
+from jogo import Configuracao, PartidaMultiplayer
+
+CODIGO = 'SALA01'
+
+
+def incrementar(armazem, vezes):
+    for _ in range(vezes):
+        with armazem.transacao(CODIGO) as partida:
+            partida.numerar_evento_diario()
+            gevent.sleep(0.001)
+
+
+def trabalhador(armazem, greenlets, vezes):
+    gevent.joinall([gevent.spawn(incrementar, armazem, vezes) for _ in range(greenlets)], raise_error=True)
+
+
+def preparar(tmp_path):
+    caminho = str(tmp_path / 'salas.db')
+    armazem = ArmazemSalasSQLite(caminho)
+    assert armazem.criar(CODIGO, PartidaMultiplayer(Configuracao()))
+    return caminho, armazem
+
+
+def total_gravado(caminho):
+    return ArmazemSalasSQLite(caminho).obter(CODIGO).eventos_diario
+
+
+def test_greenlets_dividem_a_conexao_do_processo(tmp_path):
+    caminho, armazem = preparar(tmp_path)
+    trabalhador(armazem, greenlets=5, vezes=20)
+    assert total_gravado(caminho) == 100
+
+
+def test_processos_e_greenlets_na_mesma_sala(tmp_path):
+    caminho, armazem = preparar(tmp_path)
+    contexto = multiprocessing.get_context('fork')  # Como os workers do gunicorn com preload_app
+    processos = [contexto.Process(target=trabalhador, args=(armazem, 3, 15)) for _ in range(3)]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join(60)
+        assert processo.exitcode == 0
+    assert total_gravado(caminho) == 3 * 3 * 15
+
+
+def test_espera_pelo_banco_nao_trava_o_loop(tmp_path):
+    caminho, armazem = preparar(tmp_path)
+    # Outra conexão com a trava de escrita faz o papel de outro processo
+    outro = sqlite3.connect(caminho, isolation_level=None)
+    outro.execute('BEGIN IMMEDIATE')
+    batidas = []
+
+    def relogio():
+        while True:
+            batidas.append(time.monotonic())
+            gevent.sleep(0.01)
+
+    def soltar():
+        gevent.sleep(0.2)
+        outro.execute('COMMIT')
+
+    tarefas = [gevent.spawn(relogio), gevent.spawn(soltar)]
+    inicio = time.monotonic()
+    incrementar(armazem, 1)
+    espera = time.monotonic() - inicio
+    gevent.killall(tarefas)
+
+    assert espera >= 0.2
+    assert len(batidas) >= 10
+    assert total_gravado(caminho) == 1
+
+
+def test_transacao_suspensa_nao_segura_outra_sala(tmp_path):
+    caminho, armazem = preparar(tmp_path)
+    assert armazem.criar('SALA02', PartidaMultiplayer(Configuracao()))
+    liberar = gevent.event.Event()
+
+    def suspensa():
+        with armazem.transacao(CODIGO) as partida:
+            partida.numerar_evento_diario()
+            liberar.wait()
+
+    tarefa = gevent.spawn(suspensa)
+    gevent.sleep(0.01)
+    with gevent.Timeout(2):
+        with armazem.transacao('SALA02') as partida:
+            partida.numerar_evento_diario()
+    assert ArmazemSalasSQLite(caminho).obter('SALA02').eventos_diario == 1
+
+    liberar.set()
+    tarefa.join(2)
+    assert total_gravado(caminho) == 1
+
+
+def test_trava_de_processo_morto_expira(tmp_path):
+    caminho, armazem = preparar(tmp_path)
+    armazem.timeout_trava = 0.2
+    # Trava deixada por um processo que morreu no meio da transação
+    outro = sqlite3.connect(caminho, isolation_level=None)
+    outro.execute('INSERT INTO travas (codigo, dono, expira) VALUES (?, ?, ?)', (CODIGO, 'morto', time.time() + 0.2))
+
+    inicio = time.monotonic()
+    incrementar(armazem, 1)
+    assert time.monotonic() - inicio >= 0.15
+    assert total_gravado(caminho) == 1
+    assert outro.execute('SELECT COUNT(*) FROM travas').fetchone()[0] == 0
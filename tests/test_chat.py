@@ -0,0 +1,56 @@
+"""Paginação do histórico de chat por cursor, inclusive depois do buffer descartar as mais antigas"""
+from chat import LIMITE_PAGINA_MAXIMO, HistoricoChat
+
+
+def historico(total, capacidade=100):
+    chat = HistoricoChat(capacidade)
+    for i in range(1, total + 1):
+        chat.adicionar('Ana', f'm{i}')
+    return chat
+
+
+def ids(pagina):
+    return [mensagem['id'] for mensagem in pagina['mensagens']]
+
+
+def test_paginas_em_ordem_cronologica_ate_o_inicio():
+    chat = historico(7)
+    pagina = chat.pagina(limite=3)
+    assert ids(pagina) == [5, 6, 7]
+    assert pagina['cursor'] == 5
+
+    pagina = chat.pagina(pagina['cursor'], 3)
+    assert ids(pagina) == [2, 3, 4]
+    pagina = chat.pagina(pagina['cursor'], 3)
+    assert ids(pagina) == [1]
+    assert pagina['cursor'] is None
+
+
+def test_cursor_de_mensagem_ja_descartada():
+    chat = historico(10, capacidade=4)
+    assert len(chat) == 4
+    assert ids(chat.pagina(limite=2)) == [9, 10]
+    assert ids(chat.pagina(9, 10)) == [7, 8]
+    # O cursor aponta para antes do buffer: não há mais nada guardado
+    assert chat.pagina(5) == {'mensagens': [], 'cursor': None}
+    # Cursor além do último id: as mais recentes
+    assert ids(chat.pagina(99, 2)) == [9, 10]
+
+
+def test_limite_da_pagina_e_historico_vazio():
+    chat = historico(LIMITE_PAGINA_MAXIMO + 20, capacidade=LIMITE_PAGINA_MAXIMO + 20)
+    assert len(chat.pagina(limite=10_000)['mensagens']) == LIMITE_PAGINA_MAXIMO
+    assert ids(chat.pagina(limite='0')) == [LIMITE_PAGINA_MAXIMO + 20]
+
+    vazio = HistoricoChat()
+    assert vazio.pagina() == {'mensagens': [], 'cursor': None}
+    chat.limpar()
+    chat.adicionar('Bia', 'depois')
+    assert ids(chat.pagina()) == [LIMITE_PAGINA_MAXIMO + 21]
+
+
+def test_ida_e_volta_pelo_dict_mantem_os_ids():
+    chat = HistoricoChat.de_dict(historico(6, capacidade=4).para_dict())
+    assert ids(chat.pagina(8, 2)) == [5, 6]
+    assert chat.adicionar('Bia', 'nova')['id'] == 7
+    assert ids(chat.pagina(limite=4)) == [4, 5, 6, 7]
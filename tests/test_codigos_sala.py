@@ -0,0 +1,33 @@
+"""Alocador de códigos com salas restauradas: contam como em uso e nunca são entregues de novo"""
+from codigos_sala import AlocadorCodigos
+
+
+def alocador():
+    return AlocadorCodigos(semente='teste', quarentena=600)
+
+
+def test_codigos_restaurados_nao_sao_gerados_de_novo():
+    # Mesma chave e mesmo ponto de partida: os próximos códigos do contador são conhecidos
+    referencia, restaurado = alocador(), alocador()
+    restaurado._proximo = referencia._proximo
+    proximos = [referencia.alocar() for _ in range(5)]
+
+    restaurado.registrar_existentes(proximos[1:4])
+    assert restaurado.em_uso == 3
+    novos = [restaurado.alocar() for _ in range(2)]
+    assert novos == [proximos[0], proximos[4]]
+    assert restaurado.em_uso == 5
+
+
+def test_codigo_restaurado_liberado_so_volta_pela_quarentena():
+    referencia, restaurado = alocador(), alocador()
+    restaurado._proximo = referencia._proximo
+    codigo = referencia.alocar()
+
+    restaurado.registrar_existentes([codigo])
+    restaurado.registrar_existentes([codigo])  # Snapshot e diário podem trazer a mesma sala
+    assert restaurado.em_uso == 1
+    restaurado.liberar(codigo, agora=0)
+    assert restaurado.em_uso == 0
+    assert restaurado.alocar(agora=1) != codigo
+    assert restaurado.alocar(agora=601) == codigo
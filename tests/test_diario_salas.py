@@ -0,0 +1,132 @@
+"""
+Diário das salas: reprodução das jogadas e compactação do arquivo
+
+As ações são aplicadas à partida e anotadas no diário como os handlers do
+app.py fazem; um armazém novo recuperado só do arquivo tem que chegar ao mesmo
+jogo, antes e depois da compactação (e mesmo se a troca do arquivo falhar).
+"""
+import os
+import stat
+
+import diario_salas
+from armazem_salas import ArmazemSalasMemoria
+from diario_salas import DiarioSalas, ler_eventos
+from jogo import Configuracao, Jogador, PartidaMultiplayer
+
+CODIGO = 'DIAR01'
+PALAVRAS = {'Ana': ['casa', 'coracao', 'porta', 'mesa'], 'Bia': ['gato', 'cafe', 'rato', 'pato']}
+
+
+class SemTarefas:
+    """No lugar do socketio: a compactação é chamada pelo próprio teste"""
+
+    def start_background_task(self, *args):
+        pass
+
+
+def iniciar(caminho):
+    armazem = ArmazemSalasMemoria()
+    diario = DiarioSalas(armazem, caminho, fsync=False)
+    diario.iniciar(SemTarefas())
+    return armazem, diario
+
+
+def jogar_ate_o_meio(armazem, diario):
+    """Ana acerta uma palavra e erra a seguinte: é a vez da Bia"""
+    partida = PartidaMultiplayer(Configuracao(4, 2))
+    partida.codigo_sala = CODIGO
+    partida.criador = 'Ana'
+    for nome, palavras in PALAVRAS.items():
+        partida.adicionar_jogador(Jogador(nome, 4))
+        partida.conectar_jogador(nome, f'sid-{nome}')
+        if nome == 'Ana':
+            armazem.criar(CODIGO, partida)
+            diario.registrar(CODIGO, partida, 'criar', jogador=nome, num_palavras=4, max_jogadores=2)
+        else:
+            diario.registrar(CODIGO, partida, 'entrar', jogador=nome)
+    for nome, palavras in PALAVRAS.items():
+        partida.definir_palavras(partida.obter_jogador(nome), palavras)
+        diario.registrar(CODIGO, partida, 'palavras', jogador=nome, palavras=palavras)
+    partida.iniciar_jogo()
+    diario.registrar(CODIGO, partida, 'iniciar')
+    for palavra in ('café', 'xx'):
+        partida.tentar_adivinhar('Ana', palavra)
+        diario.registrar(CODIGO, partida, 'tentativa', jogador='Ana', palavra=palavra)
+    return partida
+
+
+def tentar(diario, partida, nome, palavra):
+    partida.tentar_adivinhar(nome, palavra)
+    diario.registrar(CODIGO, partida, 'tentativa', jogador=nome, palavra=palavra)
+
+
+def recuperada(caminho):
+    """Sala de um processo novo, só com o diário"""
+    armazem = ArmazemSalasMemoria()
+    diario = DiarioSalas(armazem, caminho)
+    diario.recuperar()
+    assert diario.recuperacao['divergencias'] == 0
+    return armazem.obter(CODIGO)
+
+
+def resumo(partida):
+    return (partida.turno_atual, partida.eventos_diario, partida.vencedor,
+            [(j.nome, j.palavra_atual_index, j.dicas) for j in partida.jogadores])
+
+
+def test_jogadas_voltam_do_diario(tmp_path):
+    caminho = str(tmp_path / 'salas.diario')
+    armazem, diario = iniciar(caminho)
+    partida = jogar_ate_o_meio(armazem, diario)
+    diario.parar()
+
+    sala = recuperada(caminho)
+    assert resumo(sala) == resumo(partida)
+    assert sala.get_jogador_da_vez().nome == 'Bia'
+    assert all(not jogador.conectado for jogador in sala.jogadores)
+    # As palavras secretas ficam no arquivo: só o dono lê
+    assert stat.S_IMODE(os.stat(caminho).st_mode) == 0o600
+
+
+def test_compactacao_guarda_a_base_e_os_eventos_seguintes(tmp_path):
+    caminho = str(tmp_path / 'salas.diario')
+    armazem, diario = iniciar(caminho)
+    partida = jogar_ate_o_meio(armazem, diario)
+    assert diario.compactar()['salas'] == 1
+    tentar(diario, partida, 'Bia', 'coração')  # Depois da marca: copiado para o arquivo novo
+    diario.parar()
+
+    assert diario.compactacoes == 1
+    eventos, _, incompleto = ler_eventos(caminho)
+    assert not incompleto
+    assert [evento['tipo'] for evento in eventos] == ['estado', 'tentativa']
+    assert os.path.exists(f'{caminho}.anterior')
+    assert resumo(recuperada(caminho)) == resumo(partida)
+
+    # Uma sala encerrada não volta, nem da base compactada
+    diario.registrar(CODIGO, None, 'encerrar', motivo='teste')
+    diario.parar()
+    assert recuperada(caminho) is None
+
+
+def test_falha_na_troca_mantem_o_diario_atual(tmp_path, monkeypatch):
+    caminho = str(tmp_path / 'salas.diario')
+    armazem, diario = iniciar(caminho)
+    partida = jogar_ate_o_meio(armazem, diario)
+
+    def sem_permissao(*args):
+        raise OSError('sem permissão')
+
+    # Falha depois da cópia, já na troca dos arquivos
+    monkeypatch.setattr(diario_salas.os, 'replace', sem_permissao)
+    diario.compactar()
+    diario.parar()
+    monkeypatch.undo()
+    assert (diario.compactacoes, diario.falhas) == (0, 1)
+    assert not os.path.exists(f'{caminho}.{os.getpid()}.tmp')
+
+    # A escrita continua no arquivo de antes
+    tentar(diario, partida, 'Bia', 'coração')
+    diario.parar()
+    assert diario.falhas == 1
+    assert resumo(recuperada(caminho)) == resumo(partida)
@@ -0,0 +1,107 @@
+"""
+Estado versionado pelos handlers: toda alteração sai em um patch para a sala
+
+Um cliente de teste aplica os patches como a página (aplicarPatchEstado) e
+confere que as versões são contíguas (`base` igual à versão que ele tem) e
+que o estado montado por patches bate com o de obter_estado, inclusive
+depois de terminar o jogo e começar outro, com o armazém em memória e com o SQLite.
+"""
+import json
+import os
+
+os.environ['LIMITES_ATIVOS'] = '0'  # Os eventos saem em rajada
+
+import pytest
+
+import app as servidor
+from armazem_salas import ArmazemSalasMemoria, ArmazemSalasSQLite
+
+PALAVRAS = {'Ana': ['casa', 'coracao', 'porta', 'mesa'], 'Bia': ['gato', 'cafe', 'rato', 'pato']}
+
+
+class Cliente:
+    """Cliente de teste que guarda o estado como a página: completo ou por patches"""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.socket = servidor.socketio.test_client(servidor.app)
+        self.estado = None
+
+    def emitir(self, evento, dados=None):
+        self.socket.emit(evento, dados or {})
+        return self.receber()
+
+    def receber(self):
+        eventos = {}
+        for pacote in self.socket.get_received():
+            dados = pacote['args'][0] if pacote['args'] else {}
+            if isinstance(dados, (str, bytes)):
+                dados = json.loads(dados)  # Payload pré-codificado
+            assert pacote['name'] != 'erro', dados
+            eventos[pacote['name']] = dados
+            if pacote['name'] in ('jogo_iniciado', 'estado_atualizado'):
+                self.estado = dados['estado']
+            elif pacote['name'] == 'jogo_reiniciado':
+                self.estado = None
+            elif self.estado is not None and dados.get('patch'):
+                self.aplicar(dados['patch'])
+        return eventos
+
+    def aplicar(self, patch):
+        assert patch['base'] == self.estado['versao'], f'lacuna de versão para {self.nome}'
+        self.estado.update(patch['campos'])
+        self.estado['versao'] = patch['versao']
+        for nome, jogador in patch['jogadores_alterados'].items():
+            for atual in self.estado['jogadores']:
+                if atual['nome'] == nome:
+                    atual.update(jogador)
+
+
+@pytest.fixture(params=['memoria', 'sqlite'])
+def armazem(request, tmp_path, monkeypatch):
+    salas = ArmazemSalasMemoria() if request.param == 'memoria' else ArmazemSalasSQLite(str(tmp_path / 'salas.db'))
+    monkeypatch.setattr(servidor, 'salas', salas)
+    return salas
+
+
+def comecar(ana, bia):
+    ana.emitir('enviar_palavras', {'palavras': PALAVRAS['Ana']})
+    bia.receber()
+    bia.emitir('enviar_palavras', {'palavras': PALAVRAS['Bia']})
+    ana.receber()
+    assert ana.estado['jogo_iniciado'] and bia.estado['jogo_iniciado']
+
+
+def test_novo_jogo_nao_serve_o_jogo_terminado(armazem):
+    ana, bia = Cliente('Ana'), Cliente('Bia')
+    codigo = ana.emitir('criar_sala', {'nome': 'Ana', 'num_palavras': 4, 'max_jogadores': 2})['sala_criada']['codigo']
+    bia.emitir('entrar_na_sala', {'sala': codigo, 'nome': 'Bia'})
+    ana.receber()
+    comecar(ana, bia)
+
+    # Ana acerta as palavras da Bia (a primeira já vem revelada) e vence
+    for palavra in PALAVRAS['Bia'][1:]:
+        assert ana.emitir('tentar_adivinhar', {'palavra': palavra})['resposta_tentativa']['acertou']
+        bia.receber()
+    assert ana.estado['vencedor'] == bia.estado['vencedor'] == 'Ana'
+
+    reiniciado = ana.emitir('novo_jogo')['jogo_reiniciado']
+    bia.receber()
+    estado = bia.emitir('obter_estado')['estado_atualizado']['estado']
+    assert estado['vencedor'] is None
+    assert not estado['jogo_iniciado']
+    # Nenhuma versão publicada sem patch (o armazém não publica sozinho no fim da transação)
+    assert estado['versao'] == reiniciado['patch']['versao']
+
+    # Antes do início, quem tem o estado continua acompanhando as versões
+    ana.emitir('obter_estado')
+    ana.emitir('enviar_palavras', {'palavras': PALAVRAS['Ana']})
+    bia.receber()
+    assert ana.estado == bia.estado == bia.emitir('obter_estado')['estado_atualizado']['estado']
+
+    bia.emitir('enviar_palavras', {'palavras': PALAVRAS['Bia']})
+    ana.receber()
+    assert ana.estado['jogo_iniciado'] and ana.estado['vencedor'] is None
+    assert not ana.emitir('tentar_adivinhar', {'palavra': 'xx'})['resposta_tentativa']['acertou']
+    bia.receber()
+    assert ana.estado == bia.estado == bia.emitir('obter_estado')['estado_atualizado']['estado']
@@ -0,0 +1,46 @@
+"""Rota /admin/instrumentacao: valores inválidos são recusados sem mudar a configuração"""
+import pytest
+from flask import Flask
+
+from instrumentacao import Instrumentacao
+
+TOKEN = 'segredo'
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setenv('ADMIN_TOKEN', TOKEN)
+    app = Flask(__name__)
+    instrumentacao = Instrumentacao()
+    instrumentacao.registrar_rota_admin(app)
+    cliente = app.test_client()
+
+    def enviar(dados):
+        return cliente.post('/admin/instrumentacao', json=dados, headers={'X-Admin-Token': TOKEN})
+    return instrumentacao, enviar
+
+
+def test_configuracao_valida_e_aplicada(admin):
+    instrumentacao, enviar = admin
+    resposta = enviar({'ativa': False, 'limite_lento_ms': '50.5', 'amostra_payload': 0})
+    assert resposta.status_code == 200
+    assert (instrumentacao.ativa, instrumentacao.limite_lento_ms, instrumentacao.amostra_payload) == (False, 50.5, 1)
+
+
+@pytest.mark.parametrize('dados', [
+    {'limite_lento_ms': 'rápido'},
+    {'limite_lento_ms': -1},
+    {'limite_lento_ms': float('nan')},
+    {'limite_lento_ms': None},
+    {'amostra_payload': 'infinity'},
+    {'amostra_payload': True},
+    {'ativa': False, 'limite_lento_ms': 10, 'amostra_payload': -4},
+    [1, 2],
+])
+def test_valor_invalido_responde_400(admin, dados):
+    instrumentacao, enviar = admin
+    antes = (instrumentacao.ativa, instrumentacao.limite_lento_ms, instrumentacao.amostra_payload)
+    resposta = enviar(dados)
+    assert resposta.status_code == 400
+    assert 'erro' in resposta.get_json()
+    assert (instrumentacao.ativa, instrumentacao.limite_lento_ms, instrumentacao.amostra_payload) == antes
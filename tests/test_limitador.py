@@ -0,0 +1,61 @@
+"""Baldes de fichas do limitador: rajada, reabastecimento, limite por sala e configuração"""
+import pytest
+
+from limitador import MENSAGENS, Limitador, Regra, carregar_limites
+
+
+def test_rajada_e_reabastecimento():
+    regra = Regra('tentar_adivinhar', {'conexao': (2, 3)})
+    assert [regra.consumir('sid', None, 0.0) for _ in range(4)] == [None, None, None, 'conexao']
+    # 2 fichas por segundo: meio segundo devolve uma ficha
+    assert regra.consumir('sid', None, 0.5) is None
+    assert regra.consumir('sid', None, 0.5) == 'conexao'
+    # Parado por muito tempo, o balde enche só até a rajada
+    assert [regra.consumir('sid', None, 100.0) for _ in range(4)] == [None, None, None, 'conexao']
+    # Outra conexão tem o próprio balde
+    assert regra.consumir('outro', None, 100.0) is None
+
+
+def test_limite_da_sala_divide_as_fichas_entre_as_conexoes():
+    regra = Regra('tentar_adivinhar', {'conexao': (1, 2), 'sala': (1, 3)})
+    resultados = [regra.consumir(sid, 'SALA', 0.0) for sid in ('a', 'b', 'c', 'd')]
+    assert resultados == [None, None, None, 'sala']
+    # A recusa pela sala não gasta a ficha da conexão
+    assert regra.baldes_conexao['d'].fichas == 2
+    # Sem sala (conexão fora de uma), só o limite da conexão vale
+    assert regra.consumir('e', None, 0.0) is None
+
+
+def test_limitador_recusa_com_a_mensagem_do_escopo(monkeypatch):
+    monkeypatch.setenv('LIMITES_ATIVOS', '1')
+    limitador = Limitador({'obter_estado': {'conexao': (1, 1)}, 'enviar_emoji': {'sala': (1, 1)}},
+                          sala_da_conexao=lambda sid: 'SALA')
+    estado, emoji = limitador.regra('obter_estado'), limitador.regra('enviar_emoji')
+    assert limitador.regra('novo_jogo') is None
+
+    assert limitador.permitir(estado, 'a') is None
+    assert limitador.permitir(estado, 'a') == MENSAGENS['conexao']
+    assert limitador.permitir(emoji, 'a') is None
+    assert limitador.permitir(emoji, 'b') == MENSAGENS['sala']
+
+    # Conexão e sala esquecidas voltam com o balde cheio
+    limitador.esquecer_conexao('a')
+    limitador.esquecer_sala('SALA')
+    assert limitador.permitir(estado, 'a') is None
+    assert limitador.permitir(emoji, 'b') is None
+
+    limitador.ativo = False
+    assert limitador.permitir(estado, 'a') is None
+
+
+def test_ajustes_de_limites_eventos():
+    limites = carregar_limites('tentar_adivinhar:conexao=2/4, enviar_emoji:sala=0, novo_jogo:sala=0.5')
+    assert limites['tentar_adivinhar']['conexao'] == (2.0, 4.0)
+    assert 'sala' not in limites['enviar_emoji']
+    assert limites['novo_jogo'] == {'sala': (0.5, 1.0)}
+    # Evento sem nenhum escopo some da lista
+    assert 'obter_estado' not in carregar_limites('obter_estado:conexao=0')
+
+    for texto in ('tentar_adivinhar=2/4', 'tentar_adivinhar:jogador=2/4', 'tentar_adivinhar:conexao=muito'):
+        with pytest.raises(ValueError):
+            carregar_limites(texto)
@@ -0,0 +1,62 @@
+"""Caches LRU do normalizador: acertos, remoção do mais antigo e textos longos fora do cache"""
+import pytest
+
+import normalizador
+from normalizador import CacheLRU, NormalizadorTexto, TEXTO_MAXIMO_CACHE, estatisticas_cache
+
+
+@pytest.fixture(autouse=True)
+def caches_vazios():
+    for cache in normalizador._CACHES:
+        cache.limpar()
+    yield
+    normalizador.configurar_cache(normalizador.TAMANHO_CACHE_PADRAO)
+
+
+def test_acertos_e_falhas():
+    cache = CacheLRU('teste', 2)
+    assert cache.obter('a') is normalizador._AUSENTE
+    cache.guardar('a', 1)
+    assert cache.obter('a') == 1
+    assert cache.obter('a') == 1
+    assert (cache.acertos, cache.falhas) == (2, 1)
+    assert cache.estatisticas()['taxa_acerto'] == round(2 / 3, 4)
+
+
+def test_remove_o_usado_ha_mais_tempo():
+    cache = CacheLRU('teste', 2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    cache.obter('a')  # 'b' passa a ser o mais antigo
+    cache.guardar('c', 3)
+    assert cache.obter('b') is normalizador._AUSENTE
+    assert (cache.obter('a'), cache.obter('c')) == (1, 3)
+    assert cache.remocoes == 1
+
+    cache.redimensionar(1)
+    assert cache.estatisticas()['tamanho'] == 1
+    assert cache.obter('c') == 3
+    cache.redimensionar(0)
+    cache.guardar('d', 4)
+    assert cache.estatisticas()['tamanho'] == 0
+
+
+def test_comparacao_usa_o_cache():
+    normalizador_texto = NormalizadorTexto()
+    assert normalizador_texto.comparar_palavras('coracao', 'Coração')
+    assert normalizador_texto.comparar_palavras('coracao', 'CORAÇÃO')
+    estatisticas = estatisticas_cache()['chave_comparacao']
+    assert estatisticas['acertos'] == 1
+    assert estatisticas['tamanho'] == 3
+
+
+def test_texto_longo_nao_entra_no_cache():
+    normalizador_texto = NormalizadorTexto()
+    longo = 'acao' * (TEXTO_MAXIMO_CACHE // 4 + 1)
+    assert len(longo) > TEXTO_MAXIMO_CACHE
+    assert normalizador_texto.comparar_palavras(longo, longo)
+    assert normalizador_texto.chave_comparacao(longo) == longo[:-3] + 'cao'
+    assert all(
+        estatisticas['tamanho'] == estatisticas['acertos'] == estatisticas['falhas'] == 0
+        for estatisticas in estatisticas_cache().values()
+    )
@@ -0,0 +1,195 @@
+"""
+Snapshot das salas em memória: um jogo no meio do turno sobrevive à troca do worker
+
+Os primeiros testes fazem a ida e volta pelo arquivo (salvar, restaurar em
+um armazém novo, continuar jogando, salvar de novo, inclusive com a sala
+ainda adiada). O último sobe o gunicorn com o gunicorn.conf.py do projeto, encerra o
+worker no meio de um turno e confere que os clientes reconectados continuam
+o mesmo jogo no worker novo.
+"""
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from armazem_salas import ArmazemSalasMemoria
+from jogo import Configuracao, Jogador, PartidaMultiplayer
+from snapshot_salas import SnapshotSalas
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CODIGO = 'SNAP01'
+PALAVRAS = {'Ana': ['casa', 'coracao', 'porta', 'mesa'], 'Bia': ['gato', 'cafe', 'rato', 'pato']}
+
+
+def partida_no_meio_do_turno():
+    """Ana acertou uma palavra e errou a seguinte: é a vez da Bia"""
+    partida = PartidaMultiplayer(Configuracao(4, 2))
+    partida.codigo_sala = CODIGO
+    partida.criador = 'Ana'
+    for nome, palavras in PALAVRAS.items():
+        partida.adicionar_jogador(Jogador(nome, 4))
+        partida.conectar_jogador(nome, f'sid-{nome}')
+        partida.definir_palavras(partida.obter_jogador(nome), palavras)
+    partida.iniciar_jogo()
+    assert partida.tentar_adivinhar('Ana', 'café')[0]
+    assert not partida.tentar_adivinhar('Ana', 'xx')[0]
+    partida.publicar_estado()
+    return partida
+
+
+def reiniciar(caminho):
+    """Armazém vazio de um processo novo, restaurado do snapshot"""
+    armazem = ArmazemSalasMemoria()
+    snapshot = SnapshotSalas(armazem, caminho, intervalo=0)
+    assert snapshot.restaurar() == 1
+    return armazem, snapshot
+
+
+def test_jogo_no_meio_do_turno_volta_do_snapshot(tmp_path):
+    caminho = str(tmp_path / 'salas.snap')
+    armazem = ArmazemSalasMemoria()
+    original = partida_no_meio_do_turno()
+    armazem.criar(CODIGO, original)
+    SnapshotSalas(armazem, caminho, intervalo=0).salvar()
+
+    armazem, snapshot = reiniciar(caminho)
+    assert armazem.contar_em_andamento() == 1
+    restaurada = armazem.obter(CODIGO)
+    assert restaurada.get_estado_jogo() == original.get_estado_jogo()
+    assert restaurada.get_jogador_da_vez().nome == 'Bia'
+    assert all(not jogador.conectado for jogador in restaurada.jogadores)
+
+    # Os clientes reconectam e o turno continua de onde parou
+    versao = restaurada.versao_estado
+    restaurada.conectar_jogador('Bia', 'sid-novo')
+    assert restaurada.tentar_adivinhar('Bia', 'coração')[0]
+    assert restaurada.publicar_estado()['base'] == versao
+
+    # Segunda troca de worker: a sala alterada é gravada de novo
+    snapshot.salvar()
+    armazem, _ = reiniciar(caminho)
+    assert armazem.obter(CODIGO).get_estado_jogo() == restaurada.get_estado_jogo()
+
+
+def test_sala_ainda_adiada_sobrevive_a_outra_troca(tmp_path):
+    caminho = str(tmp_path / 'salas.snap')
+    armazem = ArmazemSalasMemoria()
+    original = partida_no_meio_do_turno()
+    armazem.criar(CODIGO, original)
+    SnapshotSalas(armazem, caminho, intervalo=0).salvar()
+
+    # Ninguém acessou a sala: ela é copiada do arquivo anterior sem ser desserializada
+    _, snapshot = reiniciar(caminho)
+    snapshot.salvar()
+    armazem, _ = reiniciar(caminho)
+    assert armazem.obter(CODIGO).get_estado_jogo() == original.get_estado_jogo()
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def aguardar(condicao, segundos=15, descricao='condição'):
+    fim = time.monotonic() + segundos
+    while time.monotonic() < fim:
+        resultado = condicao()
+        if resultado:
+            return resultado
+        time.sleep(0.05)
+    raise AssertionError(f'tempo esgotado esperando {descricao}')
+
+
+class Cliente:
+    """Cliente Socket.IO que, ao reconectar, entra de novo na sala como a página faz"""
+
+    def __init__(self, socketio, url, nome):
+        self.nome = nome
+        self.sala = None
+        self.eventos = []
+        self.sio = socketio.Client(reconnection_delay=0.2, reconnection_delay_max=0.5)
+        self.sio.on('*', lambda evento, *args: self.eventos.append((evento, args[0] if args else None)))
+        self.sio.on('connect', self._ao_conectar)
+        self.sio.connect(url, transports=['polling'])  # O worker padrão ("gevent") não faz o upgrade
+
+    def _ao_conectar(self):
+        if self.sala:
+            self.sio.emit('entrar_na_sala', {'sala': self.sala, 'nome': self.nome})
+
+    def esperar(self, nome_evento):
+        def recebido():
+            for i, (evento, dados) in enumerate(self.eventos):
+                if evento == nome_evento:
+                    del self.eventos[:i + 1]
+                    return dados or True
+        return aguardar(recebido, descricao=f'{nome_evento} ({self.nome})')
+
+
+def test_troca_do_worker_no_meio_do_turno(tmp_path):
+    socketio = pytest.importorskip('socketio')
+    pytest.importorskip('websocket')
+    pytest.importorskip('gunicorn')
+
+    porta = porta_livre()
+    log = tmp_path / 'gunicorn.log'
+    ambiente = dict(
+        os.environ, SALAS_ARMAZEM='memoria', WEB_CONCURRENCY='1', LIMITES_ATIVOS='0',
+        SNAPSHOT_CAMINHO=str(tmp_path / 'salas.snap'), DIARIO_CAMINHO='',
+        GUNICORN_CMD_ARGS=f'--bind 127.0.0.1:{porta} --graceful-timeout 2'
+    )
+    with open(log, 'w') as saida:
+        servidor = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+            cwd=RAIZ, env=ambiente, stdout=saida, stderr=subprocess.STDOUT
+        )
+
+    def workers():
+        return re.findall(r'Booting worker with pid: (\d+)', log.read_text())
+
+    clientes = []
+    try:
+        aguardar(workers, descricao='o worker do gunicorn')
+        url = f'http://127.0.0.1:{porta}'
+        ana = Cliente(socketio, url, 'Ana')
+        clientes.append(ana)
+        ana.sio.emit('criar_sala', {'nome': 'Ana', 'num_palavras': 4, 'max_jogadores': 2})
+        codigo = ana.esperar('sala_criada')['codigo']
+        bia = Cliente(socketio, url, 'Bia')
+        clientes.append(bia)
+        bia.sio.emit('entrar_na_sala', {'sala': codigo, 'nome': 'Bia'})
+        bia.esperar('pode_comecar')
+        ana.sala = bia.sala = codigo
+        ana.sio.emit('enviar_palavras', {'palavras': PALAVRAS['Ana']})
+        bia.sio.emit('enviar_palavras', {'palavras': PALAVRAS['Bia']})
+        bia.esperar('jogo_iniciado')
+        ana.sio.emit('tentar_adivinhar', {'palavra': 'café'})
+        assert ana.esperar('resposta_tentativa')['acertou']
+        ana.sio.emit('tentar_adivinhar', {'palavra': 'xx'})
+        antes = ana.esperar('resposta_tentativa')['patch']['versao']
+
+        # Encerra o worker como num deploy: worker_exit grava o snapshot e o master sobe outro
+        os.kill(int(workers()[-1]), signal.SIGTERM)
+        aguardar(lambda: len(workers()) == 2, descricao='o worker novo')
+        bia.esperar('jogo_iniciado')  # Reconectada ao jogo em andamento
+
+        bia.sio.emit('obter_estado', {})
+        estado = bia.esperar('estado_atualizado')['estado']
+        assert estado['jogador_da_vez'] == 'Bia'
+        assert estado['versao'] >= antes
+        jogadores = {jogador['nome']: jogador for jogador in estado['jogadores']}
+        assert jogadores['Ana']['palavra_atual_index'] == 2
+
+        bia.sio.emit('tentar_adivinhar', {'palavra': 'coração'})
+        assert bia.esperar('resposta_tentativa')['acertou']
+        assert '1 salas restauradas' in log.read_text()
+    finally:
+        for cliente in clientes:
+            cliente.sio.disconnect()
+        servidor.send_signal(signal.SIGTERM)
+        servidor.wait(30)